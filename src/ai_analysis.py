@@ -1,58 +1,161 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import json
-import ast
-from typing import Any, Dict, Optional, Tuple, List, Callable
+import math
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Tuple, List, Callable, Sequence
 
-from .config import AppConfig, create_gemini_model, _build_generation_config, logger
+from .config import AI_CACHE_TTL_SECONDS, AppConfig, create_batch_client, create_gemini_model, _build_generation_config, _extract_text, backoff_delay, logger
 
+try:
+	import xxhash  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+	xxhash = None  # type: ignore
 
-def _hash_patient_payload(payload: Dict[str, Any], namespace: str = "default") -> str:
-	serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-	return hashlib.sha256((namespace + "::" + serialized).encode("utf-8")).hexdigest()
+try:
+	import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+	orjson = None  # type: ignore
 
+try:
+	import json_repair  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+	json_repair = None  # type: ignore
 
-def _json(obj: Any) -> str:
-	return json.dumps(obj, ensure_ascii=False)
+try:
+	from google.api_core import exceptions as google_exceptions  # type: ignore
+except Exception:  # pragma: no cover - optional at runtime
+	google_exceptions = None  # type: ignore
 
+# Erros que não se resolvem com nova tentativa (chave inválida, permissão, requisição malformada)
+_NON_RETRYABLE: Tuple[type, ...] = (
+	(google_exceptions.Unauthenticated, google_exceptions.PermissionDenied, google_exceptions.InvalidArgument)
+	if google_exceptions is not None
+	else ()
+)
+# Cota excedida (429): a janela de limite é por minuto, não adianta tentar logo em seguida
+_RATE_LIMITED: Tuple[type, ...] = (google_exceptions.ResourceExhausted,) if google_exceptions is not None else ()
 
-def _build_prompt_general(payload: Dict[str, Any]) -> str:
+
+def _digest(*chunks: bytes) -> str:
+	# Chave de cache local (não criptográfica): xxh3 se disponível, senão blake2b curto.
+	# Os pedaços são passados ao hasher em sequência, sem concatenar o payload serializado.
+	h = xxhash.xxh3_64() if xxhash is not None else hashlib.blake2b(digest_size=8)
+	for chunk in chunks:
+		h.update(chunk)
+	return h.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _namespace_prefix(namespace: str) -> bytes:
+	return namespace.encode("utf-8") + b"::"
+
+
+def _hash_patient_payload(payload: Dict[str, Any], namespace: str = "default", serialized: Optional[bytes] = None) -> str:
+	if serialized is None:
+		serialized = _canonicalize(payload)[0]
+	return _digest(_namespace_prefix(namespace), serialized)
+
+
+def _json_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+	if orjson is not None:
+		option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+		return orjson.dumps(obj, option=option)
+	return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+
+def _json(obj: Any, sort_keys: bool = False) -> str:
+	return _json_bytes(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+def _json_loads(data: Any) -> Any:
+	if orjson is not None:
+		return orjson.loads(data)
+	return json.loads(data)
+
+
+# (bytes normalizados para o hash, JSON do paciente, JSON de cada escore, JSON de cada seção do paciente)
+Serialized = Tuple[bytes, str, Dict[str, str], Dict[str, str]]
+
+
+def _fragments(obj: Dict[str, Any]) -> Dict[str, bytes]:
+	return {str(k): _json_bytes(v, sort_keys=True) for k, v in obj.items()}
+
+
+def _is_blank(value: Any) -> bool:
+	return value is None or (isinstance(value, (str, list, tuple, dict)) and not value)
+
+
+def _as_number(text: str) -> Any:
+	# "70" -> 70, "36.5" -> 36.5; só converte se o número voltar exatamente ao texto
+	for cast in (int, float):
+		try:
+			number = cast(text)
+		except ValueError:
+			continue
+		return number if str(number) == text and math.isfinite(number) else text
+	return text
+
+
+def _normalize_value(obj: Any) -> Any:
+	"""Forma canônica de um valor do payload, usada apenas na chave de cache: remove campos
+	vazios (None, "", [], {}), normaliza espaços em strings, converte strings numéricas
+	("70" -> 70), troca floats inteiros por int (0.0 -> 0) e ordena listas de dicionários.
+	Entradas equivalentes passam a gerar a mesma chave de cache."""
+	if isinstance(obj, dict):
+		out = {}
+		for k, v in obj.items():
+			v = _normalize_value(v)
+			if not _is_blank(v):
+				out[k] = v
+		return out
+	if isinstance(obj, (list, tuple)):
+		items = [_normalize_value(v) for v in obj]
+		if items and all(isinstance(v, dict) for v in items):
+			items.sort(key=lambda v: _json_bytes(v, sort_keys=True))
+		return items
+	if isinstance(obj, str):
+		obj = _as_number(" ".join(obj.split()))
+	if isinstance(obj, float) and obj.is_integer():
+		return int(obj)
+	return obj
+
+
+def _canonicalize(payload: Dict[str, Any]) -> Serialized:
+	"""Serializa o payload uma única vez para os prompts e calcula os bytes da chave de cache.
+
+	Os prompts recebem o payload original: cada escore e cada seção do paciente é
+	serializado isoladamente, o JSON completo do paciente é composto a partir das seções
+	e todos os prompts reutilizam os fragmentos. Só a chave de cache usa a forma
+	normalizada (ver ``_normalize_value``), de modo que o texto enviado à IA não muda.
+	"""
 	patient = payload.get("patient", {})
 	scores = payload.get("scores", {})
+	if isinstance(patient, dict):
+		sections_raw = _fragments(patient)
+		patient_raw = b"{" + b",".join(_json_bytes(k) + b":" + sections_raw[k] for k in sorted(sections_raw)) + b"}"
+	else:
+		sections_raw = {}
+		patient_raw = _json_bytes(patient, sort_keys=True)
+	scores_json = {k: v.decode("utf-8") for k, v in _fragments(scores or {}).items()}
+	sections_json = {k: v.decode("utf-8") for k, v in sections_raw.items()}
+	key_raw = _json_bytes(_normalize_value(payload), sort_keys=True)
+	return key_raw, patient_raw.decode("utf-8"), scores_json, sections_json
 
-	demo = patient.get("demographics", {})
-	comorb = patient.get("comorbidities", {})
-	meds = patient.get("medications", {})
-	labs = patient.get("labs", {})
-	surgical = patient.get("surgical", {})
-	functional = patient.get("functional", {})
-	physical = patient.get("physical_exam", {})
-
-	asa = scores.get("asa")
-	nsqip = scores.get("nsqip")
-	rcri = scores.get("rcri")
-	ariscat = scores.get("ariscat")
-	akics = scores.get("akics")
-	predeliric = scores.get("pre_deliric")
-
-	header = (
-		"Você é um anestesiologista especialista em avaliação pré-operatória.\n"
-		"Analise este paciente baseando-se nos escores validados calculados e forneça uma avaliação de risco perioperatório estruturada.\n\n"
-		"INSTRUÇÕES CRÍTICAS: NÃO escreva preâmbulos, saudações ou confirmações (ex.: 'Com certeza...'). "
-		"Responda APENAS com um JSON válido exatamente no formato solicitado, iniciando pelo caractere { e terminando em }.\n\n"
-		f"DADOS DO PACIENTE: {_json(patient)}\n\n"
-		"ESCORES CALCULADOS:\n"
-		f"ASA Physical Status: {_json(asa)}\n"
-		f"NSQIP Risk Calculator: {_json(nsqip)}\n"
-		f"RCRI (Revised Cardiac Risk Index): {_json(rcri)}\n"
-		f"ARISCAT: {_json(ariscat)}\n"
-		f"AKICS (se aplicável): {_json(akics)}\n"
-		f"PRE-DELIRIC: {_json(predeliric)}\n\n"
-		f"CIRURGIA: {_json(surgical)}\n\n"
-		"Forneça resposta em JSON ESTRITO no formato abaixo, baseada EXCLUSIVAMENTE nos escores validados:\n"
-	)
-	template = """
+
+_GENERAL_TEMPLATE = """
 {
   "resumo_executivo": "...",
   "por_sistemas": {
@@ -67,30 +170,8 @@ def _build_prompt_general(payload: Dict[str, Any]) -> str:
   "monitorizacao": ["..."]
 }
 """
-	footer = "Use linguagem técnica adequada para anestesiologistas e cite guidelines (ACC/AHA, ESC/ESA, ASA, ERAS, ACS-NSQIP) quando relevante."
-	return header + template + footer
 
-
-def _build_prompt_medications(payload: Dict[str, Any]) -> str:
-	patient = payload.get("patient", {})
-	scores = payload.get("scores", {})
-	surgical = patient.get("surgical", {})
-	meds = patient.get("medications", {})
-
-	header = (
-		"Baseado nos escores de risco calculados e dados clínicos, analise as medicações em uso seguindo guidelines baseadas em evidência.\n\n"
-		"INSTRUÇÕES CRÍTICAS: NÃO escreva preâmbulos, saudações ou confirmações. "
-		"Responda APENAS com um JSON válido exatamente no formato solicitado, iniciando em { e terminando em }.\n\n"
-		"ESCORES DE RISCO:\n"
-		f"RCRI: {_json(scores.get('rcri'))}\n"
-		f"ARISCAT: {_json(scores.get('ariscat'))}\n"
-		f"AKICS: {_json(scores.get('akics'))}\n"
-		f"ASA: {_json(scores.get('asa'))}\n\n"
-		f"MEDICAÇÕES ATUAIS: {_json(meds)}\n"
-		f"TIPO DE CIRURGIA: {_json(surgical)}\n\n"
-		"Responda em JSON ESTRITO:\n"
-	)
-	template = """
+_MEDICATIONS_TEMPLATE = """
 {
   "suspender": ["medicação e antecedência (com justificativa)"],
   "manter": ["medicação (com justificativa)"],
@@ -99,25 +180,8 @@ def _build_prompt_medications(payload: Dict[str, Any]) -> str:
   "bridge": ["cenários de terapia ponte e como conduzir"]
 }
 """
-	footer = "Referencie guidelines (ACC/AHA, ESC/ESA, ASA) quando aplicável."
-	return header + template + footer
-
 
-def _build_prompt_scores_interpretation(payload: Dict[str, Any]) -> str:
-	scores = payload.get("scores", {})
-	header = (
-		"Interprete os resultados dos escores de forma integrada e clinicamente relevante. Responda em JSON ESTRITO.\n"
-		"INSTRUÇÕES CRÍTICAS: Não escreva preâmbulos/saudações/'com certeza'; responda apenas com um JSON válido (inicie em { e termine em }).\n"
-		"Resultados:\n"
-		f"ASA: {_json(scores.get('asa'))}\n"
-		f"NSQIP: {_json(scores.get('nsqip'))}\n"
-		f"RCRI: {_json(scores.get('rcri'))}\n"
-		f"ARISCAT: {_json(scores.get('ariscat'))}\n"
-		f"AKICS: {_json(scores.get('akics'))}\n"
-		f"PRE-DELIRIC: {_json(scores.get('pre_deliric'))}\n\n"
-		"Formato:\n"
-	)
-	template = """
+_SCORES_TEMPLATE = """
 {
   "concordancia": ["onde os escores convergem"],
   "divergencia": ["onde divergem e por quê"],
@@ -128,354 +192,915 @@ def _build_prompt_scores_interpretation(payload: Dict[str, Any]) -> str:
   "otimizacao_preop": ["ações de otimização"]
 }
 """
-	footer = "Mantenha linguagem técnica apropriada para anestesiologistas."
-	return header + template + footer
+
+
+# Partes estáticas dos prompts, montadas uma única vez na importação do módulo
+_GENERAL_INTRO = (
+	"Você é um anestesiologista especialista em avaliação pré-operatória.\n"
+	"Analise este paciente baseando-se nos escores validados calculados e forneça uma avaliação de risco perioperatório estruturada.\n\n"
+	"INSTRUÇÕES CRÍTICAS: NÃO escreva preâmbulos, saudações ou confirmações (ex.: 'Com certeza...'). "
+	"Responda APENAS com um JSON válido exatamente no formato solicitado, iniciando pelo caractere { e terminando em }.\n\n"
+)
+_GENERAL_FOOTER = "Use linguagem técnica adequada para anestesiologistas e cite guidelines (ACC/AHA, ESC/ESA, ASA, ERAS, ACS-NSQIP) quando relevante."
+_GENERAL_OUTRO = (
+	"Forneça resposta em JSON ESTRITO no formato abaixo, baseada EXCLUSIVAMENTE nos escores validados:\n"
+	+ _GENERAL_TEMPLATE
+	+ _GENERAL_FOOTER
+)
+
+_MEDICATIONS_INTRO = (
+	"Baseado nos escores de risco calculados e dados clínicos, analise as medicações em uso seguindo guidelines baseadas em evidência.\n\n"
+	"INSTRUÇÕES CRÍTICAS: NÃO escreva preâmbulos, saudações ou confirmações. "
+	"Responda APENAS com um JSON válido exatamente no formato solicitado, iniciando em { e terminando em }.\n\n"
+	"ESCORES DE RISCO:\n"
+)
+_MEDICATIONS_OUTRO = (
+	"Responda em JSON ESTRITO:\n"
+	+ _MEDICATIONS_TEMPLATE
+	+ "Referencie guidelines (ACC/AHA, ESC/ESA, ASA) quando aplicável."
+)
+
+_SCORES_INTRO = (
+	"Interprete os resultados dos escores de forma integrada e clinicamente relevante. Responda em JSON ESTRITO.\n"
+	"INSTRUÇÕES CRÍTICAS: Não escreva preâmbulos/saudações/'com certeza'; responda apenas com um JSON válido (inicie em { e termine em }).\n"
+	"Resultados:\n"
+)
+_SCORES_OUTRO = (
+	"Formato:\n"
+	+ _SCORES_TEMPLATE
+	+ "Mantenha linguagem técnica apropriada para anestesiologistas."
+)
+
+# Seções do prompt combinado: namespace -> (descrição no enunciado, modelo JSON)
+_ALL_SECTIONS: Dict[str, Tuple[str, str]] = {
+	"general": ("avaliação geral de risco perioperatório", _GENERAL_TEMPLATE),
+	"medications": ("manejo das medicações em uso", _MEDICATIONS_TEMPLATE),
+	"scores_interpretation": ("interpretação integrada dos escores", _SCORES_TEMPLATE),
+}
+
+
+@lru_cache(maxsize=None)
+def _all_prompt_parts(sections: Tuple[str, ...]) -> Tuple[str, str]:
+	"""Introdução e fechamento do prompt combinado para as seções pedidas (montados uma vez)."""
+	labels = [_ALL_SECTIONS[ns][0] for ns in sections]
+	listed = labels[0] if len(labels) == 1 else ", ".join(labels[:-1]) + " e " + labels[-1]
+	intro = (
+		"Você é um anestesiologista especialista em avaliação pré-operatória.\n"
+		f"Com base nos escores validados calculados, produza as seguintes análises: {listed}.\n\n"
+		"INSTRUÇÕES CRÍTICAS: NÃO escreva preâmbulos, saudações ou confirmações (ex.: 'Com certeza...'). "
+		"Responda APENAS com um JSON válido exatamente no formato solicitado, iniciando pelo caractere { e terminando em }.\n\n"
+	)
+	outro = (
+		f"Forneça resposta em JSON ESTRITO com exatamente as {len(sections)} chaves de topo abaixo:\n"
+		+ "{\n"
+		+ ",\n".join(f'"{ns}": ' + _ALL_SECTIONS[ns][1].strip() for ns in sections)
+		+ "\n}\n"
+		+ _GENERAL_FOOTER
+	)
+	return intro, outro
+
+
+# (rótulo, chave do escore) na ordem em que aparecem em cada prompt
+_GENERAL_SCORE_LINES = (
+	("ASA Physical Status: ", "asa"),
+	("NSQIP Risk Calculator: ", "nsqip"),
+	("RCRI (Revised Cardiac Risk Index): ", "rcri"),
+	("ARISCAT: ", "ariscat"),
+	("AKICS (se aplicável): ", "akics"),
+	("PRE-DELIRIC: ", "pre_deliric"),
+)
+_MEDICATIONS_SCORE_LINES = (("RCRI: ", "rcri"), ("ARISCAT: ", "ariscat"), ("AKICS: ", "akics"), ("ASA: ", "asa"))
+_SCORES_SCORE_LINES = (
+	("ASA: ", "asa"),
+	("NSQIP: ", "nsqip"),
+	("RCRI: ", "rcri"),
+	("ARISCAT: ", "ariscat"),
+	("AKICS: ", "akics"),
+	("PRE-DELIRIC: ", "pre_deliric"),
+)
+
+
+def _score_lines(parts: List[str], lines: Tuple[Tuple[str, str], ...], sj: Dict[str, str]) -> None:
+	for label, key in lines:
+		parts.append(label)
+		parts.append(sj.get(key, "null"))
+		parts.append("\n")
+
+
+def _build_prompt_general(payload: Dict[str, Any], serialized: Optional[Serialized] = None) -> str:
+	_, patient_json, sj, sections = serialized or _canonicalize(payload)
+	parts = [_GENERAL_INTRO, "DADOS DO PACIENTE: ", patient_json, "\n\nESCORES CALCULADOS:\n"]
+	_score_lines(parts, _GENERAL_SCORE_LINES, sj)
+	parts += ["\nCIRURGIA: ", sections.get("surgical", "{}"), "\n\n", _GENERAL_OUTRO]
+	return "".join(parts)
+
+
+def _build_prompt_medications(payload: Dict[str, Any], serialized: Optional[Serialized] = None) -> str:
+	_, _, sj, sections = serialized or _canonicalize(payload)
+	parts = [_MEDICATIONS_INTRO]
+	_score_lines(parts, _MEDICATIONS_SCORE_LINES, sj)
+	parts += [
+		"\nMEDICAÇÕES ATUAIS: ", sections.get("medications", "{}"),
+		"\nTIPO DE CIRURGIA: ", sections.get("surgical", "{}"),
+		"\n\n", _MEDICATIONS_OUTRO,
+	]
+	return "".join(parts)
+
+
+def _build_prompt_scores_interpretation(payload: Dict[str, Any], serialized: Optional[Serialized] = None) -> str:
+	_, _, sj, _ = serialized or _canonicalize(payload)
+	parts = [_SCORES_INTRO]
+	_score_lines(parts, _SCORES_SCORE_LINES, sj)
+	parts += ["\n", _SCORES_OUTRO]
+	return "".join(parts)
+
+
+def _build_prompt_all(
+	payload: Dict[str, Any],
+	serialized: Optional[Serialized] = None,
+	sections: Tuple[str, ...] = tuple(_ALL_SECTIONS),
+) -> str:
+	"""Prompt único com as análises de ``sections``; o contexto do paciente é enviado uma só vez."""
+	_, patient_json, sj, patient_sections = serialized or _canonicalize(payload)
+	intro, outro = _all_prompt_parts(sections)
+	parts = [intro, "DADOS DO PACIENTE: ", patient_json, "\n\nESCORES CALCULADOS:\n"]
+	_score_lines(parts, _GENERAL_SCORE_LINES, sj)
+	if "medications" in sections:
+		parts += ["\nMEDICAÇÕES ATUAIS: ", patient_sections.get("medications", "{}")]
+	parts += ["\nCIRURGIA: ", patient_sections.get("surgical", "{}"), "\n\n", outro]
+	return "".join(parts)
+
+
+# Resultado de uma análise: (estrutura parseada, texto bruto da IA)
+AnalysisResult = Tuple[Dict[str, Any], str]
 
 
 class AIAnalysisCache:
-	def __init__(self) -> None:
-		self._cache: Dict[str, Dict[str, Any]] = {}
+	"""Cache LRU em memória das análises da IA, limitado a ``max_entries``.
 
-	def get(self, key: str) -> Optional[Dict[str, Any]]:
-		return self._cache.get(key)
+	Cada entrada guarda o par (estrutura parseada, texto bruto), sem copiar o texto
+	para dentro do dicionário parseado; o texto bruto fica comprimido com zlib e só é
+	descomprimido na leitura.
 
-	def set(self, key: str, value: Dict[str, Any]) -> None:
-		self._cache[key] = value
+	Com ``path`` definido, as entradas também são gravadas em SQLite (L2) e sobrevivem
+	a reinícios do processo; entradas mais antigas que ``ttl_seconds`` são descartadas.
+	"""
 
+	def __init__(self, max_entries: int = 256, path: Optional[str] = None, ttl_seconds: int = AI_CACHE_TTL_SECONDS) -> None:
+		self.max_entries = max(1, max_entries)
+		self.ttl_seconds = ttl_seconds
+		self._cache: "OrderedDict[str, Tuple[Dict[str, Any], bytes]]" = OrderedDict()
+		self._lock = threading.Lock()
+		self._db: Optional[sqlite3.Connection] = None
+		if path:
+			try:
+				Path(path).parent.mkdir(parents=True, exist_ok=True)
+				self._db = sqlite3.connect(path, check_same_thread=False)
+				self._db.execute(
+					"CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, ts INTEGER NOT NULL)"
+				)
+				self._db.commit()
+			except Exception as exc:
+				logger.warning("Cache em disco indisponível (%s): %s", path, exc)
+				self._db = None
 
-_cache = AIAnalysisCache()
+	def _remember(self, key: str, value: AnalysisResult) -> None:
+		if key in self._cache:
+			self._cache.move_to_end(key)
+		elif len(self._cache) >= self.max_entries:
+			self._cache.popitem(last=False)
+		parsed, raw = value
+		self._cache[key] = (parsed, zlib.compress(raw.encode("utf-8")))
+
+	def _load(self, key: str) -> Optional[AnalysisResult]:
+		if self._db is None:
+			return None
+		try:
+			row = self._db.execute("SELECT value, ts FROM ai_cache WHERE key = ?", (key,)).fetchone()
+			if row is None:
+				return None
+			if time.time() - row[1] > self.ttl_seconds:
+				self._db.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+				self._db.commit()
+				return None
+			blob = row[0]
+			try:
+				blob = zlib.decompress(blob)
+			except zlib.error:
+				pass  # entrada gravada antes da compressão
+			parsed, raw = _json_loads(blob)
+		except Exception as exc:
+			logger.warning("Falha ao ler cache em disco: %s", exc)
+			return None
+		return (parsed, raw) if isinstance(parsed, dict) else None
+
+	def get(self, key: str) -> Optional[AnalysisResult]:
+		with self._lock:
+			entry = self._cache.get(key)
+			if entry is not None:
+				self._cache.move_to_end(key)
+				return entry[0], zlib.decompress(entry[1]).decode("utf-8")
+			value = self._load(key)
+			if value is not None:
+				self._remember(key, value)
+			return value
+
+	def set(self, key: str, value: AnalysisResult) -> None:
+		"""Grava um resultado válido da IA; estruturas padrão de falha não devem ser gravadas."""
+		with self._lock:
+			self._remember(key, value)
+			if self._db is None:
+				return
+			try:
+				self._db.execute(
+					"INSERT OR REPLACE INTO ai_cache (key, value, ts) VALUES (?, ?, ?)",
+					(key, zlib.compress(_json_bytes(list(value))), int(time.time())),
+				)
+				self._db.commit()
+			except Exception as exc:
+				logger.warning("Falha ao gravar cache em disco: %s", exc)
+
+
+_cache = AIAnalysisCache(path=os.getenv("AI_CACHE_PATH") or None)
+
+
+_KEY_ALIASES: Dict[str, str] = {
+	"resumo": "resumo_executivo",
+	"executive_summary": "resumo_executivo",
+	"resumo_executivo": "resumo_executivo",
+	"por_sistemas": "por_sistemas",
+	"analise_por_sistemas": "por_sistemas",
+	"analise_sistemas": "por_sistemas",
+	"estratificacao_geral": "estratificacao_geral",
+	"estratificação_geral": "estratificacao_geral",
+	"overall_risk": "estratificacao_geral",
+	"recomendacoes": "recomendacoes",
+	"recomendações": "recomendacoes",
+	"recommendations": "recomendacoes",
+	"medicacoes": "medicacoes",
+	"medicações": "medicacoes",
+	"medications": "medicacoes",
+	"monitorizacao": "monitorizacao",
+	"monitorização": "monitorizacao",
+	"monitoring": "monitorizacao",
+}
+
+_M_ALIASES: Dict[str, str] = {
+	"suspender": "suspender",
+	"suspensão": "suspender",
+	"hold": "suspender",
+	"manter": "manter",
+	"continuar": "manter",
+	"continue": "manter",
+	"ajustar": "ajustar",
+	"adjust": "ajustar",
+}
 
 
 def _normalize_top_keys(data: Dict[str, Any]) -> Dict[str, Any]:
-	key_aliases = {
-		"resumo": "resumo_executivo",
-		"executive_summary": "resumo_executivo",
-		"resumo_executivo": "resumo_executivo",
-		"por_sistemas": "por_sistemas",
-		"analise_por_sistemas": "por_sistemas",
-		"analise_sistemas": "por_sistemas",
-		"estratificacao_geral": "estratificacao_geral",
-		"estratificação_geral": "estratificacao_geral",
-		"overall_risk": "estratificacao_geral",
-		"recomendacoes": "recomendacoes",
-		"recomendações": "recomendacoes",
-		"recommendations": "recomendacoes",
-		"medicacoes": "medicacoes",
-		"medicações": "medicacoes",
-		"medications": "medicacoes",
-		"monitorizacao": "monitorizacao",
-		"monitorização": "monitorizacao",
-		"monitoring": "monitorizacao",
-	}
 	out: Dict[str, Any] = {}
 	for k, v in data.items():
-		kk = key_aliases.get(str(k), str(k))
-		out[kk] = v
-	# defaults
-	out.setdefault("resumo_executivo", "")
-	out.setdefault("por_sistemas", {})
-	out.setdefault("estratificacao_geral", "")
-	out.setdefault("recomendacoes", [])
-	meds = out.get("medicacoes") or {}
-	if not isinstance(meds, dict):
-		meds = {}
-	# normalize med keys
-	m_alias = {
-		"suspender": "suspender",
-		"suspensão": "suspender",
-		"hold": "suspender",
-		"manter": "manter",
-		"continuar": "manter",
-		"continue": "manter",
-		"ajustar": "ajustar",
-		"adjust": "ajustar",
-	}
-	m_out: Dict[str, Any] = {"suspender": [], "manter": [], "ajustar": []}
-	for k, v in meds.items() if isinstance(meds, dict) else []:
-		kk = m_alias.get(str(k), str(k))
-		m_out.setdefault(kk, [])
-		if isinstance(v, list):
-			m_out[kk] = v
-		elif v:
-			m_out[kk] = [str(v)]
-	out["medicacoes"] = m_out
-	out.setdefault("monitorizacao", [])
+		k = k if isinstance(k, str) else str(k)
+		out[_KEY_ALIASES.get(k, k)] = v
+	# Chaves ausentes ficam a cargo do esquema da análise (_from_schema)
+	if "medicacoes" in out:
+		meds = out["medicacoes"]
+		# normalize med keys (valores não-lista viram lista de um item; vazios são ignorados)
+		m_out = _medicacoes_empty()
+		if isinstance(meds, dict):
+			m_out.update({
+				_M_ALIASES.get(str(k), str(k)): v if isinstance(v, list) else [str(v)]
+				for k, v in meds.items()
+				if isinstance(v, list) or v
+			})
+		out["medicacoes"] = m_out
 	return out
 
 
-def _parse_response_text(text: str, expected_keys: Optional[List[str]] = None, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-	text = (text or "").strip()
-	
-	if expected_keys is None:
-		expected_keys = ["resumo_executivo", "por_sistemas", "estratificacao_geral", "recomendacoes", "medicacoes", "monitorizacao"]
-	
-	# Remove cercas ```
-	if text.startswith("```"):
-		lines = text.splitlines()
-		if len(lines) >= 3 and lines[0].startswith("```") and lines[-1].strip().startswith("```"):
-			text = "\n".join(lines[1:-1]).strip()
-	
-	# Primeira tentativa: JSON direto (leniente)
+# Esquema de cada análise: (chave, fábrica do valor vazio). Cada chamada da fábrica
+# devolve um objeto novo, então os padrões nunca são compartilhados entre resultados.
+Schema = Tuple[Tuple[str, Callable[[], Any]], ...]
+
+
+def _por_sistemas_empty() -> Dict[str, List[str]]:
+	return {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
+
+
+def _medicacoes_empty() -> Dict[str, List[str]]:
+	return {"suspender": [], "manter": [], "ajustar": []}
+
+
+_GENERAL_SCHEMA: Schema = (
+	("resumo_executivo", str),
+	("por_sistemas", _por_sistemas_empty),
+	("estratificacao_geral", str),
+	("recomendacoes", list),
+	("medicacoes", _medicacoes_empty),
+	("monitorizacao", list),
+)
+_MEDS_SCHEMA: Schema = (("suspender", list), ("manter", list), ("ajustar", list), ("profilaxias", list), ("bridge", list))
+_SCORES_SCHEMA: Schema = (
+	("concordancia", list),
+	("divergencia", list),
+	("relevancia", str),
+	("limitacoes", list),
+	("risco_global", str),
+	("pontos_atencao", list),
+	("otimizacao_preop", list),
+)
+
+_AI_UNAVAILABLE = "IA indisponível. Verifique a GOOGLE_API_KEY e conectividade."
+
+
+def _from_schema(schema: Schema, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+	# Garante as chaves do esquema com o tipo vazio adequado
+	data = {} if data is None else data
+	for key, factory in schema:
+		if key not in data:
+			data[key] = factory()
+	return data
+
+
+class _ObjectScanner:
+	"""Máquina de estados que detecta o fechamento do primeiro objeto JSON de um texto
+	recebido aos poucos (respeita strings e escapes). O texto deve apenas crescer entre
+	chamadas de ``feed``; cada caractere é examinado uma única vez."""
+
+	def __init__(self) -> None:
+		self.pos = 0
+		self.start = 0
+		self.depth = 0
+		self.in_string = False
+		self.escape = False
+
+	def feed(self, text: str) -> int:
+		"""Retorna o índice da ``}`` que fecha o objeto (aberto em ``self.start``), ou -1 se
+		ainda incompleto. Chamadas seguintes continuam após essa ``}``, no próximo objeto."""
+		for i in range(self.pos, len(text)):
+			ch = text[i]
+			if self.in_string:
+				if self.escape:
+					self.escape = False
+				elif ch == "\\":
+					self.escape = True
+				elif ch == '"':
+					self.in_string = False
+			elif ch == '"':
+				self.in_string = self.depth > 0
+			elif ch == "{":
+				if self.depth == 0:
+					self.start = i
+				self.depth += 1
+			elif ch == "}" and self.depth > 0:
+				self.depth -= 1
+				if self.depth == 0:
+					self.pos = i + 1
+					return i
+		self.pos = len(text)
+		return -1
+
+
+def _extract_top_level_json(text: str) -> Optional[str]:
+	"""Trecho da primeira ``{`` até a ``}`` que a fecha, em uma única passada."""
+	start = text.find("{")
+	if start == -1:
+		return None
+	end = _ObjectScanner().feed(text[start:])
+	return text[start : start + end + 1] if end != -1 else None
+
+
+# Vírgula sobrando antes de } ou ] (erro comum em JSON gerado por LLM)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+# Resposta inteira dentro de uma cerca ```json ... ```
+_FENCE_RE = re.compile(r"^```[^\n]*\n(.*?)\n?```\s*$", re.DOTALL)
+
+
+def _loads_lenient(text: str) -> Optional[Dict[str, Any]]:
+	"""Extrai um objeto JSON de uma resposta da IA em uma única passada.
+
+	Caminho rápido: a resposta já é JSON válido (o caso comum) e é lida diretamente,
+	sem pré-processamento. Caso contrário, com ``json_repair`` instalado, cercas ```, vírgulas sobrando, aspas ausentes e JSON
+	truncado são tolerados diretamente. Sem ele, tenta o texto sem cercas e depois o
+	primeiro objeto de topo completo, removendo vírgulas finais se preciso.
+	"""
 	try:
-		data = json.loads(text)
-		if isinstance(data, dict):
-			norm = _normalize_top_keys(data)
-			# Garante chaves esperadas
-			if expected_keys:
-				for key in expected_keys:
-					if key not in norm:
-						if key == "por_sistemas":
-							norm[key] = {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
-						elif key == "medicacoes":
-							norm[key] = {"suspender": [], "manter": [], "ajustar": []}
-						elif key in ("recomendacoes", "monitorizacao"):
-							norm[key] = []
-						else:
-							norm[key] = ""
-			logger.info("Análise parseada com sucesso")
-			return norm
-	except Exception as e:
-		logger.warning(f"Falha no parse direto do JSON: {e}")
-		pass
-	# Segunda: extrair bloco entre chaves e tentar JSON
-	l = text.find("{")
-	r = text.rfind("}")
-	if l != -1 and r != -1 and r > l:
-		frag = text[l : r + 1]
+		data = _json_loads(text)
+	except Exception:
+		data = None
+	if isinstance(data, dict):
+		return data
+	text = (text or "").strip()
+	if json_repair is not None:
 		try:
-			data = json.loads(frag)
-			if isinstance(data, dict):
-				norm = _normalize_top_keys(data)
-				if expected_keys:
-					for key in expected_keys:
-						if key not in norm:
-							if key == "por_sistemas":
-								norm[key] = {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
-							elif key == "medicacoes":
-								norm[key] = {"suspender": [], "manter": [], "ajustar": []}
-							elif key in ("recomendacoes", "monitorizacao"):
-								norm[key] = []
-							else:
-								norm[key] = ""
-				logger.info("Análise parseada com sucesso (fragmento)")
-				return norm
+			data = json_repair.loads(text)
 		except Exception:
-			# Terceira tentativa: tentar corrigir JSON truncado
+			data = None
+		return data if isinstance(data, dict) and data else None
+	fenced = _FENCE_RE.match(text)
+	if fenced:
+		text = fenced.group(1).strip()
+	for candidate in (text, _extract_top_level_json(text)):
+		if not candidate:
+			continue
+		for attempt in (candidate, _TRAILING_COMMA_RE.sub(r"\1", candidate)):
 			try:
-				if not frag.endswith("}"):
-					# Contar chaves abertas vs fechadas
-					open_braces = frag.count("{")
-					close_braces = frag.count("}")
-					missing_braces = open_braces - close_braces
-					
-					# Tentar fechar arrays e objetos abertos
-					fixed_frag = frag
-					if fixed_frag.rstrip().endswith('"'):
-						fixed_frag = fixed_frag.rstrip()[:-1]
-					
-					# Adicionar fechamentos necessários
-					for _ in range(missing_braces):
-						fixed_frag += "}"
-					
-					data = json.loads(fixed_frag)
-					if isinstance(data, dict):
-						norm = _normalize_top_keys(data)
-						if expected_keys:
-							for key in expected_keys:
-								if key not in norm:
-									if key == "por_sistemas":
-										norm[key] = {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
-									elif key == "medicacoes":
-										norm[key] = {"suspender": [], "manter": [], "ajustar": []}
-									elif key in ("recomendacoes", "monitorizacao"):
-										norm[key] = []
-									else:
-										norm[key] = ""
-						logger.info("Análise parseada com sucesso (JSON corrigido)")
-						return norm
+				data = _json_loads(attempt)
 			except Exception:
-				pass
-	# Terceira: literal_eval
-	try:
-		data = ast.literal_eval(text)
-		if isinstance(data, dict):
-			norm = _normalize_top_keys(data)
-			if expected_keys:
-				for key in expected_keys:
-					if key not in norm:
-						if key == "por_sistemas":
-							norm[key] = {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
-						elif key == "medicacoes":
-							norm[key] = {"suspender": [], "manter": [], "ajustar": []}
-						elif key in ("recomendacoes", "monitorizacao"):
-							norm[key] = []
-						else:
-							norm[key] = ""
-			return norm
-	except Exception:
-		pass
-	# Fallback: garante estrutura completa, mesmo se defaults foram parciais
-	base = defaults.copy() if defaults else {}
-	# Preenche chaves esperadas ausentes
-	for key in expected_keys or []:
-		if key not in base:
-			if key == "por_sistemas":
-				base[key] = {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}
-			elif key == "medicacoes":
-				base[key] = {"suspender": [], "manter": [], "ajustar": []}
-			elif key in ("recomendacoes", "monitorizacao"):
-				base[key] = []
-			else:
-				base[key] = ""
-	# Se ainda estiver vazio (sem defaults), cria estrutura padrão
-	if not base:
-		base = {"resumo_executivo": "", "por_sistemas": {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []}, "estratificacao_geral": "", "recomendacoes": [], "medicacoes": {"suspender": [], "manter": [], "ajustar": []}, "monitorizacao": []}
-	base.setdefault("_raw_text", text)
+				continue
+			if isinstance(data, dict):
+				return data
+	return None
+
+
+def _parse_response_text(text: str, schema: Schema = _GENERAL_SCHEMA) -> Optional[Dict[str, Any]]:
+	"""Estrutura normalizada da resposta, ou None se nenhum JSON puder ser extraído."""
+	data = _loads_lenient((text or "").strip())
+	if data is None:
+		return None
+	logger.info("Análise parseada com sucesso")
+	return _from_schema(schema, _normalize_top_keys(data))
+
+
+def _unparsed_default(schema: Schema, text: str) -> Dict[str, Any]:
+	# Estrutura padrão com o texto original, para exibição; nunca vai para o cache
+	logger.warning("Falha no parse do JSON da IA; usando estrutura padrão")
+	base = _from_schema(schema)
+	base["_raw_text"] = (text or "").strip()
 	return base
 
 
-def _run_gemini(prompt: str, cfg: AppConfig) -> Optional[str]:
+def _closed_json(text: str, scanner: _ObjectScanner) -> Optional[str]:
+	"""Primeiro objeto fechado em ``text`` que é JSON legível, ou None. Chaves balanceadas
+	que não formam JSON (ex.: ``{idade 70}`` num preâmbulo) são puladas e a leitura segue."""
+	end = scanner.feed(text)
+	while end != -1:
+		candidate = text[scanner.start : end + 1]
+		if _loads_lenient(candidate) is not None:
+			return candidate
+		end = scanner.feed(text)
+	return None
+
+
+def _collect_stream(resp: Any, on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
+	"""Acumula os chunks de uma resposta em streaming e para de iterar assim que um
+	objeto JSON legível estiver fechado, sem esperar os chunks seguintes. Retorna só
+	esse objeto; se nenhum fechar, o texto completo.
+
+	A parada é apenas local: a requisição não é cancelada no servidor, que pode seguir
+	gerando (limitado por ``max_output_tokens``) até o stream ser descartado.
+
+	``on_chunk`` recebe cada trecho assim que chega (ex.: para exibição parcial na UI).
+	"""
+	text = ""
+	scanner = _ObjectScanner()
+	for chunk in resp:
+		piece = _extract_text(chunk)
+		if not piece:
+			continue
+		if on_chunk is not None:
+			on_chunk(piece)
+		text += piece
+		closed = _closed_json(text, scanner)
+		if closed is not None:
+			return closed
+	return text or None
+
+
+class GeminiRateLimiter:
+	"""Limitador por janela deslizante de 60s (requisições e tokens estimados por minuto).
+
+	Aplica uma margem de segurança sobre os limites do plano e bloqueia a thread até
+	haver cota, em vez de deixar a API responder 429. Limite 0 desativa a verificação.
+	"""
+
+	WINDOW_SECONDS = 60.0
+
+	def __init__(self, rpm: int = 0, tpm: int = 0, margin: float = 0.8) -> None:
+		self.rpm = max(1, int(rpm * margin)) if rpm > 0 else 0
+		self.tpm = max(1, int(tpm * margin)) if tpm > 0 else 0
+		self._events: Deque[Tuple[float, int]] = deque()
+		self._tokens = 0
+		self._lock = threading.Lock()
+
+	def acquire(self, tokens: int = 0) -> None:
+		if not self.rpm and not self.tpm:
+			return
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				while self._events and now - self._events[0][0] >= self.WINDOW_SECONDS:
+					self._tokens -= self._events.popleft()[1]
+				fits_rpm = not self.rpm or len(self._events) < self.rpm
+				# Uma requisição maior que o limite inteiro passa sozinha com a janela vazia
+				fits_tpm = not self.tpm or not self._events or self._tokens + tokens <= self.tpm
+				if fits_rpm and fits_tpm:
+					self._events.append((now, tokens))
+					self._tokens += tokens
+					return
+				wait = self.WINDOW_SECONDS - (now - self._events[0][0])
+			time.sleep(max(wait, 0.01))
+
+
+@lru_cache(maxsize=4)
+def _rate_limiter(rpm: int, tpm: int) -> GeminiRateLimiter:
+	return GeminiRateLimiter(rpm, tpm)
+
+
+def _retry_delay(exc: Exception, cfg: AppConfig, attempt: int) -> Optional[float]:
+	"""Atraso antes da próxima tentativa após ``exc``; None se o erro não é recuperável."""
+	if isinstance(exc, _NON_RETRYABLE):
+		logger.error("Erro não recuperável na tentativa %s: %s", attempt, exc)
+		return None
+	if isinstance(exc, _RATE_LIMITED):
+		logger.warning("Limite de requisições atingido na tentativa %s: %s", attempt, exc)
+		# Piso no atraso máximo, com o mesmo jitter do backoff: sessões limitadas ao mesmo
+		# tempo não tentam de novo em sincronia
+		return cfg.retry_backoff_max * random.uniform(0.5, 1.5)
+	logger.warning("Erro na tentativa %s: %s", attempt, exc)
+	return backoff_delay(cfg, attempt)
+
+
+def _run_gemini(prompt: str, cfg: AppConfig, on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
 	model = create_gemini_model(cfg)
 	if model is None:
 		logger.warning("Modelo Gemini não disponível")
 		return None
 	attempts = max(1, cfg.retry_max_attempts)
-	last_text = None
-	for attempt in range(attempts):
+	generation_config = _build_generation_config(cfg)
+	limiter = _rate_limiter(cfg.rate_limit_rpm, cfg.rate_limit_tpm)
+	for attempt in range(1, attempts + 1):
+		# ~4 caracteres por token para estimar o consumo do prompt
+		limiter.acquire(len(prompt) // 4)
 		try:
 			resp = model.generate_content(
 				prompt,
-				generation_config=_build_generation_config(cfg),
+				generation_config=generation_config,
 				request_options={"timeout": cfg.timeout_seconds},
+				stream=True,
 			)
-			# Extração robusta de texto: SDKs recentes podem não preencher resp.text
-			text = getattr(resp, "text", None)
-			if not text:
-				# Tenta extrair de candidates -> content.parts[].text
-				cands = getattr(resp, "candidates", None)
-				if cands:
-					# Estruturas possíveis: objetos com atributos ou dicionários
-					for cand in cands:
-						try:
-							content = getattr(cand, "content", None) or (cand.get("content") if isinstance(cand, dict) else None)
-							parts = getattr(content, "parts", None) or (content.get("parts") if isinstance(content, dict) else None)
-							if parts:
-								texts = []
-								for part in parts:
-									pt = getattr(part, "text", None) or (part.get("text") if isinstance(part, dict) else None)
-									if pt:
-										texts.append(pt)
-								if texts:
-									text = "\n".join(texts)
-									break
-						except Exception:
-							pass
+			text = _collect_stream(resp, on_chunk)
 			if text:
-				logger.info(f"IA gerou resposta com {len(text)} caracteres")
+				logger.info("IA gerou resposta com %s caracteres", len(text))
 				return text
-			last_text = text or last_text
+			delay = backoff_delay(cfg, attempt)
 		except Exception as e:
-			logger.warning(f"Erro na tentativa {attempt + 1}: {e}")
+			delay = _retry_delay(e, cfg, attempt)
+			if delay is None:
+				return None
+		if attempt < attempts:
+			time.sleep(delay)
+
+	logger.error("Falha após %s tentativas", attempts)
+	return None
+
+
+async def _collect_stream_async(resp: Any, on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
+	"""Equivalente assíncrono de ``_collect_stream``."""
+	text = ""
+	scanner = _ObjectScanner()
+	async for chunk in resp:
+		piece = _extract_text(chunk)
+		if not piece:
 			continue
-	
-	logger.error(f"Falha após {attempts} tentativas")
-	return last_text
+		if on_chunk is not None:
+			on_chunk(piece)
+		text += piece
+		closed = _closed_json(text, scanner)
+		if closed is not None:
+			return closed
+	return text or None
 
 
-def analyze_general(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
-	key = _hash_patient_payload(payload, namespace="general")
-	cached = _cache.get(key)
-	if cached:
-		return cached, cached.get("_raw", "")
-	
-	prompt = _build_prompt_general(payload)
-	text = _run_gemini(prompt, cfg)
-	expected = ["resumo_executivo", "por_sistemas", "estratificacao_geral", "recomendacoes", "medicacoes", "monitorizacao"]
-	defaults = {
-		"por_sistemas": {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []},
-		"medicacoes": {"suspender": [], "manter": [], "ajustar": []},
-	}
+async def _run_gemini_async(prompt: str, cfg: AppConfig, on_chunk: Optional[Callable[[str], None]] = None) -> Optional[str]:
+	"""Mesma política de ``_run_gemini`` (limite de taxa, retry, early stop) sem bloquear o event loop."""
+	model = create_gemini_model(cfg)
+	if model is None:
+		logger.warning("Modelo Gemini não disponível")
+		return None
+	attempts = max(1, cfg.retry_max_attempts)
+	generation_config = _build_generation_config(cfg)
+	limiter = _rate_limiter(cfg.rate_limit_rpm, cfg.rate_limit_tpm)
+	for attempt in range(1, attempts + 1):
+		await asyncio.to_thread(limiter.acquire, len(prompt) // 4)
+		try:
+			resp = await model.generate_content_async(
+				prompt,
+				generation_config=generation_config,
+				request_options={"timeout": cfg.timeout_seconds},
+				stream=True,
+			)
+			text = await _collect_stream_async(resp, on_chunk)
+			if text:
+				logger.info("IA gerou resposta com %s caracteres", len(text))
+				return text
+			delay = backoff_delay(cfg, attempt)
+		except Exception as e:
+			delay = _retry_delay(e, cfg, attempt)
+			if delay is None:
+				return None
+		if attempt < attempts:
+			await asyncio.sleep(delay)
+
+	logger.error("Falha após %s tentativas", attempts)
+	return None
+
+
+# Só respostas não vazias e parseadas vão para o cache: a estrutura padrão de uma
+# falha (IA indisponível, JSON ilegível) é devolvida ao chamador sem ser gravada, para
+# que a próxima chamada com o mesmo payload tente a IA de novo.
+
+
+def _finish_general(key: str, text: Optional[str]) -> Tuple[Dict[str, Any], str]:
 	if not text:
-		fallback = {
-			"resumo_executivo": "IA indisponível. Verifique a GOOGLE_API_KEY e conectividade.",
-			"por_sistemas": {"cardiovascular": [], "pulmonar": [], "renal": [], "delirium": []},
-			"estratificacao_geral": "",
-			"recomendacoes": [],
-			"medicacoes": {"suspender": [], "manter": [], "ajustar": []},
-			"monitorizacao": [],
-		}
-		_cache.set(key, {**fallback, "_raw": ""})
 		logger.warning("Resposta da IA vazia")
-		return fallback, ""
-	
-	parsed = _parse_response_text(text, expected_keys=expected, defaults=defaults)
-	_cache.set(key, {**parsed, "_raw": text})
+		return _from_schema(_GENERAL_SCHEMA, {"resumo_executivo": _AI_UNAVAILABLE}), ""
+	parsed = _parse_response_text(text, _GENERAL_SCHEMA)
+	if parsed is None:
+		return _unparsed_default(_GENERAL_SCHEMA, text), text
+	_cache.set(key, (parsed, text))
 	return parsed, text
 
 
-def analyze_medications(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
-	key = _hash_patient_payload(payload, namespace="medications")
-	cached = _cache.get(key)
-	if cached:
-		return cached, cached.get("_raw", "")
-	prompt = _build_prompt_medications(payload)
-	text = _run_gemini(prompt, cfg)
-	expected = ["suspender", "manter", "ajustar", "profilaxias", "bridge"]
-	defaults = {"suspender": [], "manter": [], "ajustar": [], "profilaxias": [], "bridge": []}
+def _finish_medications(key: str, text: Optional[str]) -> Tuple[Dict[str, Any], str]:
 	if not text:
-		_cache.set(key, {**defaults, "_raw": ""})
 		logger.warning("AI meds response empty; returning defaults")
-		return defaults, ""
-	# Try to parse JSON; if not dict, wrap into expected structure
-	parsed_any = None
-	try:
-		parsed_any = json.loads(text)
-	except Exception:
-		# try literal eval
-		try:
-			parsed_any = ast.literal_eval(text)
-		except Exception:
-			parsed_any = None
-	meds = {"suspender": [], "manter": [], "ajustar": []}
-	if isinstance(parsed_any, dict):
-		# normalize keys for meds only
-		alias = {"suspender": "suspender", "hold": "suspender", "manter": "manter", "continue": "manter", "ajustar": "ajustar", "adjust": "ajustar"}
-		for k, v in parsed_any.items():
-			kk = alias.get(str(k), str(k))
-			if kk in meds:
-				if isinstance(v, list):
-					meds[kk] = v
-				elif v:
-					meds[kk] = [str(v)]
-	_cache.set(key, {**meds, "_raw": text})
+		return _from_schema(_MEDS_SCHEMA), ""
+	parsed_any = _loads_lenient(text)
+	if parsed_any is None:
+		logger.warning("AI meds response not parseable; returning defaults")
+		return _from_schema(_MEDS_SCHEMA), text
+	# normalize keys for meds only
+	meds = _medicacoes_empty()
+	for k, v in parsed_any.items():
+		kk = _M_ALIASES.get(str(k), str(k))
+		if kk in meds:
+			if isinstance(v, list):
+				meds[kk] = v
+			elif v:
+				meds[kk] = [str(v)]
+	_cache.set(key, (meds, text))
 	return meds, text
 
 
-def analyze_scores_interpretation(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
-	key = _hash_patient_payload(payload, namespace="scores_interpretation")
-	cached = _cache.get(key)
-	if cached:
-		return cached, cached.get("_raw", "")
-	prompt = _build_prompt_scores_interpretation(payload)
-	text = _run_gemini(prompt, cfg)
-	expected = ["concordancia", "divergencia", "relevancia", "limitacoes", "risco_global", "pontos_atencao", "otimizacao_preop"]
-	defaults = {
-		"concordancia": [],
-		"divergencia": [],
-		"relevancia": "",
-		"limitacoes": [],
-		"risco_global": "",
-		"pontos_atencao": [],
-		"otimizacao_preop": [],
-	}
+def _finish_scores_interpretation(key: str, text: Optional[str]) -> Tuple[Dict[str, Any], str]:
 	if not text:
-		_cache.set(key, {**defaults, "_raw": ""})
-		return defaults, ""
-	parsed = _parse_response_text(text, expected_keys=expected, defaults=defaults)
-	_cache.set(key, {**parsed, "_raw": text})
+		return _from_schema(_SCORES_SCHEMA), ""
+	parsed = _parse_response_text(text, _SCORES_SCHEMA)
+	if parsed is None:
+		return _unparsed_default(_SCORES_SCHEMA, text), text
+	_cache.set(key, (parsed, text))
 	return parsed, text
 
 
+# namespace -> (construtor do prompt, pós-processamento + cache)
+_ANALYSES: Dict[str, Tuple[Callable[..., str], Callable[[str, Optional[str]], Tuple[Dict[str, Any], str]]]] = {
+	"general": (_build_prompt_general, _finish_general),
+	"medications": (_build_prompt_medications, _finish_medications),
+	"scores_interpretation": (_build_prompt_scores_interpretation, _finish_scores_interpretation),
+}
+
+
+# Chamadas em andamento por chave de cache: evita que requisições simultâneas do mesmo
+# payload disparem várias chamadas ao Gemini antes de a primeira preencher o cache.
+_inflight: Dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+
+
+def _analyze(
+	namespace: str,
+	payload: Dict[str, Any],
+	cfg: AppConfig,
+	serialized: Optional[Serialized] = None,
+	on_chunk: Optional[Callable[[str], None]] = None,
+) -> Tuple[Dict[str, Any], str]:
+	serialized = serialized or _canonicalize(payload)
+	key = _hash_patient_payload(payload, namespace=namespace, serialized=serialized[0])
+	cached = _cache.get(key)
+	if cached:
+		return cached
+	while True:
+		with _inflight_lock:
+			# Nova consulta sob o lock: o líder grava o cache antes de sair de _inflight
+			cached = _cache.get(key)
+			if cached:
+				return cached
+			event = _inflight.get(key)
+			if event is None:
+				event = _inflight[key] = threading.Event()
+				break
+		event.wait()
+		# Se a chamada líder falhou (exceção ou resposta inválida, que não é gravada no
+		# cache), uma das threads em espera assume como nova líder; as demais seguem esperando
+	try:
+		build_prompt, finish = _ANALYSES[namespace]
+		text = _run_gemini(build_prompt(payload, serialized), cfg, on_chunk)
+		return finish(key, text)
+	finally:
+		with _inflight_lock:
+			_inflight.pop(key, None)
+		event.set()
+
+
+def analyze_general(payload: Dict[str, Any], cfg: AppConfig, on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], str]:
+	return _analyze("general", payload, cfg, on_chunk=on_chunk)
+
+
+def analyze_medications(payload: Dict[str, Any], cfg: AppConfig, on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], str]:
+	return _analyze("medications", payload, cfg, on_chunk=on_chunk)
+
+
+def analyze_scores_interpretation(payload: Dict[str, Any], cfg: AppConfig, on_chunk: Optional[Callable[[str], None]] = None) -> Tuple[Dict[str, Any], str]:
+	return _analyze("scores_interpretation", payload, cfg, on_chunk=on_chunk)
+
+
+def _section_text(text: str, namespace: str) -> Optional[str]:
+	"""Trecho da resposta combinada com o objeto da chave ``namespace``, exatamente como
+	a IA o escreveu. Funciona mesmo quando o JSON completo não é válido (ex.: outra
+	seção truncada ou malformada)."""
+	match = re.search(r'"' + re.escape(namespace) + r'"\s*:\s*(?=\{)', text)
+	if match is None:
+		return None
+	return _extract_top_level_json(text[match.end():])
+
+
+def analyze_all(
+	payload: Dict[str, Any],
+	cfg: AppConfig,
+	sections: Sequence[str] = tuple(_ANALYSES),
+) -> Dict[str, Tuple[Dict[str, Any], str]]:
+	"""Executa as análises de ``sections`` com uma única chamada ao Gemini.
+
+	Só as seções pedidas entram no prompt (e na saída cobrada). Cada sub-resultado é
+	gravado no cache sob o namespace da análise individual, com o texto que a IA
+	gerou para aquela seção, de modo que ``analyze_general`` e afins o reaproveitam.
+	Se a resposta combinada não for JSON válido, cada seção é extraída do texto
+	isoladamente; só as que não puderem ser recuperadas são refeitas individualmente.
+	"""
+	sections = tuple(ns for ns in _ANALYSES if ns in sections)
+	serialized = _canonicalize(payload)
+	keys = {ns: _hash_patient_payload(payload, namespace=ns, serialized=serialized[0]) for ns in sections}
+	results: Dict[str, Tuple[Dict[str, Any], str]] = {}
+	for ns, key in keys.items():
+		cached = _cache.get(key)
+		if cached:
+			results[ns] = cached
+	missing = tuple(ns for ns in sections if ns not in results)
+	if len(missing) > 1:
+		text = _run_gemini(_build_prompt_all(payload, serialized, missing), cfg)
+		if not text:
+			for ns in missing:
+				results[ns] = _ANALYSES[ns][1](keys[ns], None)
+		else:
+			combined = _loads_lenient(text) or {}
+			for ns in missing:
+				sub_text = _section_text(text, ns)
+				if sub_text is None and isinstance(combined.get(ns), dict):
+					# JSON reparado sem trecho literal localizável: serializa a seção parseada
+					sub_text = _json(combined[ns])
+				if sub_text is not None and _loads_lenient(sub_text) is not None:
+					results[ns] = _ANALYSES[ns][1](keys[ns], sub_text)
+			if len(results) < len(sections):
+				logger.warning("Resposta combinada incompleta; completando análises individualmente")
+	remaining = [ns for ns in sections if ns not in results]
+	if len(remaining) > 1:
+		with ThreadPoolExecutor(max_workers=len(remaining)) as pool:
+			futures = {ns: pool.submit(_analyze, ns, payload, cfg, serialized) for ns in remaining}
+			results.update((ns, fut.result()) for ns, fut in futures.items())
+	elif remaining:
+		results[remaining[0]] = _analyze(remaining[0], payload, cfg, serialized)
+	return {ns: results[ns] for ns in sections}
+
+
+def analyze_all_concurrent(payload: Dict[str, Any], cfg: AppConfig) -> Dict[str, Tuple[Dict[str, Any], str]]:
+	"""Executa as três análises individuais em paralelo (uma thread por chamada).
+
+	Alternativa a ``analyze_all`` quando se prefere prompts separados: o tempo total
+	fica próximo ao da chamada mais lenta, já que as requisições são limitadas por I/O.
+	"""
+	serialized = _canonicalize(payload)
+	with ThreadPoolExecutor(max_workers=len(_ANALYSES)) as pool:
+		futures = {ns: pool.submit(_analyze, ns, payload, cfg, serialized) for ns in _ANALYSES}
+		return {ns: fut.result() for ns, fut in futures.items()}
+
+
+# Batch API: intervalo entre consultas ao job e prazo máximo (o Gemini conclui em até 24 h)
+BATCH_POLL_SECONDS = 30.0
+BATCH_TIMEOUT_SECONDS = 24 * 3600.0
+_BATCH_DONE_STATES = frozenset({"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"})
+
+
+def _batch_state(job: Any) -> str:
+	state = getattr(job, "state", None)
+	return str(getattr(state, "name", state))
+
+
+def _run_gemini_batch(prompts: List[str], cfg: AppConfig, poll_seconds: float, timeout_seconds: float) -> Optional[List[Optional[str]]]:
+	"""Envia os prompts como um único job da Batch API (pedidos inline) e aguarda o término.
+	Retorna um texto (ou None) por prompt, na mesma ordem; None se o job não puder ser usado."""
+	client = create_batch_client(cfg)
+	if client is None:
+		return None
+	generation_config = dict(_build_generation_config(cfg))
+	requests = [{"contents": [{"role": "user", "parts": [{"text": prompt}]}], "config": generation_config} for prompt in prompts]
+	try:
+		job = client.batches.create(model=cfg.default_model, src=requests, config={"display_name": f"helpanest-{len(prompts)}"})
+		deadline = time.monotonic() + timeout_seconds
+		while _batch_state(job) not in _BATCH_DONE_STATES:
+			if time.monotonic() >= deadline:
+				logger.warning("Job em lote %s excedeu o prazo; cancelando", job.name)
+				client.batches.cancel(name=job.name)
+				return None
+			time.sleep(poll_seconds)
+			job = client.batches.get(name=job.name)
+	except Exception as exc:
+		logger.error("Falha na Batch API do Gemini: %s", exc)
+		return None
+	if _batch_state(job) != "JOB_STATE_SUCCEEDED":
+		logger.warning("Job em lote %s terminou em %s", job.name, _batch_state(job))
+		return None
+	responses = getattr(getattr(job, "dest", None), "inlined_responses", None) or []
+	if len(responses) != len(prompts):
+		logger.warning("Job em lote %s devolveu %s de %s respostas", job.name, len(responses), len(prompts))
+		return None
+	return [_extract_text(r.response) if getattr(r, "response", None) is not None else None for r in responses]
+
+
+def analyze_batch(
+	payloads: List[Dict[str, Any]],
+	kind: str,
+	cfg: AppConfig,
+	poll_seconds: float = BATCH_POLL_SECONDS,
+	timeout_seconds: float = BATCH_TIMEOUT_SECONDS,
+) -> List[Tuple[Dict[str, Any], str]]:
+	"""Executa a análise ``kind`` (general, medications, scores_interpretation) para vários
+	pacientes de uma vez pela Batch API do Gemini: metade do custo por token e fora do limite
+	de RPM, com resultado em até 24 h. Bloqueia até o job terminar; para uso offline (coortes).
+
+	Os resultados entram no cache sob a mesma chave de ``_analyze``, de modo que chamadas
+	síncronas posteriores para os mesmos payloads não vão à API. Sem o SDK google-genai, se
+	o job falhar, ou para itens sem resposta válida, os payloads seguem pelo caminho síncrono.
+	"""
+	build_prompt, finish = _ANALYSES[kind]
+	serialized = [_canonicalize(p) for p in payloads]
+	keys = [_hash_patient_payload(p, namespace=kind, serialized=ser[0]) for p, ser in zip(payloads, serialized)]
+	results: Dict[str, Tuple[Dict[str, Any], str]] = {}
+	for key in keys:
+		cached = _cache.get(key)
+		if cached:
+			results[key] = cached
+	# Um pedido por payload distinto ainda fora do cache
+	pending = {key: i for i, key in enumerate(keys) if key not in results}
+	if pending:
+		texts = _run_gemini_batch([build_prompt(payloads[i], serialized[i]) for i in pending.values()], cfg, poll_seconds, timeout_seconds)
+		if texts is None:
+			logger.warning("Batch API indisponível; analisando %s payload(s) pelo caminho síncrono", len(pending))
+			texts = [None] * len(pending)
+		failed = 0
+		for (key, i), text in zip(pending.items(), texts):
+			if text and _loads_lenient(text) is not None:
+				results[key] = finish(key, text)
+			else:
+				# Item sem resposta válida no job: refeito pelo caminho síncrono, que só
+				# grava no cache se a nova resposta for válida
+				failed += 1
+				results[key] = _analyze(kind, payloads[i], cfg, serialized[i])
+		if failed and failed < len(pending):
+			logger.warning("Batch API: %s de %s item(ns) refeitos pelo caminho síncrono", failed, len(pending))
+	return [results[key] for key in keys]
+
+
+async def _analyze_async(namespace: str, payload: Dict[str, Any], cfg: AppConfig, serialized: Optional[Serialized] = None) -> Tuple[Dict[str, Any], str]:
+	# Sem a coordenação de _inflight (baseada em threading.Event, bloquearia o event loop)
+	serialized = serialized or _canonicalize(payload)
+	key = _hash_patient_payload(payload, namespace=namespace, serialized=serialized[0])
+	cached = _cache.get(key)
+	if cached:
+		return cached
+	build_prompt, finish = _ANALYSES[namespace]
+	text = await _run_gemini_async(build_prompt(payload, serialized), cfg)
+	return finish(key, text)
+
+
+async def analyze_general_async(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
+	return await _analyze_async("general", payload, cfg)
+
+
+async def analyze_medications_async(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
+	return await _analyze_async("medications", payload, cfg)
+
+
+async def analyze_scores_interpretation_async(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
+	return await _analyze_async("scores_interpretation", payload, cfg)
+
+
+async def analyze_all_async(payload: Dict[str, Any], cfg: AppConfig) -> Dict[str, Tuple[Dict[str, Any], str]]:
+	"""Versão assíncrona de ``analyze_all_concurrent``: as três chamadas usam o cliente
+	assíncrono do SDK e são aguardadas em conjunto, sem ocupar threads."""
+	serialized = _canonicalize(payload)
+	results = await asyncio.gather(*(_analyze_async(ns, payload, cfg, serialized) for ns in _ANALYSES))
+	return dict(zip(_ANALYSES, results))
+
+
 # Back-compat: função genérica anterior
 
 def analyze_with_gemini(payload: Dict[str, Any], cfg: AppConfig) -> Tuple[Dict[str, Any], str]:
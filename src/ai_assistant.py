@@ -1,39 +1,43 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 
-from .config import AppConfig
+from .config import AppConfig, _extract_text, create_gemini_model
 
-try:
-    import google.generativeai as genai
-except Exception:  # pragma: no cover - optional dependency at runtime
-    genai = None  # type: ignore
+# Respostas recentes por (modelo, prompt): reruns com o mesmo prompt não repetem a chamada à API
+_RECOMMENDATIONS_TTL_SECONDS = 3600
+_RECOMMENDATIONS_MAX_ENTRIES = 32
+_recommendations: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+_recommendations_lock = threading.Lock()
 
 
 def generate_recommendations(prompt: str, config: AppConfig) -> Optional[str]:
-	if genai is None:
-		return None
-	# Resolve API key priorizando st.secrets
-	api_key: Optional[str] = None
-	try:  # pragma: no cover
-		import streamlit as st  # type: ignore
-		api_key = st.secrets.get("GOOGLE_API_KEY")  # type: ignore[attr-defined]
-	except Exception:
-		pass
-	api_key = api_key or config.google_api_key
-	if not api_key:
+	key = (config.default_model, prompt)
+	now = time.monotonic()
+	with _recommendations_lock:
+		entry = _recommendations.get(key)
+		if entry is not None and now - entry[0] < _RECOMMENDATIONS_TTL_SECONDS:
+			_recommendations.move_to_end(key)
+			return entry[1]
+
+	# Reaproveita o modelo em cache de config.py (genai.configure só roda uma vez por chave)
+	model = create_gemini_model(config)
+	if model is None:
 		return None
 	try:
-		genai.configure(api_key=api_key)
-		model_name = config.default_model
-		model = genai.GenerativeModel(model_name)
 		response = model.generate_content(prompt)
-		text = getattr(response, "text", None)
-		if text:
-			return text
-		parts = getattr(response, "candidates", None)
-		if parts:
-			return str(parts)
+		text = _extract_text(response)
 	except Exception:
 		return None
-	return None
+
+	# Só respostas válidas entram no cache; falhas voltam a tentar na próxima chamada
+	if text:
+		with _recommendations_lock:
+			_recommendations[key] = (now, text)
+			_recommendations.move_to_end(key)
+			while len(_recommendations) > _RECOMMENDATIONS_MAX_ENTRIES:
+				_recommendations.popitem(last=False)
+	return text
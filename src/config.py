@@ -2,18 +2,14 @@ from __future__ import annotations
 
 import logging
 import os
+import random
 import time
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Optional
 
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field
-
-try:
-	import google.generativeai as genai  # type: ignore
-except Exception:  # pragma: no cover - optional at runtime
-	genai = None  # type: ignore
-
 
 # -----------------------------
 # Constantes do Modelo / Tokens
@@ -31,6 +27,13 @@ RETRY_MAX_ATTEMPTS = 3
 RETRY_BACKOFF_INITIAL = 1.0
 RETRY_BACKOFF_MAX = 8.0
 
+# Limite de requisições do lado do cliente (0 = desativado); use os limites do seu plano
+RATE_LIMIT_RPM = 0
+RATE_LIMIT_TPM = 0
+
+# Cache persistente das análises da IA (opcional: ativado quando AI_CACHE_PATH está definido)
+AI_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
 
 def _get_logger() -> logging.Logger:
 	logger = logging.getLogger("helpanest.ai")
@@ -42,31 +45,41 @@ def _get_logger() -> logging.Logger:
 		)
 		handler.setFormatter(formatter)
 		logger.addHandler(handler)
-		logger.setLevel(logging.INFO)
+		try:
+			logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+		except ValueError:
+			logger.setLevel(logging.INFO)
+		# Evita formatar/emitir o mesmo registro de novo pelos handlers do logger raiz
+		logger.propagate = False
 	return logger
 
 
 logger = _get_logger()
 
 
-class AppConfig(BaseModel):
-	app_name: str = Field(default="Nexus Anest - Plataforma de Risco Perioperatório")
-	google_api_key: Optional[str] = Field(default=None)
-	default_model: str = Field(default=DEFAULT_MODEL_NAME)
-	reports_dir: str = Field(default="reports")
+@dataclass(slots=True, frozen=True)
+class AppConfig:
+	app_name: str = "Nexus Anest - Plataforma de Risco Perioperatório"
+	google_api_key: Optional[str] = None
+	default_model: str = DEFAULT_MODEL_NAME
+	reports_dir: str = "reports"
 
 	# Geração / Modelo
-	max_input_tokens: int = Field(default=MAX_INPUT_TOKENS)
-	max_output_tokens: int = Field(default=MAX_OUTPUT_TOKENS)
-	temperature: float = Field(default=TEMPERATURE)
-	top_p: float = Field(default=TOP_P)
-	top_k: int = Field(default=TOP_K)
+	max_input_tokens: int = MAX_INPUT_TOKENS
+	max_output_tokens: int = MAX_OUTPUT_TOKENS
+	temperature: float = TEMPERATURE
+	top_p: float = TOP_P
+	top_k: int = TOP_K
 
 	# Timeout e retry
-	timeout_seconds: int = Field(default=DEFAULT_TIMEOUT_SECONDS)
-	retry_max_attempts: int = Field(default=RETRY_MAX_ATTEMPTS)
-	retry_backoff_initial: float = Field(default=RETRY_BACKOFF_INITIAL)
-	retry_backoff_max: float = Field(default=RETRY_BACKOFF_MAX)
+	timeout_seconds: int = DEFAULT_TIMEOUT_SECONDS
+	retry_max_attempts: int = RETRY_MAX_ATTEMPTS
+	retry_backoff_initial: float = RETRY_BACKOFF_INITIAL
+	retry_backoff_max: float = RETRY_BACKOFF_MAX
+
+	# Limite de taxa (requisições e tokens por minuto)
+	rate_limit_rpm: int = RATE_LIMIT_RPM
+	rate_limit_tpm: int = RATE_LIMIT_TPM
 
 	@property
 	def reports_path(self) -> Path:
@@ -87,6 +100,18 @@ def load_env_api_key(env_file: str | None = ".env") -> Optional[str]:
 	return api_key
 
 
+def _env_int(name: str, default: int) -> int:
+	"""Lê um inteiro do ambiente; valor vazio ou inválido registra aviso e usa o padrão."""
+	raw = os.getenv(name)
+	if raw is None or not raw.strip():
+		return default
+	try:
+		return int(raw)
+	except ValueError:
+		logger.warning("%s inválido (%r); usando %s.", name, raw, default)
+		return default
+
+
 def load_config(env_file: str | None = ".env") -> AppConfig:
 	if env_file and Path(env_file).exists():
 		load_dotenv(env_file)
@@ -104,43 +129,144 @@ def load_config(env_file: str | None = ".env") -> AppConfig:
 		google_api_key=api_key,
 		default_model=model,
 		reports_dir=os.getenv("REPORTS_DIR", "reports"),
+		rate_limit_rpm=_env_int("GEMINI_RPM", RATE_LIMIT_RPM),
+		rate_limit_tpm=_env_int("GEMINI_TPM", RATE_LIMIT_TPM),
 	)
 
 
 def _build_generation_config(cfg: AppConfig) -> dict[str, Any]:
+	"""Retorna a generation_config do cfg; o dicionário é compartilhado (somente leitura)."""
+	return _generation_config(cfg.temperature, cfg.top_p, cfg.top_k, cfg.max_output_tokens)
+
+
+@lru_cache(maxsize=4)
+def _generation_config(temperature: float, top_p: float, top_k: int, max_output_tokens: int) -> dict[str, Any]:
 	return {
-		"temperature": cfg.temperature,
-		"top_p": cfg.top_p,
-		"top_k": cfg.top_k,
-		"max_output_tokens": cfg.max_output_tokens,
+		"temperature": temperature,
+		"top_p": top_p,
+		"top_k": top_k,
+		"max_output_tokens": max_output_tokens,
 	}
 
 
-def create_gemini_model(cfg: AppConfig):
-	"""Cria e retorna o modelo Gemini configurado. Retorna None se indisponível."""
-	if genai is None:
-		logger.warning("Gemini SDK não disponível ou GOOGLE_API_KEY ausente.")
+def _extract_text(resp: Any) -> Optional[str]:
+	"""Extrai o texto de uma resposta do Gemini.
+
+	SDKs recentes podem não preencher ``resp.text`` (ou levantar ValueError ao acessá-lo);
+	nesse caso percorre candidates -> content.parts[].text, aceitando objetos ou dicionários.
+	"""
+	try:
+		text = getattr(resp, "text", None)
+	except Exception:
+		text = None
+	if text:
+		return text
+	for cand in getattr(resp, "candidates", None) or []:
+		try:
+			content = getattr(cand, "content", None) or (cand.get("content") if isinstance(cand, dict) else None)
+			parts = getattr(content, "parts", None) or (content.get("parts") if isinstance(content, dict) else None)
+			texts = []
+			for part in parts or []:
+				pt = getattr(part, "text", None) or (part.get("text") if isinstance(part, dict) else None)
+				if pt:
+					texts.append(pt)
+			if texts:
+				return "\n".join(texts)
+		except Exception:
+			continue
+	return None
+
+
+def backoff_delay(cfg: AppConfig, attempt: int) -> float:
+	"""Atraso exponencial limitado com jitter (fator 0.5–1.5) antes da próxima tentativa.
+	``attempt`` começa em 1."""
+	base = min(cfg.retry_backoff_initial * (2 ** (attempt - 1)), cfg.retry_backoff_max)
+	return base * random.uniform(0.5, 1.5)
+
+
+@lru_cache(maxsize=None)
+def _genai() -> Any:
+	"""Importa o SDK do Gemini na primeira utilização (import pesado: gRPC, protobuf, auth).
+	Retorna None se o pacote não estiver instalado."""
+	try:
+		import google.generativeai as genai  # type: ignore
+	except Exception:  # pragma: no cover - optional at runtime
 		return None
-	# Resolve a API key em tempo de execução, priorizando st.secrets
+	return genai
+
+
+def _resolve_api_key(cfg: AppConfig) -> Optional[str]:
+	"""Resolve a API key em tempo de execução, priorizando st.secrets, depois cfg e ambiente."""
 	api_key: Optional[str] = None
 	try:  # pragma: no cover - depende do runtime do Streamlit
 		import streamlit as st  # type: ignore
 		api_key = st.secrets.get("GOOGLE_API_KEY")  # type: ignore[attr-defined]
 	except Exception:
 		pass
-	api_key = api_key or cfg.google_api_key or os.getenv("GOOGLE_API_KEY")
+	return api_key or cfg.google_api_key or os.getenv("GOOGLE_API_KEY")
+
+
+def create_gemini_model(cfg: AppConfig):
+	"""Cria e retorna o modelo Gemini configurado. Retorna None se indisponível."""
+	if _genai() is None:
+		logger.warning("Gemini SDK não disponível ou GOOGLE_API_KEY ausente.")
+		return None
+	api_key = _resolve_api_key(cfg)
 	if not api_key:
 		logger.warning("GOOGLE_API_KEY não encontrado em st.secrets, config ou ambiente.")
 		return None
 	try:
-		genai.configure(api_key=api_key)
-		model = genai.GenerativeModel(cfg.default_model)
-		return model
+		return _cached_model(api_key, cfg.default_model)
 	except Exception as exc:
 		logger.error("Falha ao criar modelo Gemini: %s", exc)
 		return None
 
 
+@lru_cache(maxsize=1)
+def _cached_model(api_key: str, model_name: str):
+	"""Reaproveita o cliente Gemini entre chamadas com a mesma chave/modelo.
+
+	A chave entra pelo ``genai.configure`` global, e o modelo usa o cliente global vigente
+	no primeiro uso; por isso só o modelo da última chave fica em cache: trocar de chave
+	chama ``configure`` de novo e cria outro modelo. Falhas levantam exceção e, portanto,
+	não ficam em cache."""
+	genai = _genai()
+	genai.configure(api_key=api_key)
+	return genai.GenerativeModel(model_name)
+
+
+@lru_cache(maxsize=None)
+def _genai_client_module() -> Any:
+	"""Importa o SDK google-genai (usado só pela Batch API) na primeira utilização.
+	Retorna None se o pacote não estiver instalado."""
+	try:
+		from google import genai  # type: ignore
+	except Exception:  # pragma: no cover - optional at runtime
+		return None
+	return genai
+
+
+def create_batch_client(cfg: AppConfig):
+	"""Cria o cliente google-genai para a Batch API. Retorna None se indisponível."""
+	if _genai_client_module() is None:
+		logger.warning("SDK google-genai não disponível; Batch API desativada.")
+		return None
+	api_key = _resolve_api_key(cfg)
+	if not api_key:
+		logger.warning("GOOGLE_API_KEY não encontrado em st.secrets, config ou ambiente.")
+		return None
+	try:
+		return _cached_batch_client(api_key)
+	except Exception as exc:
+		logger.error("Falha ao criar cliente da Batch API: %s", exc)
+		return None
+
+
+@lru_cache(maxsize=4)
+def _cached_batch_client(api_key: str):
+	return _genai_client_module().Client(api_key=api_key)
+
+
 def test_gemini_connection(cfg: AppConfig) -> bool:
 	"""Realiza uma chamada simples ao Gemini para testar conectividade.
 	Inclui retry exponencial simples e timeout."""
@@ -148,6 +274,7 @@ def test_gemini_connection(cfg: AppConfig) -> bool:
 	if model is None:
 		return False
 
+	generation_config = _build_generation_config(cfg)
 	attempt = 0
 	while attempt < cfg.retry_max_attempts:
 		attempt += 1
@@ -155,7 +282,7 @@ def test_gemini_connection(cfg: AppConfig) -> bool:
 			logger.info("Teste de conexão ao Gemini (tentativa %s)", attempt)
 			resp = model.generate_content(
 				"ping",
-				generation_config=_build_generation_config(cfg),
+				generation_config=generation_config,
 				request_options={"timeout": cfg.timeout_seconds},
 			)
 			# Alguns SDKs retornam .text, outros candidates; validar mínimo
@@ -171,8 +298,8 @@ def test_gemini_connection(cfg: AppConfig) -> bool:
 			if attempt >= cfg.retry_max_attempts:
 				logger.error("Excedido número máximo de tentativas (%s).", cfg.retry_max_attempts)
 				return False
-			# Backoff exponencial limitado
-			delay = min(cfg.retry_backoff_initial * (2 ** (attempt - 1)), cfg.retry_backoff_max)
+			# Backoff exponencial limitado, com jitter
+			delay = backoff_delay(cfg, attempt)
 			logger.info("Aguardando %.1fs antes de tentar novamente...", delay)
 			time.sleep(delay)
 	return False
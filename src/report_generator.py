@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
 from reportlab.platypus import (
+    Flowable,
     SimpleDocTemplate,
     Paragraph,
     Spacer,
@@ -17,8 +24,7 @@ from reportlab.platypus import (
     PageBreak,
     Image,
 )
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing, Line, Rect, String
 
 
 PRIMARY_COLOR = colors.HexColor("#0B5FA5")
@@ -27,6 +33,170 @@ ACCENT_GREEN = colors.HexColor("#16a34a")
 ACCENT_YELLOW = colors.HexColor("#f59e0b")
 ACCENT_RED = colors.HexColor("#dc2626")
 
+# Escores exibidos no relatório, na ordem das seções
+SCORE_KEYS = ("asa", "rcri", "ariscat", "nsqip", "akics", "pre_deliric")
+
+# Nome do Form XObject do cabeçalho (um por documento/canvas)
+_HEADER_FORM = "helpanest_header"
+
+# (escore, campo percentual, rótulo) das barras do gráfico de riscos
+_RISK_SOURCES = (
+    ("rcri", "risk_percent", "RCRI%"),
+    ("ariscat", "probability_cpp_percent", "ARISCAT%"),
+    ("nsqip", "mortality_30d_pct", "NSQIP Mort%"),
+    ("pre_deliric", "probabilidade_percentual", "Delirium%"),
+)
+
+# Palavra-chave da categoria de risco -> cor, na ordem de prioridade ("muito baixo" cai em "baixo")
+_RISK_KEYWORDS = (("alto", ACCENT_RED), ("inter", ACCENT_YELLOW), ("baixo", ACCENT_GREEN))
+
+
+@lru_cache(maxsize=1)
+def _base_styles() -> StyleSheet1:
+    """Folha de estilos padrão + estilos "Section" e "Small", montada uma única vez."""
+    styles = getSampleStyleSheet()
+    styles.add(
+        ParagraphStyle(
+            name="Section",
+            parent=styles["Heading2"],
+            textColor=PRIMARY_DARK,
+            spaceBefore=12,
+            spaceAfter=6,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="Small",
+            parent=styles["BodyText"],
+            fontSize=9,
+            leading=11,
+        )
+    )
+    return styles
+
+
+def _load_logo(path: Path) -> ImageReader | None:
+    # Verifica o arquivo uma vez por relatório (não a cada página); a imagem decodificada
+    # fica em cache enquanto o arquivo não mudar
+    try:
+        return _logo_reader(str(path), path.stat().st_mtime_ns)
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4)
+def _logo_reader(path: str, mtime_ns: int) -> ImageReader:
+    return ImageReader(path)
+
+
+# Estilos fixos das tabelas (setStyle apenas lê os comandos; podem ser compartilhados)
+_SCORES_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+        ("TEXTCOLOR", (0, 0), (-1, 0), PRIMARY_DARK),
+        ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.lightgrey),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONT", (0, 1), (-1, -1), "Helvetica"),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.Color(0.98, 0.99, 1.0)]),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ]
+)
+_MEDS_TABLE_STYLE = TableStyle(
+    [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+        ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ]
+)
+
+
+@lru_cache(maxsize=128)
+def _risk_drawing(risks: Tuple[Tuple[str, float], ...]) -> Drawing:
+    """Gráfico de barras dos riscos percentuais, em cache por conjunto de valores.
+
+    O conteúdo do Drawing não é alterado ao ser desenhado; cada relatório recebe uma
+    cópia rasa (ver ``ReportGenerator._risk_barchart``).
+    """
+    values = [v for _, v in risks]
+    max_val = max(values + [10.0])
+    value_max = max(10, int(max_val * 1.2))
+    value_step = max(5, int(max_val / 5) or 1)
+    plot_x, plot_y, plot_w, plot_h = 40, 30, 320, 120
+
+    # Barras desenhadas diretamente (sem VerticalBarChart): eixos, escala, barras e rótulos
+    drawing = Drawing(400, 180)
+    drawing.add(Line(plot_x, plot_y, plot_x + plot_w, plot_y, strokeColor=colors.lightgrey))
+    drawing.add(Line(plot_x, plot_y, plot_x, plot_y + plot_h, strokeColor=colors.lightgrey))
+    for tick in range(0, value_max + 1, value_step):
+        y = plot_y + plot_h * tick / value_max
+        drawing.add(String(plot_x - 4, y - 2.5, str(tick), fontName="Helvetica", fontSize=7, textAnchor="end"))
+    slot = plot_w / len(risks)
+    bar_w = min(28.0, slot * 0.5)
+    for i, (label, value) in enumerate(risks):
+        cx = plot_x + slot * (i + 0.5)
+        bar_h = plot_h * min(value, value_max) / value_max
+        drawing.add(Rect(cx - bar_w / 2, plot_y, bar_w, bar_h, fillColor=_bar_color(value), strokeColor=colors.lightgrey, strokeWidth=0.5))
+        drawing.add(String(cx, plot_y + bar_h + 3, f"{value:g}%", fontName="Helvetica", fontSize=7, textAnchor="middle"))
+        drawing.add(String(cx, plot_y - 11, label, fontName="Helvetica", fontSize=7, textAnchor="middle"))
+    return drawing
+
+
+def _bar_color(value: float) -> colors.Color:
+    # Color by threshold
+    if value >= 35:
+        return ACCENT_RED
+    if value >= 10:
+        return ACCENT_YELLOW
+    return ACCENT_GREEN
+
+
+class _PatientHeader(Flowable):
+    """Tabela 3 x 6 dos dados do paciente com layout fixo.
+
+    Equivale ao Table anterior (mesmas larguras, fonte, fundo da 1ª linha e grade), mas
+    desenha direto no canvas, sem o cálculo genérico de larguras/alturas do Table.
+    Como no Table, textos longos não quebram linha.
+    """
+
+    COL_WIDTHS = (2.2 * cm, 4.3 * cm, 2.0 * cm, 3.1 * cm, 2.0 * cm, 3.4 * cm)
+    ROW_HEIGHT = 18.0
+    PADDING = 6.0
+    FONT_NAME = "Helvetica"
+    FONT_SIZE = 10
+
+    def __init__(self, rows: List[List[Any]]) -> None:
+        super().__init__()
+        self.rows = [[str(cell) for cell in row] for row in rows]
+        self.width = sum(self.COL_WIDTHS)
+        self.height = self.ROW_HEIGHT * len(self.rows)
+        self.hAlign = "CENTER"
+
+    def wrap(self, availWidth: float, availHeight: float) -> Tuple[float, float]:  # noqa: N803 - API do Platypus
+        return self.width, self.height
+
+    def draw(self) -> None:
+        c = self.canv
+        xs = [0.0]
+        for w in self.COL_WIDTHS:
+            xs.append(xs[-1] + w)
+        ys = [self.height - i * self.ROW_HEIGHT for i in range(len(self.rows) + 1)]
+        c.saveState()
+        c.setFillColor(colors.whitesmoke)
+        c.rect(0, ys[1], self.width, self.ROW_HEIGHT, fill=1, stroke=0)
+        c.setFillColor(colors.black)
+        c.setFont(self.FONT_NAME, self.FONT_SIZE)
+        # Linha de base centralizada verticalmente (VALIGN MIDDLE)
+        offset = self.ROW_HEIGHT / 2 - 0.35 * self.FONT_SIZE
+        for row, bottom in zip(self.rows, ys[1:]):
+            for x, text in zip(xs, row):
+                c.drawString(x + self.PADDING, bottom + offset, text)
+        c.setStrokeColor(colors.lightgrey)
+        c.setLineWidth(0.25)
+        c.grid(xs, ys)
+        c.restoreState()
+
 
 class ReportGenerator:
     def __init__(
@@ -41,28 +211,28 @@ class ReportGenerator:
         self.author = author
         self.institution = institution
         self.logo_path = Path(logo_path)
-        self.styles = getSampleStyleSheet()
-        self.styles.add(
-            ParagraphStyle(
-                name="Section",
-                parent=self.styles["Heading2"],
-                textColor=PRIMARY_DARK,
-                spaceBefore=12,
-                spaceAfter=6,
-            )
-        )
-        self.styles.add(
-            ParagraphStyle(
-                name="Small",
-                parent=self.styles["BodyText"],
-                fontSize=9,
-                leading=11,
-            )
-        )
+        self._logo = _load_logo(self.logo_path)
+        # Compartilhado entre instâncias: a folha de estilos não é alterada após a criação
+        self.styles = _base_styles()
 
     # ---------------------- Header / Footer ----------------------
     def _header_footer(self, canvas, doc) -> None:  # type: ignore[no-untyped-def]
         canvas.saveState()
+        width, _ = A4
+        # Cabeçalho fixo: gravado uma vez como Form XObject e apenas referenciado nas demais páginas
+        if not canvas.hasForm(_HEADER_FORM):
+            canvas.beginForm(_HEADER_FORM)
+            self._draw_header(canvas)
+            canvas.endForm()
+        canvas.doForm(_HEADER_FORM)
+
+        # Footer with page number
+        canvas.setFillColor(colors.grey)
+        canvas.setFont("Helvetica", 9)
+        canvas.drawRightString(width - 1 * cm, 0.75 * cm, f"Página {doc.page}")
+        canvas.restoreState()
+
+    def _draw_header(self, canvas) -> None:  # type: ignore[no-untyped-def]
         width, height = A4
         header_h = 1.2 * cm
         canvas.setFillColor(PRIMARY_COLOR)
@@ -70,9 +240,9 @@ class ReportGenerator:
 
         x = 1 * cm
         y = height - 0.9 * cm
-        if self.logo_path.exists():
+        if self._logo is not None:
             try:
-                canvas.drawImage(str(self.logo_path), x, height - 1.1 * cm, width=1.0 * cm, height=1.0 * cm, preserveAspectRatio=True, mask='auto')
+                canvas.drawImage(self._logo, x, height - 1.1 * cm, width=1.0 * cm, height=1.0 * cm, preserveAspectRatio=True, mask='auto')
                 x += 1.2 * cm
             except Exception:
                 pass
@@ -82,24 +252,10 @@ class ReportGenerator:
         canvas.setFont("Helvetica", 10)
         canvas.drawRightString(width - 1 * cm, y, self.title)
 
-        # Footer with page number
-        canvas.setFillColor(colors.grey)
-        canvas.setFont("Helvetica", 9)
-        canvas.drawRightString(width - 1 * cm, 0.75 * cm, f"Página {doc.page}")
-        canvas.restoreState()
-
     # ---------------------- Helpers ----------------------
     def _risk_color(self, category: str | None) -> colors.Color:
-        if not category:
-            return colors.black
-        cat = category.lower()
-        if "alto" in cat:
-            return ACCENT_RED
-        if "inter" in cat:
-            return ACCENT_YELLOW
-        if "baixo" in cat or "muito baixo" in cat:
-            return ACCENT_GREEN
-        return colors.black
+        cat = (category or "").lower()
+        return next((color for keyword, color in _RISK_KEYWORDS if keyword in cat), colors.black)
 
     def _scores_table(self, scores: Dict[str, Any]) -> Table:
         data: List[List[Any]] = [["Escore", "Resultado", "Interpretação/Risco"]]
@@ -135,62 +291,31 @@ class ReportGenerator:
             data.append(["PRE-DELIRIC", str(pred.get("pontuacao_total", "-")), f"{pred.get('categoria_risco','')} ({pred.get('probabilidade_percentual','-')}%)"])
 
         table = Table(data, colWidths=[4.2 * cm, 3.0 * cm, 9.8 * cm])
-        table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), PRIMARY_DARK),
-                    ("LINEBELOW", (0, 0), (-1, 0), 0.5, colors.lightgrey),
-                    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONT", (0, 1), (-1, -1), "Helvetica"),
-                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.Color(0.98, 0.99, 1.0)]),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
-        )
+        table.setStyle(_SCORES_TABLE_STYLE)
         return table
 
     def _risk_barchart(self, risks: List[Tuple[str, float]]) -> Drawing:
-        # Build a simple vertical bar chart for risk percentages
-        labels = [k for k, _ in risks]
-        values = [float(v) for _, v in risks]
-        max_val = max(values + [10.0])
-
-        drawing = Drawing(400, 180)
-        bc = VerticalBarChart()
-        bc.x = 40
-        bc.y = 30
-        bc.height = 120
-        bc.width = 320
-        bc.data = [values]
-        bc.strokeColor = colors.lightgrey
-        bc.valueAxis.valueMin = 0
-        bc.valueAxis.valueMax = max(10, int(max_val * 1.2))
-        bc.valueAxis.valueStep = max(5, int(max_val / 5) or 1)
-        bc.categoryAxis.categoryNames = labels
-        bc.categoryAxis.labels.boxAnchor = 'ne'
-        bc.categoryAxis.labels.angle = 20
-        bc.barWidth = 14
-        bc.groupSpacing = 6
-        # Color by threshold
-        fills = []
-        for v in values:
-            if v >= 35:
-                fills.append(ACCENT_RED)
-            elif v >= 10:
-                fills.append(ACCENT_YELLOW)
-            else:
-                fills.append(ACCENT_GREEN)
-        bc.bars[0].fillColor = colors.white  # default
-        for i, color in enumerate(fills):
-            bc.bars[0].fillColor = colors.white  # reset
-            try:
-                bc.bars[0][i].fillColor = color
-            except Exception:
-                pass
-        drawing.add(bc)
-        return drawing
+        # Cópia rasa: o Platypus marca no próprio flowable quando ele é adiado para a
+        # próxima página, e essa marca não pode vazar para outros relatórios
+        return copy.copy(_risk_drawing(tuple((k, float(v)) for k, v in risks)))
+
+    def _bullets(self, items: Iterable[Any]) -> Iterator[Paragraph]:
+        body = self.styles["BodyText"]
+        for item in items:
+            yield Paragraph(f"• {item}", body)
+
+    def _med_cell(self, items: List[Any]) -> List[Paragraph]:
+        # Um Paragraph por item: a célula quebra linhas na largura da coluna
+        small = self.styles["Small"]
+        return [Paragraph(f"• {item}", small) for item in items] or [Paragraph("-", small)]
+
+    def _systems_flowables(self, por_sist: Dict[str, Any]) -> Iterator[Any]:
+        h3 = self.styles["Heading3"]
+        for sist in ("cardiovascular", "pulmonar", "renal", "delirium"):
+            items = por_sist.get(sist) or []
+            yield Paragraph(sist.capitalize(), h3)
+            yield from self._bullets(items or ["-"])
+            yield Spacer(1, 4)
 
     # ---------------------- Public API ----------------------
     def build(
@@ -216,147 +341,112 @@ class ReportGenerator:
         )
 
         story: List[Any] = []
+        styles = self.styles
+        title_style, section, h3 = styles["Title"], styles["Section"], styles["Heading3"]
+        body, small = styles["BodyText"], styles["Small"]
 
         # Header section (title on page)
-        story.append(Paragraph(self.title, self.styles["Title"]))
-        story.append(Paragraph(self.institution, self.styles["Small"]))
+        story.append(Paragraph(self.title, title_style))
+        story.append(Paragraph(self.institution, small))
         story.append(Spacer(1, 8))
 
         # Patient header
-        story.append(Paragraph("Dados do Paciente", self.styles["Section"]))
+        story.append(Paragraph("Dados do Paciente", section))
         demo = patient.get("demographics", {})
         surgical = patient.get("surgical", {})
-        patient_table = Table(
+        patient_table = _PatientHeader(
             [
                 ["Nome", demo.get("nome", "-"), "Idade", demo.get("idade", "-"), "Sexo", demo.get("sexo", "-")],
                 ["IMC", demo.get("imc", "-"), "ASA", f"{demo.get('asa','-')}{' -E' if demo.get('asa_emergencia') else ''}", "Urgência", surgical.get("urgencia", "-")],
                 ["Cirurgia", surgical.get("tipo_cirurgia", "-"), "Subtipo", surgical.get("subtipo", "-"), "Anestesia", surgical.get("anestesia_planejada", "-")],
-            ],
-            colWidths=[2.2 * cm, 4.3 * cm, 2.0 * cm, 3.1 * cm, 2.0 * cm, 3.4 * cm],
-        )
-        patient_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("FONT", (0, 0), (-1, -1), "Helvetica"),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ]
-            )
+            ]
         )
         story.append(patient_table)
         story.append(Spacer(1, 12))
 
         # Executive summary (AI general)
-        story.append(Paragraph("Resumo Executivo dos Riscos", self.styles["Section"]))
+        story.append(Paragraph("Resumo Executivo dos Riscos", section))
         resumo_exec = (ai_general or {}).get("resumo_executivo") or "-"
-        story.append(Paragraph(str(resumo_exec), self.styles["BodyText"]))
+        story.append(Paragraph(str(resumo_exec), body))
         story.append(Spacer(1, 8))
 
         # By systems
-        story.append(Paragraph("Análise por Sistemas", self.styles["Section"]))
-        por_sist = (ai_general or {}).get("por_sistemas") or {}
-        for sist in ("cardiovascular", "pulmonar", "renal", "delirium"):
-            items = por_sist.get(sist) or []
-            story.append(Paragraph(sist.capitalize(), self.styles["Heading3"]))
-            if items:
-                for it in items:
-                    story.append(Paragraph(f"• {it}", self.styles["BodyText"]))
-            else:
-                story.append(Paragraph("• -", self.styles["BodyText"]))
-            story.append(Spacer(1, 4))
+        story.append(Paragraph("Análise por Sistemas", section))
+        story.extend(self._systems_flowables((ai_general or {}).get("por_sistemas") or {}))
 
         # Scores table
         story.append(Spacer(1, 6))
-        story.append(Paragraph("Escores Calculados", self.styles["Section"]))
+        story.append(Paragraph("Escores Calculados", section))
         story.append(self._scores_table(scores))
 
         # Risk bar chart (collect key percents)
-        risks: List[Tuple[str, float]] = []
-        rcri = scores.get("rcri") or {}
-        if rcri.get("risk_percent") is not None:
-            risks.append(("RCRI%", float(rcri["risk_percent"])) )
-        ariscat = scores.get("ariscat") or {}
-        if ariscat.get("probability_cpp_percent") is not None:
-            risks.append(("ARISCAT%", float(ariscat["probability_cpp_percent"])) )
-        nsqip = scores.get("nsqip") or {}
-        if nsqip.get("mortality_30d_pct") is not None:
-            risks.append(("NSQIP Mort%", float(nsqip["mortality_30d_pct"])) )
-        pred = scores.get("pre_deliric") or {}
-        if pred.get("probabilidade_percentual") is not None:
-            risks.append(("Delirium%", float(pred["probabilidade_percentual"])) )
+        risks: List[Tuple[str, float]] = [
+            (label, float(value))
+            for key, field, label in _RISK_SOURCES
+            if (value := (scores.get(key) or {}).get(field)) is not None
+        ]
         if risks:
             story.append(Spacer(1, 6))
-            story.append(Paragraph("Riscos Percentuais (Resumo)", self.styles["Heading3"]))
+            story.append(Paragraph("Riscos Percentuais (Resumo)", h3))
             story.append(self._risk_barchart(risks))
 
         story.append(PageBreak())
 
         # IA detailed
-        story.append(Paragraph("Análise da IA (Estruturada)", self.styles["Section"]))
+        story.append(Paragraph("Análise da IA (Estruturada)", section))
         if ai_general:
-            recs = ai_general.get("recomendacoes") or []
-            story.append(Paragraph("Recomendações", self.styles["Heading3"]))
-            for r in recs:
-                story.append(Paragraph(f"• {r}", self.styles["BodyText"]))
+            story.append(Paragraph("Recomendações", h3))
+            story.extend(self._bullets(ai_general.get("recomendacoes") or []))
             story.append(Spacer(1, 6))
-            mon = ai_general.get("monitorizacao") or []
-            story.append(Paragraph("Monitorização sugerida", self.styles["Heading3"]))
-            for m in mon:
-                story.append(Paragraph(f"• {m}", self.styles["BodyText"]))
+            story.append(Paragraph("Monitorização sugerida", h3))
+            story.extend(self._bullets(ai_general.get("monitorizacao") or []))
         else:
-            story.append(Paragraph("IA não disponível.", self.styles["BodyText"]))
+            story.append(Paragraph("IA não disponível.", body))
 
         # Medications recommendations
         story.append(Spacer(1, 10))
-        story.append(Paragraph("Recomendações de Medicações", self.styles["Section"]))
+        story.append(Paragraph("Recomendações de Medicações", section))
         meds = ai_meds or {}
         meds_table = Table(
             [
                 ["Suspender", "Manter", "Ajustar"],
-                ["\n".join(meds.get("suspender", [])) or "-", "\n".join(meds.get("manter", [])) or "-", "\n".join(meds.get("ajustar", [])) or "-"],
+                [self._med_cell(meds.get(key) or []) for key in ("suspender", "manter", "ajustar")],
             ],
             colWidths=[6.0 * cm, 5.0 * cm, 6.0 * cm],
         )
-        meds_table.setStyle(
-            TableStyle(
-                [
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-                    ("FONT", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                    ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ]
-            )
-        )
+        meds_table.setStyle(_MEDS_TABLE_STYLE)
         story.append(meds_table)
 
         # Bibliography
         story.append(Spacer(1, 12))
-        story.append(Paragraph("Bibliografia / Referências", self.styles["Section"]))
-        refs: List[str] = list(references or [])
+        story.append(Paragraph("Bibliografia / Referências", section))
         # Gather from scores if present
-        def _refs_from(obj: Any) -> List[str]:
-            if isinstance(obj, dict):
-                cand = obj.get("references") or obj.get("referencias")
-                if isinstance(cand, (list, tuple)):
-                    return [str(x) for x in cand]
-            return []
-        for key in ["asa", "rcri", "ariscat", "nsqip", "akics", "pre_deliric"]:
-            refs.extend(_refs_from(scores.get(key) or {}))
-        seen = set()
-        for ref in refs:
-            if ref and ref not in seen:
-                story.append(Paragraph(f"- {ref}", self.styles["Small"]))
-                seen.add(ref)
+        score_refs = (
+            str(ref)
+            for key in SCORE_KEYS
+            if isinstance(entry := scores.get(key), dict)
+            and isinstance(cand := entry.get("references") or entry.get("referencias"), (list, tuple))
+            for ref in cand
+        )
+        # Deduplica (preservando a ordem) antes de criar os Paragraphs
+        unique_refs = dict.fromkeys(filter(None, chain(references or [], score_refs)))
+        story.extend(Paragraph(f"- {ref}", small) for ref in unique_refs)
 
         doc.build(story, onFirstPage=self._header_footer, onLaterPages=self._header_footer)
         return output_path
 
 
+# Remove da parte do nome do arquivo todo caractere ASCII que não seja letra, dígito, "_" ou "-"
+# (letras acentuadas, fora do ASCII, são mantidas)
+_FILENAME_DELETE = str.maketrans("", "", "".join(c for c in map(chr, range(128)) if not (c.isalnum() or c in "_-")))
+
+_DEFAULT_BASE_NAME = "relatorio_perioperatorio"
+
+
 def export_with_timestamp(
     *,
     base_dir: Path,
-    base_name: str = "relatorio_perioperatorio",
+    base_name: str = _DEFAULT_BASE_NAME,
     patient_name: str | None = None,
     patient: Dict[str, Any],
     scores: Dict[str, Any],
@@ -364,9 +454,10 @@ def export_with_timestamp(
     ai_meds: Dict[str, Any] | None = None,
     references: List[str] | None = None,
 ) -> Path:
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Microssegundos no carimbo: exportações do mesmo paciente no mesmo segundo não colidem
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     safe_name = (patient_name or patient.get("demographics", {}).get("nome") or "paciente").strip() or "paciente"
-    safe_name = "".join(c for c in safe_name if c.isalnum() or c in ("_", "-"))
+    safe_name = safe_name.translate(_FILENAME_DELETE)
     outfile = base_dir / f"{base_name}_{safe_name}_{ts}.pdf"
     gen = ReportGenerator()
     return gen.build(
@@ -377,3 +468,32 @@ def export_with_timestamp(
         ai_meds=ai_meds,
         references=references,
     )
+
+
+def _export_job(job: Dict[str, Any]) -> Path:
+    # Nível de módulo para ser serializável (pickle) pelo ProcessPoolExecutor
+    return export_with_timestamp(**job)
+
+
+def export_many(
+    jobs: List[Dict[str, Any]],
+    *,
+    base_dir: Path,
+    max_workers: int | None = None,
+) -> List[Path]:
+    """Gera vários relatórios em paralelo, um processo por núcleo.
+
+    Cada job contém os argumentos nomeados de ``export_with_timestamp`` (exceto ``base_dir``).
+    O índice do job entra no nome do arquivo, de modo que jobs com o mesmo nome concluídos
+    ao mesmo tempo em processos diferentes nunca gravam no mesmo caminho.
+    Retorna um caminho distinto por job, na mesma ordem dos jobs.
+    """
+    jobs = [
+        {**job, "base_dir": base_dir, "base_name": f"{job.get('base_name', _DEFAULT_BASE_NAME)}_{i:03d}"}
+        for i, job in enumerate(jobs)
+    ]
+    if len(jobs) <= 1:
+        return [_export_job(job) for job in jobs]
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(_export_job, jobs))
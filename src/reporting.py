@@ -1,17 +1,43 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import BinaryIO, Dict, Iterator, Optional, List, Tuple, Union
 
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import getSampleStyleSheet, StyleSheet1
 from reportlab.lib.units import cm
 from reportlab.lib import colors
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
 
+@lru_cache(maxsize=1)
+def _styles() -> StyleSheet1:
+    # Folha de estilos padrão, criada uma vez e apenas lida pelas funções abaixo
+    return getSampleStyleSheet()
+
+
+# Estilo fixo das tabelas de escores, compartilhado entre seções e relatórios
+_SCORE_SECTION_STYLE = TableStyle(
+    [
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
+    ]
+)
+
+
+def _cell_text(value: object) -> str:
+    # Listas e dicionários viram texto legível em vez do repr do Python
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, dict):
+        return "; ".join(f"{k}: {v}" for k, v in value.items())
+    return str(value)
+
+
 def _format_score_section(title: str, data: Dict) -> List:
-    styles = getSampleStyleSheet()
+    styles = _styles()
     elems: List = [Paragraph(title, styles["Heading2"])]
     rows = []
     # Flatten common fields
@@ -28,73 +54,82 @@ def _format_score_section(title: str, data: Dict) -> List:
     if "probability_cpp_percent" in data:
         rows.append(["Prob. CPP %", f"{data.get('probability_cpp_percent')}%"])
     if "recommendations" in data:
-        rows.append(["Recomendações", str(data.get("recommendations"))])
+        rows.append(["Recomendações", _cell_text(data.get("recommendations"))])
 
     details = data.get("details") or data.get("detalhes") or {}
     if isinstance(details, dict) and details:
         for k, v in details.items():
-            rows.append([k.replace("_", " ").capitalize(), str(v)])
+            rows.append([k.replace("_", " ").capitalize(), _cell_text(v)])
 
     if not rows:
         elems.append(Paragraph("-", styles["BodyText"]))
         return elems + [Spacer(1, 8)]
 
     table = Table(rows, colWidths=[5 * cm, 10 * cm])
-    table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke),
-            ]
-        )
-    )
+    table.setStyle(_SCORE_SECTION_STYLE)
     elems.append(table)
     elems.append(Spacer(1, 8))
     return elems
 
 
-def _markdown_like_to_flowable(text: str) -> List:
-    styles = getSampleStyleSheet()
-    out: List = []
-    if not text:
-        return out
+@lru_cache(maxsize=64)
+def _parse_markdown_like(text: str) -> Tuple[Tuple[Optional[str], str], ...]:
+    """Converte o texto em pares (estilo, markup) por linha; estilo None é um espaçamento.
+
+    Fica em cache por texto: resumos repetidos não são reprocessados. Os Paragraphs não
+    entram no cache porque o Platypus os altera durante o layout.
+    """
+    out: List[Tuple[Optional[str], str]] = []
     # Simple conversions: headings, bold/italics, bullets
     for raw_line in text.splitlines():
         line = raw_line.strip()
         if not line:
-            out.append(Spacer(1, 4))
+            out.append((None, ""))
             continue
         if line.startswith("### "):
-            out.append(Paragraph(line[4:], styles["Heading3"]))
+            out.append(("Heading3", line[4:]))
             continue
         if line.startswith("## "):
-            out.append(Paragraph(line[3:], styles["Heading2"]))
+            out.append(("Heading2", line[3:]))
             continue
         if line.startswith("# "):
-            out.append(Paragraph(line[2:], styles["Heading1"]))
+            out.append(("Heading1", line[2:]))
             continue
         if line.startswith("- ") or line.startswith("* ") or line.startswith("• "):
-            out.append(Paragraph(f"• {line[2:]}", styles["BodyText"]))
+            out.append(("BodyText", f"• {line[2:]}"))
             continue
         # inline bold/italics
         line = line.replace("**", "<b>", 1).replace("**", "</b>", 1)
         line = line.replace("*", "<i>", 1).replace("*", "</i>", 1)
-        out.append(Paragraph(line, styles["BodyText"]))
-    return out
+        out.append(("BodyText", line))
+    return tuple(out)
+
+
+def _markdown_like_to_flowable(text: str) -> Iterator:
+    """Gera os flowables linha a linha, sem montar uma lista intermediária."""
+    if not text:
+        return
+    styles = _styles()
+    for style, line in _parse_markdown_like(text):
+        yield Spacer(1, 4) if style is None else Paragraph(line, styles[style])
 
 
 def build_pdf_report(
-    output_path: Path,
+    output_path: Union[Path, BinaryIO],
     patient_info: Dict[str, str],
     rcri: Dict,
     ariscat: Dict,
     stopbang: Dict,
     ai_summary: Optional[str] = None,
-) -> Path:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    doc = SimpleDocTemplate(str(output_path), pagesize=A4, topMargin=2 * cm, bottomMargin=2 * cm)
-    styles = getSampleStyleSheet()
+) -> Union[Path, BinaryIO]:
+    # Aceita também um buffer (ex.: io.BytesIO) para gerar o PDF sem passar pelo disco
+    if isinstance(output_path, Path):
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        target = str(output_path)
+    else:
+        target = output_path
+    doc = SimpleDocTemplate(target, pagesize=A4, topMargin=2 * cm, bottomMargin=2 * cm)
+    styles = _styles()
 
     story = []
 
@@ -113,7 +148,7 @@ def build_pdf_report(
 
     if ai_summary:
         story.append(Paragraph("Resumo IA", styles["Heading2"]))
-        story += _markdown_like_to_flowable(ai_summary)
+        story.extend(_markdown_like_to_flowable(ai_summary))
 
     doc.build(story)
     return output_path
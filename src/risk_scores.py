@@ -1,14 +1,54 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass(frozen=True)
+
+# Tuplas de chaves compartilhadas entre resultados do mesmo escore
+_SHARED_KEYS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+@dataclass(frozen=True, slots=True, init=False, repr=False)
 class ScoreResult:
+    """Resultado de um escore, construído como ``ScoreResult(score, risk_category, details)``.
+
+    Os pontos por fator ficam num ``bytes`` (um byte sem sinal por fator, 0–255) alinhado
+    à tupla ``keys``, compartilhada entre resultados do mesmo escore; ``details`` monta o
+    dicionário sob demanda.
+    """
+
     score: int
     risk_category: str
-    details: Dict[str, int]
+    keys: Tuple[str, ...]
+    points: bytes
+
+    def __init__(self, score: int, risk_category: str, details: Dict[str, int]) -> None:
+        keys = tuple(details)
+        object.__setattr__(self, "score", score)
+        object.__setattr__(self, "risk_category", risk_category)
+        object.__setattr__(self, "keys", _SHARED_KEYS.setdefault(keys, keys))
+        object.__setattr__(self, "points", bytes(details.values()))
+
+    @classmethod
+    def _from_points(cls, score: int, risk_category: str, keys: Tuple[str, ...], points: Tuple[int, ...]) -> "ScoreResult":
+        # Caminho interno dos calculadores: evita montar o dicionário de detalhes
+        result = cls.__new__(cls)
+        object.__setattr__(result, "score", score)
+        object.__setattr__(result, "risk_category", risk_category)
+        object.__setattr__(result, "keys", keys)
+        object.__setattr__(result, "points", bytes(points))
+        return result
+
+    @property
+    def details(self) -> Dict[str, int]:
+        return dict(zip(self.keys, self.points))
+
+    def __repr__(self) -> str:
+        return f"ScoreResult(score={self.score!r}, risk_category={self.risk_category!r}, details={self.details!r})"
 
 
 # RCRI (Revised Cardiac Risk Index)
@@ -22,18 +62,19 @@ RCRI_FACTORS = {
 }
 
 
+_RCRI_KEYS = tuple(RCRI_FACTORS)
+
+
 def calculate_rcri(**factors: bool) -> ScoreResult:
-    details: Dict[str, int] = {}
-    for key in RCRI_FACTORS:
-        details[key] = 1 if factors.get(key, False) else 0
-    score = sum(details.values())
+    values = tuple(1 if factors.get(key, False) else 0 for key in _RCRI_KEYS)
+    score = sum(values)
     if score == 0:
         risk = "Baixo"
     elif score in (1, 2):
         risk = "Intermediário"
     else:
         risk = "Alto"
-    return ScoreResult(score=score, risk_category=risk, details=details)
+    return ScoreResult._from_points(score, risk, _RCRI_KEYS, values)
 
 
 # ARISCAT (pulmonary complications)
@@ -81,14 +122,64 @@ STOPBANG_ITEMS = (
 
 
 def calculate_stopbang(**answers: bool) -> ScoreResult:
-    details: Dict[str, int] = {}
-    for key in STOPBANG_ITEMS:
-        details[key] = 1 if answers.get(key, False) else 0
-    score = sum(details.values())
+    values = tuple(1 if answers.get(key, False) else 0 for key in STOPBANG_ITEMS)
+    score = sum(values)
     if score <= 2:
         risk = "Baixo"
     elif score <= 4:
         risk = "Intermediário"
     else:
         risk = "Alto"
-    return ScoreResult(score=score, risk_category=risk, details=details)
+    return ScoreResult._from_points(score, risk, STOPBANG_ITEMS, values)
+
+
+# ---------------------- Cálculo em lote (coortes) ----------------------
+# Cada função recebe uma matriz N x F de fatores (bool/0-1), com colunas na ordem de
+# RCRI_FACTORS / ARISCAT_WEIGHTS / STOPBANG_ITEMS, ou um DataFrame com essas colunas
+# (colunas ausentes contam como False). Retorna (escores, categorias) como arrays.
+# O numpy é importado só aqui, no primeiro cálculo em lote: o cálculo escalar não o usa.
+
+
+@lru_cache(maxsize=None)
+def _weights(points: Tuple[int, ...]) -> "np.ndarray":
+    import numpy as np
+
+    return np.array(points, dtype=np.int16)
+
+
+def _factor_matrix(factors: Any, keys: Tuple[str, ...]) -> "np.ndarray":
+    import numpy as np
+
+    if hasattr(factors, "reindex"):  # pandas.DataFrame
+        factors = factors.reindex(columns=list(keys), fill_value=False).to_numpy()
+    matrix = np.asarray(factors, dtype=bool)
+    if matrix.ndim != 2 or matrix.shape[1] != len(keys):
+        raise ValueError(f"Esperada matriz N x {len(keys)} de fatores, recebido formato {matrix.shape}")
+    return matrix
+
+
+def _batch_scores(factors: Any, keys: Tuple[str, ...], points: Tuple[int, ...]) -> "np.ndarray":
+    import numpy as np
+
+    return _factor_matrix(factors, keys).astype(np.int16) @ _weights(points)
+
+
+def _categorize(scores: "np.ndarray", low_max: int, mid_max: int) -> "np.ndarray":
+    import numpy as np
+
+    return np.select([scores <= low_max, scores <= mid_max], ["Baixo", "Intermediário"], "Alto")
+
+
+def calculate_rcri_batch(factors: Any) -> Tuple["np.ndarray", "np.ndarray"]:
+    scores = _batch_scores(factors, _RCRI_KEYS, tuple(RCRI_FACTORS.values()))
+    return scores, _categorize(scores, 0, 2)
+
+
+def calculate_ariscat_batch(factors: Any) -> Tuple["np.ndarray", "np.ndarray"]:
+    scores = _batch_scores(factors, tuple(ARISCAT_WEIGHTS), tuple(ARISCAT_WEIGHTS.values()))
+    return scores, _categorize(scores, 25, 44)
+
+
+def calculate_stopbang_batch(answers: Any) -> Tuple["np.ndarray", "np.ndarray"]:
+    scores = _batch_scores(answers, STOPBANG_ITEMS, (1,) * len(STOPBANG_ITEMS))
+    return scores, _categorize(scores, 2, 4)
@@ -1,16 +1,68 @@
 from __future__ import annotations
 
+import operator
+import os
+import re
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, NamedTuple, Optional, Tuple
 
+if TYPE_CHECKING:
+    import numpy as np
 
-@dataclass(frozen=True)
+
+def _tier_loop(thresholds, value):
+    """``bisect_right(thresholds, value)`` em laço simples (o Numba não suporta bisect)."""
+    i = 0
+    for t in thresholds:
+        if value >= t:
+            i += 1
+    return i
+
+
+# Numba só com SCORES_NUMBA=1 (ex.: pontuação em massa): no uso interativo, um paciente por
+# vez, a compilação no primeiro uso e o custo de despacho superam o ganho nos núcleos
+njit = None
+if os.getenv("SCORES_NUMBA") == "1":
+    try:
+        from numba import njit  # type: ignore
+    except Exception:  # pragma: no cover - optional at runtime
+        njit = None
+
+if njit is not None:
+    _jit = njit(cache=True)
+    _tier = _jit(_tier_loop)
+else:
+    def _jit(func):  # type: ignore
+        """Sem Numba: devolve a função Python original."""
+        return func
+
+    _tier = bisect_right
+
+
+@dataclass(frozen=True, slots=True)
 class ScoreOutput:
-    result: Dict
+    result: Dict[str, Any]
     interpretation: str
     references: Tuple[str, ...]
 
 
+# Resultados enxutos para chamadores que só usam os números (ex.: análises em lote)
+class RcriResult(NamedTuple):
+    score: int
+    cls: str
+    risk_pct: float
+    category: str
+
+
+class AriscatResult(NamedTuple):
+    score: int
+    category: str
+    probability_pct: float
+
+
 # -----------------------
 # ASA Physical Status
 # -----------------------
@@ -34,11 +86,16 @@ ASA_BASE_RISK = {
 }
 
 
-def classify_asa(asa_class: str, emergency_modifier: bool = False) -> ScoreOutput:
-    asa_class = asa_class.strip().upper()
-    if asa_class not in ASA_DESCRIPTIONS:
-        raise ValueError("ASA inválido. Use I, II, III, IV, V ou VI.")
+_ASA_INTERP = (
+    "A classificação ASA descreve o estado físico pré-operatório. O modificador E indica procedimento de emergência."
+)
+_ASA_REFS: Tuple[str, ...] = (
+    "ASA Physical Status Classification System (ASA).",
+    "Daabiss M. American Society of Anaesthesiologists physical status classification. Int J Periop Clin. 2011.",
+)
 
+
+def _asa_output(asa_class: str, emergency_modifier: bool) -> ScoreOutput:
     label = asa_class + ("-E" if emergency_modifier else "")
     description = ASA_DESCRIPTIONS[asa_class]
     base_risk = ASA_BASE_RISK.get(asa_class, "")
@@ -54,16 +111,31 @@ def classify_asa(asa_class: str, emergency_modifier: bool = False) -> ScoreOutpu
         "emergency": emergency_modifier,
     }
 
-    interpretation = (
-        "A classificação ASA descreve o estado físico pré-operatório. O modificador E indica procedimento de emergência."
-    )
+    return ScoreOutput(result=result, interpretation=_ASA_INTERP, references=_ASA_REFS)
+
+
+def _fresh(out: ScoreOutput) -> ScoreOutput:
+    """Cópia de um resultado memoizado com dicts novos (inclusive ``details``), para que
+    o chamador possa alterá-lo sem afetar o modelo compartilhado."""
+    result = dict(out.result)
+    if isinstance(result.get("details"), dict):
+        result["details"] = dict(result["details"])
+    return ScoreOutput(result=result, interpretation=out.interpretation, references=out.references)
+
+
+# Só há 12 combinações (classe, emergência): modelos pré-calculados na importação
+_ASA_OUTPUTS: Dict[Tuple[str, bool], ScoreOutput] = {
+    (asa_class, emergency): _asa_output(asa_class, emergency)
+    for asa_class in ASA_DESCRIPTIONS
+    for emergency in (False, True)
+}
 
-    refs = (
-        "ASA Physical Status Classification System (ASA).",
-        "Daabiss M. American Society of Anaesthesiologists physical status classification. Int J Periop Clin. 2011.",
-    )
 
-    return ScoreOutput(result=result, interpretation=interpretation, references=refs)
+def classify_asa(asa_class: str, emergency_modifier: bool = False) -> ScoreOutput:
+    out = _ASA_OUTPUTS.get((asa_class.strip().upper(), bool(emergency_modifier)))
+    if out is None:
+        raise ValueError("ASA inválido. Use I, II, III, IV, V ou VI.")
+    return _fresh(out)
 
 
 # -----------------------
@@ -72,6 +144,75 @@ def classify_asa(asa_class: str, emergency_modifier: bool = False) -> ScoreOutpu
 # Aviso: O NSQIP real utiliza modelos proprietários com CPT codes e algoritmos específicos (ACS). 
 # Abaixo, implementamos um proxy simplificado para apoio educacional, NÃO substitui a ferramenta oficial.
 
+# Categorias de procedimento em ordem de prioridade (pontos decrescentes). Uma única
+# varredura em C encontra todas as categorias citadas; como os pontos decrescem com a
+# prioridade, o máximo equivale à primeira categoria da antiga cadeia de elif. O
+# lookahead de largura zero permite palavras-chave sobrepostas.
+_PROC_RE = re.compile(
+    r"(?=(?P<card>card|coron|valv)"
+    r"|(?P<vasc>vascular|aorta|suprainguinal)"
+    r"|(?P<thor>torac|pulmon|esofag|mediast)"
+    r"|(?P<abd>abdom|colect|gastrect|hepatec)"
+    r"|(?P<ortho>ortop|arthro|quadril|joelho))"
+)
+_PROC_POINTS = {"card": 3.0, "vasc": 2.5, "thor": 2.0, "abd": 1.8, "ortho": 1.2}
+
+
+def _procedure_points(proc: str) -> float:
+    return max((_PROC_POINTS[m.lastgroup] for m in _PROC_RE.finditer(proc)), default=0.0)
+
+
+_NSQIP_AGE_THR = (60, 70, 80)
+_NSQIP_AGE_PTS = (0.0, 1.0, 2.0, 3.0)
+_NSQIP_ASA_POINTS = {"I": 0.0, "II": 0.5, "III": 1.5, "IV": 3.0, "V": 5.0}
+_NSQIP_FUNCTIONAL_POINTS = {
+    "totalmente dependente": 3.0,
+    "dependente total": 3.0,
+    "parcialmente dependente": 1.5,
+    "dependente parcial": 1.5,
+}
+# (chave, coeficiente sobre o risco-base, mínimo, máximo)
+_NSQIP_RISKS: Tuple[Tuple[str, float, float, float], ...] = (
+    ("mortality_30d_pct", 1.2, 0.1, 25.0),
+    ("cardiac_complication_pct", 1.0, 0.1, 20.0),
+    ("pneumonia_pct", 0.9, 0.1, 20.0),
+    ("ssi_pct", 0.8, 0.1, 20.0),
+    ("uti_pct", 0.6, 0.1, 15.0),
+    ("venous_thromboembolism_pct", 0.7, 0.1, 10.0),
+    ("renal_failure_pct", 0.9, 0.1, 15.0),
+    ("readmission_pct", 1.1, 0.1, 25.0),
+    ("reoperation_pct", 0.8, 0.1, 15.0),
+)
+_NSQIP_RISK_KEYS = tuple(r[0] for r in _NSQIP_RISKS)
+_NSQIP_COEF = tuple(r[1] for r in _NSQIP_RISKS)
+_NSQIP_LO = tuple(r[2] for r in _NSQIP_RISKS)
+_NSQIP_HI = tuple(r[3] for r in _NSQIP_RISKS)
+# Emergência e comorbidades: (coluna, pontos)
+_NSQIP_FLAGS = (("emergencia", 2.5), ("diabetes", 0.5), ("hipertensao", 0.4), ("dpoc", 0.8), ("insuficiencia_cardiaca", 1.5))
+_NSQIP_FLAG_W = tuple(w for _, w in _NSQIP_FLAGS)
+# Laboratório: (coluna, comparação, limiar, pontos)
+_NSQIP_LABS = (
+    ("hematocrito", "<", 30, 1.2),
+    ("creatinina", ">=", 1.5, 1.0),
+    ("albumina", "<", 3.5, 1.3),
+    ("plaquetas", "<", 150, 0.8),
+)
+_COMPARISONS = {"<": operator.lt, ">=": operator.ge}
+_NSQIP_COLUMNS = (
+    "idade", "sexo", "status_funcional", "emergencia", "asa", "diabetes", "hipertensao", "dpoc",
+    "insuficiencia_cardiaca", "procedimento", "hematocrito", "creatinina", "albumina", "plaquetas",
+)
+
+
+_NSQIP_INTERP = (
+    "Estimativas aproximadas de risco perioperatório baseadas em heurísticas inspiradas no NSQIP. "
+    "Use a calculadora oficial do ACS-NSQIP para decisões clínicas definitivas."
+)
+_NSQIP_REFS: Tuple[str, ...] = (
+    "American College of Surgeons NSQIP Risk Calculator (oficial).",
+    "Bilimoria KY et al. Development and evaluation of the ACS NSQIP Surgical Risk Calculator. J Am Coll Surg. 2013.",
+)
+
 
 def nsqip_proxy(
     *,
@@ -104,30 +245,21 @@ def nsqip_proxy(
     score = 0.0
 
     # Idade
-    if idade >= 80:
-        score += 3.0
-    elif idade >= 70:
-        score += 2.0
-    elif idade >= 60:
-        score += 1.0
+    score += _NSQIP_AGE_PTS[bisect_right(_NSQIP_AGE_THR, idade)]
 
     # Sexo (algumas complicações variam, efeito modesto)
     if sexo == "masculino":
         score += 0.3
 
     # Status funcional (NSQIP)
-    if status_funcional in ("totalmente dependente", "totalmente dependente", "dependente total"):
-        score += 3.0
-    elif status_funcional in ("parcialmente dependente", "dependente parcial"):
-        score += 1.5
+    score += _NSQIP_FUNCTIONAL_POINTS.get(status_funcional, 0.0)
 
     # Emergência
     if emergencia:
         score += 2.5
 
     # ASA
-    asa_map = {"I": 0.0, "II": 0.5, "III": 1.5, "IV": 3.0, "V": 5.0}
-    score += asa_map.get(asa, 0.0)
+    score += _NSQIP_ASA_POINTS.get(asa, 0.0)
 
     # Comorbidades principais
     if diabetes:
@@ -140,64 +272,80 @@ def nsqip_proxy(
         score += 1.5
 
     # Procedimento (categoria aproximada por texto)
-    proc = procedimento.lower()
-    if any(k in proc for k in ["card", "coron", "valv"]):
-        score += 3.0
-    elif any(k in proc for k in ["vascular", "aorta", "suprainguinal"]):
-        score += 2.5
-    elif any(k in proc for k in ["torac", "pulmon", "esofag", "mediast"]):
-        score += 2.0
-    elif any(k in proc for k in ["abdom", "colect", "gastrect", "hepatec"]):
-        score += 1.8
-    elif any(k in proc for k in ["ortop", "arthro", "quadril", "joelho"]):
-        score += 1.2
-
-    # Laboratório
-    if hematocrito < 30:
-        score += 1.2
-    if creatinina >= 1.5:
-        score += 1.0
-    if albumina < 3.5:
-        score += 1.3
-    if plaquetas < 150:
-        score += 0.8
+    score += _procedure_points(procedimento.lower())
 
-    # Converter pontuação em riscos percentuais aproximados (não validados)
-    def clamp(x: float, lo: float, hi: float) -> float:
-        return max(lo, min(hi, x))
+    # Laboratório (mesma tabela do nsqip_proxy_batch)
+    labs = {"hematocrito": hematocrito, "creatinina": creatinina, "albumina": albumina, "plaquetas": plaquetas}
+    for key, op, limit, points in _NSQIP_LABS:
+        if _COMPARISONS[op](labs[key], limit):
+            score += points
 
+    # Converter pontuação em riscos percentuais aproximados (não validados)
     base = max(0.5, 0.2 * score)
 
-    risks = {
-        "mortality_30d_pct": clamp(base * 1.2, 0.1, 25.0),
-        "cardiac_complication_pct": clamp(base * 1.0, 0.1, 20.0),
-        "pneumonia_pct": clamp(base * 0.9, 0.1, 20.0),
-        "ssi_pct": clamp(base * 0.8, 0.1, 20.0),
-        "uti_pct": clamp(base * 0.6, 0.1, 15.0),
-        "venous_thromboembolism_pct": clamp(base * 0.7, 0.1, 10.0),
-        "renal_failure_pct": clamp(base * 0.9, 0.1, 15.0),
-        "readmission_pct": clamp(base * 1.1, 0.1, 25.0),
-        "reoperation_pct": clamp(base * 0.8, 0.1, 15.0),
-        "length_of_stay_days": clamp(1.0 + score * 0.6, 0.5, 30.0),
-    }
+    risks = {key: max(lo, min(hi, base * coef)) for key, coef, lo, hi in _NSQIP_RISKS}
+    risks["length_of_stay_days"] = max(0.5, min(30.0, 1.0 + score * 0.6))
 
-    interpretation = (
-        "Estimativas aproximadas de risco perioperatório baseadas em heurísticas inspiradas no NSQIP. "
-        "Use a calculadora oficial do ACS-NSQIP para decisões clínicas definitivas."
-    )
+    return ScoreOutput(result=risks, interpretation=_NSQIP_INTERP, references=_NSQIP_REFS)
+
+
+def nsqip_proxy_batch(patients: Any) -> Dict[str, "np.ndarray"]:
+    """Versão vetorizada do ``nsqip_proxy`` para coortes.
+
+    ``patients`` é um DataFrame (ou mapeamento coluna -> sequência) com as mesmas colunas
+    dos argumentos de ``nsqip_proxy``. Retorna um dict chave de risco -> array de N valores.
+    """
+    import numpy as np
+
+    col = {key: np.asarray(patients[key]) for key in _NSQIP_COLUMNS}
+    n = len(col["idade"])
 
-    refs = (
-        "American College of Surgeons NSQIP Risk Calculator (oficial).",
-        "Bilimoria KY et al. Development and evaluation of the ACS NSQIP Surgical Risk Calculator. J Am Coll Surg. 2013.",
+    idade = col["idade"].astype(float)
+    score = np.array(_NSQIP_AGE_PTS)[np.searchsorted(_NSQIP_AGE_THR, idade, side="right")]
+    score += 0.3 * (np.char.lower(col["sexo"].astype(str)) == "masculino")
+    # Campos categóricos: um dict lookup por paciente, depois aritmética em arrays
+    score += np.fromiter(
+        (_NSQIP_FUNCTIONAL_POINTS.get(str(v).lower(), 0.0) for v in col["status_funcional"]), float, n
     )
+    score += np.fromiter((_NSQIP_ASA_POINTS.get(str(v).strip().upper(), 0.0) for v in col["asa"]), float, n)
+    score += np.column_stack([col[key].astype(bool) for key, _ in _NSQIP_FLAGS]) @ np.array(_NSQIP_FLAG_W)
+    score += np.fromiter((_procedure_points(str(v).lower()) for v in col["procedimento"]), float, n)
+    for key, op, limit, points in _NSQIP_LABS:
+        score += points * _COMPARISONS[op](col[key].astype(float), limit)
 
-    return ScoreOutput(result=risks, interpretation=interpretation, references=refs)
+    base = np.maximum(0.5, 0.2 * score)
+    matrix = np.clip(base[:, None] * np.array(_NSQIP_COEF), _NSQIP_LO, _NSQIP_HI)
+    risks = dict(zip(_NSQIP_RISK_KEYS, matrix.T))
+    risks["length_of_stay_days"] = np.clip(1.0 + score * 0.6, 0.5, 30.0)
+    return risks
 
 
 # -----------------------
 # RCRI (Revised Cardiac Risk Index)
 # -----------------------
 
+# (classe, risco %, categoria) indexado pela pontuação 0..6
+_RCRI_TABLE: Tuple[Tuple[str, float, str], ...] = (
+    ("Classe I", 0.4, "Baixo"),
+    ("Classe II", 0.9, "Intermediário"),
+    ("Classe III", 7.0, "Intermediário"),
+) + (("Classe IV", 11.0, "Alto"),) * 4
+
+_RCRI_RECOMMENDATIONS = (
+    "Otimize comorbidades, controle rigoroso de glicemia e PA; para riscos moderados/altos, "
+    "considerar estratificação adicional (ex.: avaliação funcional, ecocardiograma quando indicado) "
+    "e discussão multidisciplinar."
+)
+_RCRI_INTERP = (
+    "RCRI estima o risco de eventos cardíacos maiores em cirurgias não cardíacas. "
+    "A pontuação é a soma de 6 fatores de 1 ponto."
+)
+_RCRI_REFS: Tuple[str, ...] = (
+    "Lee TH et al. Circulation. 1999;100(10):1043-1049.",
+    "ACC/AHA perioperative guidelines.",
+)
+
+
 def rcri_score(
     *,
     high_risk_surgery: bool,
@@ -217,37 +365,82 @@ def rcri_score(
       - Diabetes em uso de insulina
       - Creatinina sérica pré-op > 2,0 mg/dL
     """
+    return _fresh(_rcri_output(
+        bool(high_risk_surgery),
+        bool(ischemic_heart_disease),
+        bool(congestive_heart_failure),
+        bool(cerebrovascular_disease),
+        bool(insulin_treated_diabetes),
+        bool(creatinine_gt_2mg_dl),
+    ))
+
+
+def rcri_score_numeric(
+    *,
+    high_risk_surgery: bool,
+    ischemic_heart_disease: bool,
+    congestive_heart_failure: bool,
+    cerebrovascular_disease: bool,
+    insulin_treated_diabetes: bool,
+    creatinine_gt_2mg_dl: bool,
+) -> RcriResult:
+    """RCRI só com os campos numéricos (sem dicts de resultado/detalhes)."""
+    return _rcri_numeric(
+        bool(high_risk_surgery),
+        bool(ischemic_heart_disease),
+        bool(congestive_heart_failure),
+        bool(cerebrovascular_disease),
+        bool(insulin_treated_diabetes),
+        bool(creatinine_gt_2mg_dl),
+    )
+
+
+def _rcri_numeric(
+    high_risk_surgery: bool,
+    ischemic_heart_disease: bool,
+    congestive_heart_failure: bool,
+    cerebrovascular_disease: bool,
+    insulin_treated_diabetes: bool,
+    creatinine_gt_2mg_dl: bool,
+) -> RcriResult:
+    # Fatores empacotados em bits: a pontuação é a contagem de bits ligados
+    bits = (
+        high_risk_surgery
+        | ischemic_heart_disease << 1
+        | congestive_heart_failure << 2
+        | cerebrovascular_disease << 3
+        | insulin_treated_diabetes << 4
+        | creatinine_gt_2mg_dl << 5
+    )
+    score = bits.bit_count()
+    return RcriResult(score, *_RCRI_TABLE[score])
+
+
+# 2^6 combinações possíveis: modelos memoizados, copiados por _fresh a cada chamada
+@lru_cache(maxsize=64)
+def _rcri_output(
+    high_risk_surgery: bool,
+    ischemic_heart_disease: bool,
+    congestive_heart_failure: bool,
+    cerebrovascular_disease: bool,
+    insulin_treated_diabetes: bool,
+    creatinine_gt_2mg_dl: bool,
+) -> ScoreOutput:
     details = {
-        "high_risk_surgery": int(bool(high_risk_surgery)),
-        "ischemic_heart_disease": int(bool(ischemic_heart_disease)),
-        "congestive_heart_failure": int(bool(congestive_heart_failure)),
-        "cerebrovascular_disease": int(bool(cerebrovascular_disease)),
-        "insulin_treated_diabetes": int(bool(insulin_treated_diabetes)),
-        "creatinine_gt_2mg_dl": int(bool(creatinine_gt_2mg_dl)),
+        "high_risk_surgery": 1 if high_risk_surgery else 0,
+        "ischemic_heart_disease": 1 if ischemic_heart_disease else 0,
+        "congestive_heart_failure": 1 if congestive_heart_failure else 0,
+        "cerebrovascular_disease": 1 if cerebrovascular_disease else 0,
+        "insulin_treated_diabetes": 1 if insulin_treated_diabetes else 0,
+        "creatinine_gt_2mg_dl": 1 if creatinine_gt_2mg_dl else 0,
     }
-    score = sum(details.values())
-
-    if score == 0:
-        rclass = "Classe I"
-        risk_pct = 0.4
-        category = "Baixo"
-    elif score == 1:
-        rclass = "Classe II"
-        risk_pct = 0.9
-        category = "Intermediário"
-    elif score == 2:
-        rclass = "Classe III"
-        risk_pct = 7.0
-        category = "Intermediário"
-    else:
-        rclass = "Classe IV"
-        risk_pct = 11.0
-        category = "Alto"
-
-    recommendations = (
-        "Otimize comorbidades, controle rigoroso de glicemia e PA; para riscos moderados/altos, "
-        "considerar estratificação adicional (ex.: avaliação funcional, ecocardiograma quando indicado) "
-        "e discussão multidisciplinar."
+    score, rclass, risk_pct, category = _rcri_numeric(
+        high_risk_surgery,
+        ischemic_heart_disease,
+        congestive_heart_failure,
+        cerebrovascular_disease,
+        insulin_treated_diabetes,
+        creatinine_gt_2mg_dl,
     )
 
     result = {
@@ -256,25 +449,64 @@ def rcri_score(
         "risk_percent": risk_pct,
         "risk_category": category,
         "details": details,
-        "recommendations": recommendations,
+        "recommendations": _RCRI_RECOMMENDATIONS,
     }
 
-    interpretation = (
-        "RCRI estima o risco de eventos cardíacos maiores em cirurgias não cardíacas. "
-        "A pontuação é a soma de 6 fatores de 1 ponto."
-    )
-
-    refs = (
-        "Lee TH et al. Circulation. 1999;100(10):1043-1049.",
-        "ACC/AHA perioperative guidelines.",
-    )
-
-    return ScoreOutput(result=result, interpretation=interpretation, references=refs)
+    return ScoreOutput(result=result, interpretation=_RCRI_INTERP, references=_RCRI_REFS)
 
 
 # -----------------------
 # ARISCAT (pulmonary complications)
 # -----------------------
+# Os núcleos numéricos (_*_core) recebem apenas int/float/bool e são compilados com
+# Numba quando SCORES_NUMBA=1; os wrappers fazem validação, normalização de texto e
+# montagem dos dicts de detalhes.
+
+_ARISCAT_CATEGORIES = (("Baixo", 1.6), ("Intermediário", 13.3), ("Alto", 42.1))
+_ARISCAT_CATEGORY_THR = (26, 45)
+_ARISCAT_CATEGORY_NAMES = tuple(name for name, _ in _ARISCAT_CATEGORIES)
+_ARISCAT_CATEGORY_PROBS = tuple(prob for _, prob in _ARISCAT_CATEGORIES)
+_ARISCAT_INPUTS = (
+    "age_51_80",
+    "age_gt_80",
+    "spo2_le_95",
+    "resp_infection_last_month",
+    "anemia_hb_le_10",
+    "incision_abd_upper",
+    "incision_intrathoracic",
+    "duration_2_to_3h",
+    "duration_gt_3h",
+    "emergency_surgery",
+)
+
+
+@_jit
+def _ariscat_core(
+    age_51_80, age_gt_80, spo2_le_95, resp_infection, anemia, incision_abd_upper,
+    incision_intrathoracic, duration_2_to_3h, duration_gt_3h, emergency,
+):
+    # Idade (não somar ambas)
+    age_mid = 3 if (age_51_80 and not age_gt_80) else 0
+    age_old = 16 if age_gt_80 else 0
+    spo2 = 8 if spo2_le_95 else 0
+    infection = 17 if resp_infection else 0
+    anemia_pts = 11 if anemia else 0
+    # Incisão e duração: vale o maior aplicável
+    incision = 24 if incision_intrathoracic else (15 if incision_abd_upper else 0)
+    duration = 23 if duration_gt_3h else (16 if duration_2_to_3h else 0)
+    emergency_pts = 8 if emergency else 0
+    total = age_mid + age_old + spo2 + infection + anemia_pts + incision + duration + emergency_pts
+    code = 0 if total < 26 else (1 if total < 45 else 2)
+    return age_mid, age_old, spo2, infection, anemia_pts, incision, duration, emergency_pts, total, code
+
+
+_ARISCAT_INTERP = (
+    "ARISCAT estima risco de complicações pulmonares pós-operatórias com base em idade, oxigenação, infecção recente, anemia, sítio da incisão, duração e emergência."
+)
+_ARISCAT_REFS: Tuple[str, ...] = (
+    "Canet J et al. Prediction of postoperative pulmonary complications. Anesthesiology. 2010;113(6):1338-1350.",
+)
+
 
 def ariscat_score(
     *,
@@ -290,51 +522,64 @@ def ariscat_score(
     emergency_surgery: bool,
 ) -> ScoreOutput:
     """Calcula escore ARISCAT e categoria de risco de complicações pulmonares."""
-    details_points: Dict[str, int] = {}
-
-    # Idade (não somar ambas)
-    details_points["age_51_80"] = 3 if (age_51_80 and not age_gt_80) else 0
-    details_points["age_gt_80"] = 16 if age_gt_80 else 0
-
-    # SpO2 <= 95%
-    details_points["spo2_le_95"] = 8 if spo2_le_95 else 0
-
-    # Infecção respiratória < 1 mês
-    details_points["resp_infection_last_month"] = 17 if resp_infection_last_month else 0
-
-    # Anemia Hb <= 10 g/dL
-    details_points["anemia_hb_le_10"] = 11 if anemia_hb_le_10 else 0
-
-    # Incisão: escolha o maior aplicável
-    incision_points = 0
-    if incision_intrathoracic:
-        incision_points = max(incision_points, 24)
-    if incision_abd_upper:
-        incision_points = max(incision_points, 15)
-    details_points["incision"] = incision_points
-
-    # Duração: escolha o maior aplicável
-    duration_points = 0
-    if duration_gt_3h:
-        duration_points = max(duration_points, 23)
-    elif duration_2_to_3h:
-        duration_points = max(duration_points, 16)
-    details_points["duration"] = duration_points
-
-    # Emergência
-    details_points["emergency_surgery"] = 8 if emergency_surgery else 0
-
-    total = sum(details_points.values())
-
-    if total < 26:
-        risk_category = "Baixo"
-        probability_cpp = 1.6
-    elif total < 45:
-        risk_category = "Intermediário"
-        probability_cpp = 13.3
-    else:
-        risk_category = "Alto"
-        probability_cpp = 42.1
+    return _fresh(_ariscat_output(
+        bool(age_51_80),
+        bool(age_gt_80),
+        bool(spo2_le_95),
+        bool(resp_infection_last_month),
+        bool(anemia_hb_le_10),
+        bool(incision_abd_upper),
+        bool(incision_intrathoracic),
+        bool(duration_2_to_3h),
+        bool(duration_gt_3h),
+        bool(emergency_surgery),
+    ))
+
+
+def ariscat_score_numeric(
+    *,
+    age_51_80: bool,
+    age_gt_80: bool,
+    spo2_le_95: bool,
+    resp_infection_last_month: bool,
+    anemia_hb_le_10: bool,
+    incision_abd_upper: bool,
+    incision_intrathoracic: bool,
+    duration_2_to_3h: bool,
+    duration_gt_3h: bool,
+    emergency_surgery: bool,
+) -> AriscatResult:
+    """ARISCAT só com os campos numéricos (sem dicts de resultado/detalhes)."""
+    *_, total, code = _ariscat_core(
+        bool(age_51_80),
+        bool(age_gt_80),
+        bool(spo2_le_95),
+        bool(resp_infection_last_month),
+        bool(anemia_hb_le_10),
+        bool(incision_abd_upper),
+        bool(incision_intrathoracic),
+        bool(duration_2_to_3h),
+        bool(duration_gt_3h),
+        bool(emergency_surgery),
+    )
+    return AriscatResult(total, *_ARISCAT_CATEGORIES[code])
+
+
+# 2^10 combinações possíveis: modelos memoizados, copiados por _fresh a cada chamada
+@lru_cache(maxsize=1024)
+def _ariscat_output(*flags: bool) -> ScoreOutput:
+    (age_mid, age_old, spo2, infection, anemia, incision, duration, emergency, total, code) = _ariscat_core(*flags)
+    details_points: Dict[str, int] = {
+        "age_51_80": age_mid,
+        "age_gt_80": age_old,
+        "spo2_le_95": spo2,
+        "resp_infection_last_month": infection,
+        "anemia_hb_le_10": anemia,
+        "incision": incision,
+        "duration": duration,
+        "emergency_surgery": emergency,
+    }
+    risk_category, probability_cpp = _ARISCAT_CATEGORIES[code]
 
     result = {
         "score": total,
@@ -343,21 +588,106 @@ def ariscat_score(
         "details": details_points,
     }
 
-    interpretation = (
-        "ARISCAT estima risco de complicações pulmonares pós-operatórias com base em idade, oxigenação, infecção recente, anemia, sítio da incisão, duração e emergência."
-    )
+    return ScoreOutput(result=result, interpretation=_ARISCAT_INTERP, references=_ARISCAT_REFS)
 
-    refs = (
-        "Canet J et al. Prediction of postoperative pulmonary complications. Anesthesiology. 2010;113(6):1338-1350.",
-    )
 
-    return ScoreOutput(result=result, interpretation=interpretation, references=refs)
+def ariscat_score_batch(patients: Any) -> Dict[str, "np.ndarray"]:
+    """Versão vetorizada do ``ariscat_score`` para coortes.
+
+    ``patients`` é um DataFrame (ou mapeamento coluna -> sequência) com as colunas booleanas
+    dos argumentos de ``ariscat_score``. Retorna arrays "score", "risk_category" e
+    "probability_cpp_percent".
+    """
+    import numpy as np
+
+    col = {key: np.asarray(patients[key], dtype=bool) for key in _ARISCAT_INPUTS}
+    age_gt_80 = col["age_gt_80"]
+    thoracic = col["incision_intrathoracic"]
+    long_surgery = col["duration_gt_3h"]
+    # "Maior aplicável" sem desvios: a faixa menor só conta quando a maior está ausente
+    score = (
+        3 * (col["age_51_80"] & ~age_gt_80)
+        + 16 * age_gt_80
+        + 8 * col["spo2_le_95"]
+        + 17 * col["resp_infection_last_month"]
+        + 11 * col["anemia_hb_le_10"]
+        + 24 * thoracic
+        + 15 * (col["incision_abd_upper"] & ~thoracic)
+        + 23 * long_surgery
+        + 16 * (col["duration_2_to_3h"] & ~long_surgery)
+        + 8 * col["emergency_surgery"]
+    )
+    code = np.searchsorted(_ARISCAT_CATEGORY_THR, score, side="right")
+    return {
+        "score": score,
+        "risk_category": np.array(_ARISCAT_CATEGORY_NAMES)[code],
+        "probability_cpp_percent": np.array(_ARISCAT_CATEGORY_PROBS)[code],
+    }
 
 
 # -----------------------
 # AKICS (Acute Kidney Injury after Cardiac Surgery)
 # -----------------------
 
+_AKICS_TIPO_CODES: Mapping[str, int] = MappingProxyType({"coronariana": 0, "valvar": 1, "combinada": 2, "nao_cardiaca": 3})
+_AKICS_COMPLEXIDADE_CODES: Mapping[str, int] = MappingProxyType({"baixa": 0, "media": 1, "alta": 2})
+# Itens de creatinina exibidos no detalhamento, pelos pontos atribuídos
+_AKICS_CREATININE_COMPONENTS: Mapping[float, Mapping[str, float]] = MappingProxyType(
+    {
+        0.0: MappingProxyType({"creatinina_1.2_2.0": 0.0, "creatinina_>2.0": 0.0}),
+        2.0: MappingProxyType({"creatinina_1.2_2.0": 2.0}),
+        5.0: MappingProxyType({"creatinina_>2.0": 5.0}),
+    }
+)
+_AKICS_CATEGORIES = (("Muito baixo", 2.0), ("Baixo", 8.0), ("Moderado", 18.0), ("Alto", 35.0), ("Muito alto", 50.0))
+
+
+@_jit
+def _akics_core(idade, sexo_feminino, insuficiencia_cardiaca, hipertensao, emergencia, tipo, creatinina, complexidade):
+    age_points = idade / 10.0
+    sex_pts = 1.0 if sexo_feminino else 0.0
+    ic_pts = 1.0 if insuficiencia_cardiaca else 0.0
+    has_pts = 1.0 if hipertensao else 0.0
+    emerg_pts = 2.0 if emergencia else 0.0
+    valve_pts = 1.0 if tipo == 1 else 0.0
+    combined_pts = 2.0 if tipo == 2 else 0.0
+    if 1.2 <= creatinina <= 2.0:
+        creat_pts = 2.0
+    elif creatinina > 2.0:
+        creat_pts = 5.0
+    else:
+        creat_pts = 0.0
+    comp_pts = 0.0
+    if tipo == 3:
+        comp_pts = 1.0 if complexidade == 2 else (0.5 if complexidade == 1 else 0.0)
+    points = age_points + sex_pts + ic_pts + has_pts + emerg_pts + valve_pts + combined_pts + creat_pts + comp_pts
+
+    # Estratificação
+    if points <= 2:
+        code = 0
+    elif points <= 5:
+        code = 1
+    elif points <= 8:
+        code = 2
+    elif points <= 13:
+        code = 3
+    else:
+        code = 4
+    return age_points, sex_pts, ic_pts, has_pts, emerg_pts, valve_pts, combined_pts, creat_pts, comp_pts, points, code
+
+
+_AKICS_INTERP = (
+    "AKICS pré-operatório estima risco de injúria renal aguda no pós-operatório de cirurgia cardíaca; "
+    "os pontos refletem idade, comorbidades, urgência, tipo cirúrgico e creatinina. Adaptação não-cardíaca usa complexidade como proxy."
+)
+_AKICS_RECOMMENDATIONS = (
+    "Otimizar hemodinâmica e perfusão renal, evitar nefrotóxicos, balancear fluidos e considerar monitoração estreita em pacientes de risco."
+)
+_AKICS_REFS: Tuple[str, ...] = (
+    "Wijeysundera DN et al., desenvolvimento de escores para IRA pós-cirurgia cardíaca (literatura de AKI).",
+)
+
+
 def akics_score(
     *,
     idade: int,
@@ -379,129 +709,117 @@ def akics_score(
         raise ValueError("Idade inválida")
     if creatinina_mg_dl < 0 or creatinina_mg_dl > 20:
         raise ValueError("Creatinina fora de faixa plausível")
-    tipo = tipo_cirurgia.lower().strip()
-    if tipo not in {"coronariana", "valvar", "combinada", "nao_cardiaca"}:
+    tipo = tipo_cirurgia if tipo_cirurgia in _AKICS_TIPO_CODES else tipo_cirurgia.lower().strip()
+    if tipo not in _AKICS_TIPO_CODES:
         raise ValueError("tipo_cirurgia inválido")
     if tipo == "nao_cardiaca" and nao_cardiaca_complexidade is not None:
-        if nao_cardiaca_complexidade.lower() not in {"baixa", "media", "alta"}:
+        if nao_cardiaca_complexidade.lower() not in _AKICS_COMPLEXIDADE_CODES:
             raise ValueError("nao_cardiaca_complexidade inválida")
 
-    # Pontuação
-    points = 0.0
-    components: Dict[str, float] = {}
-
-    age_points = idade / 10.0
-    points += age_points
-    components["idade/10"] = round(age_points, 2)
-
-    if sexo_feminino:
-        points += 1.0
-        components["sexo_feminino"] = 1.0
-    else:
-        components["sexo_feminino"] = 0.0
-
-    if insuficiencia_cardiaca:
-        points += 1.0
-        components["insuficiencia_cardiaca"] = 1.0
-    else:
-        components["insuficiencia_cardiaca"] = 0.0
-
-    if hipertensao:
-        points += 1.0
-        components["hipertensao"] = 1.0
-    else:
-        components["hipertensao"] = 0.0
-
-    if emergencia:
-        points += 2.0
-        components["emergencia"] = 2.0
-    else:
-        components["emergencia"] = 0.0
-
-    if tipo == "valvar":
-        points += 1.0
-        components["cirurgia_valvar"] = 1.0
-    else:
-        components["cirurgia_valvar"] = 0.0
-
-    if tipo == "combinada":
-        points += 2.0
-        components["cirurgia_combinada"] = 2.0
-    else:
-        components["cirurgia_combinada"] = 0.0
-
-    # Creatinina
-    if 1.2 <= creatinina_mg_dl <= 2.0:
-        points += 2.0
-        components["creatinina_1.2_2.0"] = 2.0
-    elif creatinina_mg_dl > 2.0:
-        points += 5.0
-        components["creatinina_>2.0"] = 5.0
-    else:
-        components["creatinina_1.2_2.0"] = 0.0
-        components["creatinina_>2.0"] = 0.0
-
+    comp = (nao_cardiaca_complexidade or "baixa").lower() if tipo == "nao_cardiaca" else ""
+
+    (age_points, sex_pts, ic_pts, has_pts, emerg_pts, valve_pts, combined_pts, creat_pts, comp_pts, points, code) = (
+        _akics_core(
+            float(idade),
+            bool(sexo_feminino),
+            bool(insuficiencia_cardiaca),
+            bool(hipertensao),
+            bool(emergencia),
+            _AKICS_TIPO_CODES[tipo],
+            float(creatinina_mg_dl),
+            _AKICS_COMPLEXIDADE_CODES.get(comp, 0),
+        )
+    )
+    components: Dict[str, float] = {
+        "idade/10": round(age_points, 2),
+        "sexo_feminino": sex_pts,
+        "insuficiencia_cardiaca": ic_pts,
+        "hipertensao": has_pts,
+        "emergencia": emerg_pts,
+        "cirurgia_valvar": valve_pts,
+        "cirurgia_combinada": combined_pts,
+        **_AKICS_CREATININE_COMPONENTS[creat_pts],
+    }
     # Adaptação para não-cardíacas
-    if tipo == "nao_cardiaca":
-        comp = (nao_cardiaca_complexidade or "baixa").lower()
-        if comp == "alta":
-            points += 1.0
-            components["nao_cardiaca_complexidade_alta"] = 1.0
-        elif comp == "media":
-            points += 0.5
-            components["nao_cardiaca_complexidade_media"] = 0.5
-        else:
-            components["nao_cardiaca_complexidade_baixa"] = 0.0
+    if comp:
+        components[f"nao_cardiaca_complexidade_{comp}"] = comp_pts
 
-    # Estratificação
-    if points <= 2:
-        categoria = "Muito baixo"
-        prob = 2.0
-    elif points <= 5:
-        categoria = "Baixo"
-        prob = 8.0
-    elif points <= 8:
-        categoria = "Moderado"
-        prob = 18.0
-    elif points <= 13:
-        categoria = "Alto"
-        prob = 35.0
-    else:
-        categoria = "Muito alto"
-        prob = 50.0
+    categoria, prob = _AKICS_CATEGORIES[code]
 
-    result = {
+    result_struct = {
         "pontuacao_total": round(points, 2),
         "categoria_risco": categoria,
         "probabilidade_percentual": prob,
         "detalhes": components,
+        "interpretacao_clinica": _AKICS_INTERP,
+        "recomendacoes": _AKICS_RECOMMENDATIONS,
+        "referencia_bibliografica": _AKICS_REFS[0],
     }
 
-    interpretacao = (
-        "AKICS pré-operatório estima risco de injúria renal aguda no pós-operatório de cirurgia cardíaca; "
-        "os pontos refletem idade, comorbidades, urgência, tipo cirúrgico e creatinina. Adaptação não-cardíaca usa complexidade como proxy."
-    )
-    recomendacoes = (
-        "Otimizar hemodinâmica e perfusão renal, evitar nefrotóxicos, balancear fluidos e considerar monitoração estreita em pacientes de risco."
-    )
-    refs = (
-        "Wijeysundera DN et al., desenvolvimento de escores para IRA pós-cirurgia cardíaca (literatura de AKI).",
-    )
-
-    result_struct = {
-        **result,
-        "interpretacao_clinica": interpretacao,
-        "recomendacoes": recomendacoes,
-        "referencia_bibliografica": refs[0],
-    }
-
-    return ScoreOutput(result=result_struct, interpretation=interpretacao, references=refs)
+    return ScoreOutput(result=result_struct, interpretation=_AKICS_INTERP, references=_AKICS_REFS)
 
 
 # -----------------------
 # PRE-DELIRIC (Delirium in ICU)
 # -----------------------
 
+_PRE_DELIRIC_ADMISSION_POINTS: Mapping[str, int] = MappingProxyType(
+    {
+        "clínico": 0,
+        "clinico": 0,
+        "cirúrgico": 1,
+        "cirurgico": 1,
+        "trauma": 2,
+        "neuro": 5,
+        "neurocirurgia": 5,
+    }
+)
+# Faixas (limiares crescentes, inclusivos) -> pontos
+_PRE_DELIRIC_AGE_THR = (50, 60, 70, 80)
+_PRE_DELIRIC_AGE_PTS = (0, 1, 2, 5, 6)
+_PRE_DELIRIC_APACHE_THR = (10.0, 15.0, 20.0)
+_PRE_DELIRIC_APACHE_PTS = (0, 2, 3, 5)
+_PRE_DELIRIC_RATIO_THR = (5.0, 10.0)  # pontos = índice da faixa
+_PRE_DELIRIC_CATEGORIES = (("Muito baixo", 5.0), ("Baixo", 15.0), ("Moderado", 35.0), ("Alto", 50.0))
+
+
+@_jit
+def _pre_deliric_core(idade, apache_ii, adm_pts, coma, infeccao, ph, sedativos, morfina, ureia, creatinina):
+    age_pts = _PRE_DELIRIC_AGE_PTS[_tier(_PRE_DELIRIC_AGE_THR, idade)]
+    apache_pts = _PRE_DELIRIC_APACHE_PTS[_tier(_PRE_DELIRIC_APACHE_THR, apache_ii)]
+    coma_pts = 4 if coma else 0
+    inf_pts = 1 if infeccao else 0
+    acidose_pts = 2 if ph < 7.35 else 0  # usa pH; HCO3 pode refinar
+    sed_pts = 1 if sedativos else 0
+    morf_pts = 2 if morfina else 0
+
+    ratio = ureia / creatinina
+    ratio_pts = _tier(_PRE_DELIRIC_RATIO_THR, ratio)
+
+    total = age_pts + apache_pts + adm_pts + coma_pts + inf_pts + acidose_pts + sed_pts + morf_pts + ratio_pts
+    if total <= 4:
+        code = 0
+    elif total <= 9:
+        code = 1
+    elif total <= 15:
+        code = 2
+    else:
+        code = 3
+    return age_pts, apache_pts, coma_pts, inf_pts, acidose_pts, sed_pts, morf_pts, ratio, ratio_pts, total, code
+
+
+_PRE_DELIRIC_INTERP = (
+    "PRE-DELIRIC estima risco de delirium em UTI nas primeiras 24h. "
+    "Este cálculo adaptado usa variáveis perioperatórias comuns (idade, APACHE II, admissão, coma, infecção, acidose, sedativos/opioides e relação ureia/creatinina)."
+)
+_PRE_DELIRIC_RECOMMENDATIONS = (
+    "Implementar medidas preventivas (reorientação, higiene do sono, mobilização precoce, evitar polifarmácia e sedação excessiva)."
+)
+_PRE_DELIRIC_REFS: Tuple[str, ...] = (
+    "van den Boogaard M et al. The PRE-DELIRIC model. Intensive Care Med. 2012.",
+)
+
+
 def pre_deliric_score(
     *,
     idade: int,
@@ -526,45 +844,28 @@ def pre_deliric_score(
     if ureia_mg_dl < 0 or creatinina_mg_dl <= 0:
         raise ValueError("Ureia/Creatinina inválidas")
 
-    # Idade
-    age_pts = 0
-    if idade >= 80:
-        age_pts = 6
-    elif idade >= 70:
-        age_pts = 5
-    elif idade >= 60:
-        age_pts = 2
-    elif idade >= 50:
-        age_pts = 1
-
-    # APACHE II
-    apache_pts = 0
-    if apache_ii >= 20:
-        apache_pts = 5
-    elif apache_ii >= 15:
-        apache_pts = 3
-    elif apache_ii >= 10:
-        apache_pts = 2
-
     # Grupo de admissão
-    grp = grupo_admissao.strip().lower()
-    grp_map = {"clínico": 0, "clinico": 0, "cirúrgico": 1, "cirurgico": 1, "trauma": 2, "neuro": 5, "neurocirurgia": 5}
-    if grp not in grp_map:
-        raise ValueError("grupo_admissao inválido")
-    adm_pts = grp_map[grp]
-
-    coma_pts = 4 if coma else 0
-    inf_pts = 1 if infeccao else 0
-    acidose_pts = 2 if ph < 7.35 else 0  # usa pH; HCO3 pode refinar
-    sed_pts = 1 if sedativos else 0
-    morf_pts = 2 if morfina else 0
-
-    ratio = ureia_mg_dl / creatinina_mg_dl
-    ratio_pts = 0
-    if ratio >= 10:
-        ratio_pts = 2
-    elif ratio >= 5:
-        ratio_pts = 1
+    # Entrada já canônica dispensa a normalização
+    adm_pts = _PRE_DELIRIC_ADMISSION_POINTS.get(grupo_admissao)
+    if adm_pts is None:
+        adm_pts = _PRE_DELIRIC_ADMISSION_POINTS.get(grupo_admissao.strip().lower())
+        if adm_pts is None:
+            raise ValueError("grupo_admissao inválido")
+
+    (age_pts, apache_pts, coma_pts, inf_pts, acidose_pts, sed_pts, morf_pts, ratio, ratio_pts, total, code) = (
+        _pre_deliric_core(
+            int(idade),
+            float(apache_ii),
+            adm_pts,
+            bool(coma),
+            bool(infeccao),
+            float(ph),
+            bool(sedativos),
+            bool(morfina),
+            float(ureia_mg_dl),
+            float(creatinina_mg_dl),
+        )
+    )
 
     details = {
         "idade_pts": age_pts,
@@ -579,44 +880,16 @@ def pre_deliric_score(
         "ratio_pts": ratio_pts,
     }
 
-    total = sum(v for k, v in details.items() if k.endswith("_pts"))
-
-    if total <= 4:
-        categoria = "Muito baixo"
-        prob = 5.0
-    elif total <= 9:
-        categoria = "Baixo"
-        prob = 15.0
-    elif total <= 15:
-        categoria = "Moderado"
-        prob = 35.0
-    else:
-        categoria = "Alto"
-        prob = 50.0
+    categoria, prob = _PRE_DELIRIC_CATEGORIES[code]
 
-    result = {
+    result_struct = {
         "pontuacao_total": int(total),
         "categoria_risco": categoria,
         "probabilidade_percentual": prob,
         "detalhes": details,
+        "interpretacao_clinica": _PRE_DELIRIC_INTERP,
+        "recomendacoes": _PRE_DELIRIC_RECOMMENDATIONS,
+        "referencia_bibliografica": _PRE_DELIRIC_REFS[0],
     }
 
-    interpretacao = (
-        "PRE-DELIRIC estima risco de delirium em UTI nas primeiras 24h. "
-        "Este cálculo adaptado usa variáveis perioperatórias comuns (idade, APACHE II, admissão, coma, infecção, acidose, sedativos/opioides e relação ureia/creatinina)."
-    )
-    recomendacoes = (
-        "Implementar medidas preventivas (reorientação, higiene do sono, mobilização precoce, evitar polifarmácia e sedação excessiva)."
-    )
-    refs = (
-        "van den Boogaard M et al. The PRE-DELIRIC model. Intensive Care Med. 2012.",
-    )
-
-    result_struct = {
-        **result,
-        "interpretacao_clinica": interpretacao,
-        "recomendacoes": recomendacoes,
-        "referencia_bibliografica": refs[0],
-    }
-
-    return ScoreOutput(result=result_struct, interpretation=interpretacao, references=refs)
+    return ScoreOutput(result=result_struct, interpretation=_PRE_DELIRIC_INTERP, references=_PRE_DELIRIC_REFS)
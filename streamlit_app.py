@@ -1,25 +1,24 @@
 from __future__ import annotations
 
+import copy
+import io
+import json
+import re
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict
 
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
-
-from src.config import load_config
-from src.risk_scores import calculate_rcri, calculate_ariscat, calculate_stopbang
-from src.ai_assistant import generate_recommendations
-from src.reporting import build_pdf_report
-from src.scores import (
-    classify_asa,
-    nsqip_proxy,
-    rcri_score as rcri_score_full,
-    ariscat_score as ariscat_score_full,
-    akics_score,
-    pre_deliric_score,
-)
-from src.ai_analysis import analyze_general, analyze_medications
+
+from src.config import load_config, logger
+
+# plotly, src.risk_scores e src.scores (numpy/numba) são importados no primeiro uso, dentro das
+# seções: a tela do aviso inicial e a primeira renderização não pagam esse custo
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
 
 # --------- Page Config ---------
@@ -30,166 +29,506 @@ st.set_page_config(
 )
 
 # --------- Custom CSS ---------
-CUSTOM_CSS = """
-<style>
-    :root {
-        --primary: #0B5FA5;   /* azul médico */
-        --primary-700: #094b82;
-        --secondary: #E6F0FA; /* fundo suave */
-        --bg: #F8FAFC;        /* cinza-azulado claro */
-        --text: #0f172a;      /* cinza escuro legível */
-        --card-bg: #ffffff;
-        --muted: #64748b;
-    }
-
-    .app-container {
-        background: var(--bg);
-    }
-
-    /* Header */
-    .app-header {
-        display: flex;
-        align-items: center;
-        gap: 16px;
-        background: linear-gradient(90deg, var(--primary) 0%, var(--primary-700) 100%);
-        color: #fff;
-        padding: 16px 20px;
-        border-radius: 10px;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.08);
-        margin-bottom: 12px;
-    }
-    .app-header h1 {
-        margin: 0;
-        font-weight: 700;
-        letter-spacing: .2px;
-    }
-    .app-header .subtitle {
-        margin: 0;
-        font-size: 13px;
-        color: #cfe7ff;
-    }
-
-    /* Cards */
-    .card {
-        background: var(--card-bg);
-        border: 1px solid #e5e7eb;
-        border-radius: 12px;
-        padding: 16px;
-        box-shadow: 0 1px 3px rgba(0,0,0,0.03);
-    }
-
-    /* Footer */
-    .footer {
-        margin-top: 24px;
-        padding: 16px;
-        color: var(--muted);
-        text-align: center;
-        border-top: 1px solid #e5e7eb;
-    }
-</style>
-"""
-
-st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+@st.cache_data
+def _css() -> str:
+    # Lido do disco uma vez e minificado (sem comentários nem espaços repetidos): cada
+    # rerun só reenvia a string curta em cache
+    css = (Path(__file__).parent / "assets" / "styles.css").read_text(encoding="utf-8")
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    return re.sub(r"\s+", " ", css).strip()
+
+
+@st.cache_resource
+def _logo_bytes() -> bytes | None:
+    # bytes são imutáveis: cache_resource devolve o mesmo objeto, sem a cópia (pickle) do cache_data
+    p = Path("assets") / "logo.png"
+    return p.read_bytes() if p.exists() else None
+
+
+@st.cache_resource
+def _header_html(name: str) -> str:
+    # app_name não muda durante o processo: o HTML do cabeçalho é formatado uma vez
+    return f"""
+    <div class="app-header">
+        <div>
+            <h1>{name}</h1>
+            <p class="subtitle">Estratificação de risco perioperatório com escores validados e apoio de IA</p>
+        </div>
+    </div>
+    """
+
+
+st.markdown(f"<style>{_css()}</style>", unsafe_allow_html=True)
+
+# --------- Campos do formulário do paciente ---------
+ASA_OPTIONS = ("I", "II", "III", "IV", "V", "VI")
+ASA_INDEX = {v: i for i, v in enumerate(ASA_OPTIONS)}
+SEXO_OPTIONS = ("Feminino", "Masculino")
+
+# Dados cirúrgicos
+SURGERY_CATEGORIES = (
+    "Cardíaca", "Vascular", "Torácica", "Abdominal", "Ortopédica", "Neurocirurgia", "Urologia", "Ginecologia", "Outras"
+)
+SURGERY_SUBTYPES = MappingProxyType({
+    "Cardíaca": ("Coronariana", "Valvar", "Combinada"),
+    "Vascular": ("Suprainguinal", "Infrainguinal"),
+    "Torácica": ("Pulmonar", "Esofágica", "Mediastinal"),
+    "Abdominal": ("Alta (epigástrica)", "Baixa (pélvica)"),
+    "Ortopédica": ("Grande porte", "Pequeno porte"),
+    "Neurocirurgia": ("Craniana", "Espinal"),
+    "Urologia": ("Prostatectomia", "Nefrectomia", "Outras"),
+    "Ginecologia": ("Histerectomia", "Outras"),
+    "Outras": ("Não especificado",),
+})
+SURGERY_CATEGORY_INDEX = {v: i for i, v in enumerate(SURGERY_CATEGORIES)}
+PORTE_OPTIONS = ("Pequeno", "Médio", "Grande", "Especial")
+PORTE_INDEX = {v: i for i, v in enumerate(PORTE_OPTIONS)}
+# Risco cirúrgico base por porte; categoria/sítio/subtipo só ajustam a partir daqui
+PORTE_RISK = MappingProxyType({"Pequeno": "Baixo", "Médio": "Intermediário", "Grande": "Alto", "Especial": "Alto"})
+# Risco -> (tipo de alerta do Streamlit, mensagem)
+RISK_MESSAGES = MappingProxyType({
+    "Baixo": ("success", "Risco cirúrgico: Baixo (<1% mortalidade)"),
+    "Intermediário": ("info", "Risco cirúrgico: Intermediário (1–5% mortalidade)"),
+    "Alto": ("warning", "Risco cirúrgico: Alto (>5% mortalidade)"),
+})
+URGENCIA_OPTIONS = ("Eletiva", "Urgência", "Emergência")
+URGENCIA_INDEX = {v: i for i, v in enumerate(URGENCIA_OPTIONS)}
+DURACAO_OPTIONS = ("<2h", "2-3h", ">3h")
+DURACAO_INDEX = {v: i for i, v in enumerate(DURACAO_OPTIONS)}
+ANESTESIA_OPTIONS = ("Geral", "Peridural", "Raqui", "Bloqueio periférico", "Sedação", "Mista")
+ANESTESIA_INDEX = {v: i for i, v in enumerate(ANESTESIA_OPTIONS)}
+INCISAO_OPTIONS = ("Intratorácica", "Abdome superior", "Abdome inferior", "Outras")
+INCISAO_INDEX = {v: i for i, v in enumerate(INCISAO_OPTIONS)}
+
+# Avaliação funcional
+NSQIP_STATUS_OPTIONS = ("Independente", "Parcialmente dependente", "Totalmente dependente")
+NSQIP_STATUS_INDEX = {v: i for i, v in enumerate(NSQIP_STATUS_OPTIONS)}
+ESCADAS_OPTIONS = ("Sim", "Não")
+ESCADAS_INDEX = {v: i for i, v in enumerate(ESCADAS_OPTIONS)}
+AVD_OPTIONS = ("Independente", "Dependência parcial", "Dependência total")
+AVD_INDEX = {v: i for i, v in enumerate(AVD_OPTIONS)}
+
+# Dados específicos para AKICS / PRE-DELIRIC
+AKICS_TIPO_OPTIONS = ("Coronariana", "Valvar", "Combinada")
+AKICS_TIPO_INDEX = {v: i for i, v in enumerate(AKICS_TIPO_OPTIONS)}
+AKICS_FUNCAO_OPTIONS = ("Normal", "Disfunção leve", "Disfunção moderada", "Disfunção grave")
+PRE_DELIRIC_GRUPO_OPTIONS = ("Clínico", "Cirúrgico", "Trauma", "Neuro")
+PRE_DELIRIC_GRUPO_INDEX = {v: i for i, v in enumerate(PRE_DELIRIC_GRUPO_OPTIONS)}
+
+# Comorbidades por sistema: (legenda, colunas), cada coluna com itens (chave, rótulo, ajuda)
+COMORBIDITY_GROUPS = (
+    (
+        "Cardiovasculares",
+        (
+            (
+                ("hipertensao", "Hipertensão arterial", "HAS diagnosticada"),
+                ("doenca_cardiaca_isquemica", "Doença cardíaca isquêmica", "DAC/IAM/angina"),
+            ),
+            (
+                ("insuficiencia_cardiaca", "Insuficiência cardíaca congestiva", "IC com FE reduzida/preservada"),
+                ("arritmias", "Arritmias", "FA/flutter, etc."),
+            ),
+            (
+                ("doenca_cerebrovascular", "Doença cerebrovascular (AVC/AIT)", "AVC/AIT prévio"),
+            ),
+        ),
+    ),
+    (
+        "Endócrino-metabólicas",
+        (
+            (
+                ("diabetes_tipo_1", "DM tipo 1", None),
+                ("diabetes_tipo_2", "DM tipo 2", None),
+            ),
+            (
+                ("uso_insulina", "Uso de insulina", None),
+                ("dislipidemia", "Dislipidemia", None),
+            ),
+            (
+                ("obesidade", "Obesidade", "IMC ≥ 30"),
+            ),
+        ),
+    ),
+    (
+        "Pulmonares",
+        (
+            (
+                ("dpoc", "DPOC", None),
+                ("asma", "Asma brônquica", None),
+            ),
+            (
+                ("infeccao_respiratoria_mes", "Infecção respiratória (< 1 mês)", "Vias aéreas inferiores/superiores"),
+            ),
+            (
+                ("pneumopatia_restritiva", "Pneumopatias restritivas", None),
+            ),
+        ),
+    ),
+    (
+        "Renais",
+        (
+            (
+                ("insuficiencia_renal_cronica", "Insuficiência renal crônica", None),
+            ),
+            (
+                ("uso_diureticos", "Uso de diuréticos", None),
+            ),
+            (
+                ("uso_ieca_bra", "Uso de IECA/BRA", None),
+            ),
+        ),
+    ),
+    (
+        "Neurológicas",
+        (
+            (
+                ("demencia", "Demência", None),
+            ),
+            (
+                ("comprometimento_cognitivo", "Comprometimento cognitivo", None),
+            ),
+            (
+                ("deficits_sensoriais", "Déficits sensoriais (visual/auditivo)", None),
+            ),
+        ),
+    ),
+)
+
+# Classes de medicação: (chave, rótulo); as quatro primeiras ficam em colunas
+MED_CLASSES = (
+    ("sedativos_benzos", "Sedativos/Benzos"),
+    ("opioides", "Morfina/Opioides"),
+    ("anticoagulantes", "Anticoagulantes"),
+    ("antidiabeticos_orais", "Antidiabéticos orais"),
+    ("insulina", "Insulina"),
+)
+
+# Exames laboratoriais por coluna: (chave, rótulo, mínimo, máximo, passo)
+LAB_FIELDS = (
+    (
+        ("hemoglobina", "Hemoglobina (g/dL)", 0.0, 25.0, 0.1),
+        ("hematocrito", "Hematócrito (%)", 0.0, 70.0, 0.1),
+        ("plaquetas", "Plaquetas (10³/µL)", 0.0, 1500.0, 1.0),
+    ),
+    (
+        ("creatinina", "Creatinina sérica (mg/dL)", 0.0, 20.0, 0.1),
+        ("ureia", "Ureia (mg/dL)", 0.0, 300.0, 1.0),
+        ("albumina", "Albumina sérica (g/dL)", 0.0, 10.0, 0.1),
+    ),
+    (
+        ("glicemia_jejum", "Glicemia de jejum (mg/dL)", 0.0, 1000.0, 1.0),
+        ("ph", "Gasometria: pH", 6.8, 7.8, 0.01),
+        ("hco3", "Gasometria: HCO₃ (mEq/L)", 0.0, 60.0, 0.5),
+    ),
+)
+
+# Fatores das calculadoras por coluna: (argumento do escore, rótulo)
+RCRI_FIELDS = (
+    (("high_risk_surgery", "Cirurgia de alto risco"), ("history_ischemic_heart_disease", "Doença cardíaca isquêmica")),
+    (("history_congestive_heart_failure", "Insuficiência cardíaca"), ("history_cerebrovascular_disease", "Doença cerebrovascular")),
+    (("insulin_therapy_diabetes", "Diabetes em insulina"), ("preoperative_creatinine_gt_2mg_dl", "Creatinina > 2 mg/dL")),
+)
+ARISCAT_FIELDS = (
+    (
+        ("age_51_80", "Idade 51-80"),
+        ("age_gt_80", "Idade > 80"),
+        ("resp_infection_last_month", "Infecção respiratória < 1 mês"),
+    ),
+    (
+        ("low_spo2", "SpO2 91–95%"),
+        ("very_low_spo2", "SpO2 ≤ 90%"),
+        ("anemia", "Anemia"),
+    ),
+    (
+        ("surgery_upper_abdominal", "Cirurgia abdome superior"),
+        ("surgery_intrathoracic", "Cirurgia intratorácica"),
+        ("duration_2_to_3h", "Duração 2–3h"),
+        ("duration_gt_3h", "Duração > 3h"),
+        ("emergency_surgery", "Cirurgia de emergência"),
+    ),
+)
+STOPBANG_FIELDS = (
+    (("snoring", "Ronco"), ("tired", "Cansaço diurno")),
+    (("observed_apnea", "Apneia observada"), ("high_bp", "Hipertensão")),
+    (("bmi_over_35", "IMC > 35"), ("age_over_50", "Idade > 50")),
+    (("neck_circ_over_40cm", "Circunf. pescoço > 40cm"), ("male", "Masculino")),
+)
+
+# Avisos dos sinais vitais: ((campo, mínimo, máximo), ...), tipo de alerta, mensagem.
+# O aviso aparece se qualquer campo do grupo sair da faixa.
+VITAL_ALERTS = (
+    ((("pa_sistolica", 90, 180), ("pa_diastolica", 50, 120)), "warning", "PA fora de faixas usuais; reavaliar antes do procedimento."),
+    ((("fc", 40, 120),), "warning", "Frequência cardíaca incomum; considerar avaliação adicional."),
+    ((("spo2_ar_ambiente", 92.0, 100.0),), "info", "SpO₂ < 92%: considerar oxigenação e investigação de causa."),
+)
+
+# Paciente inicial de cada sessão; copiado (deepcopy) uma única vez por sessão, nunca alterado
+_DEFAULT_PATIENT = {
+    "demographics": {
+        "nome": "",
+        "idade": 60,
+        "sexo": "Feminino",
+        "peso_kg": 70.0,
+        "altura_cm": 170.0,
+        "imc": 24.22,
+        "asa": "II",
+        "asa_emergencia": False,
+    },
+    "comorbidities": {
+        # Cardiovasculares
+        "hipertensao": False,
+        "doenca_cardiaca_isquemica": False,
+        "insuficiencia_cardiaca": False,
+        "arritmias": False,
+        "doenca_cerebrovascular": False,
+        # Endocrino-metabólicas
+        "diabetes_tipo_1": False,
+        "diabetes_tipo_2": False,
+        "uso_insulina": False,
+        "dislipidemia": False,
+        "obesidade": False,
+        # Pulmonares
+        "dpoc": False,
+        "asma": False,
+        "infeccao_respiratoria_mes": False,
+        "pneumopatia_restritiva": False,
+        # Renais
+        "insuficiencia_renal_cronica": False,
+        "uso_diureticos": False,
+        "uso_ieca_bra": False,
+        # Neurológicas
+        "demencia": False,
+        "comprometimento_cognitivo": False,
+        "deficits_sensoriais": False,
+    },
+    "medications": {
+        "list_text": "",
+        "classes": {
+            "sedativos_benzos": False,
+            "opioides": False,
+            "anticoagulantes": False,
+            "antidiabeticos_orais": False,
+            "insulina": False,
+        },
+    },
+    "labs": {
+        "hemoglobina": 0.0,
+        "hematocrito": 0.0,
+        "creatinina": 0.0,
+        "ureia": 0.0,
+        "albumina": 0.0,
+        "plaquetas": 0.0,
+        "glicemia_jejum": 0.0,
+        "ph": 7.4,
+        "hco3": 24.0,
+    },
+    "surgical": {
+        "tipo_cirurgia": "",
+        "porte": "Médio",
+        "urgencia": "Eletiva",
+        "duracao_prevista_h": 2.0,
+        "duracao_cat": "2-3h",
+        "anestesia_planejada": "Geral",
+        "incisao_site": "Outras",
+    },
+    "functional": {
+        "mets": 4.0,
+        "sobe_escadas": "Sim",
+        "avd": [],
+        "exercicio": "Sedentário",
+        "nsqip_status": "Independente",
+        "sobe_escadas_sem_parar": "Sim",
+        "avd_independencia": "Independente",
+    },
+    "physical_exam": {
+        # Sinais vitais pré-operatórios
+        "spo2_ar_ambiente": 98.0,
+        "pa_sistolica": 120,
+        "pa_diastolica": 80,
+        "fc": 75,
+        # Exame físico adicional
+        "ausculta_cardiaca": "Normal",
+        "achados_cardiacos": "",
+        "ausculta_pulmonar": "Normal",
+        "achados_pulmonares": "",
+        "edemas": False,
+        "ingurgitamento_jugular": False,
+    },
+}
+
+# Faixas dos indicadores (gauges) por sistema
+# Normalizações usadas nas visualizações: ASA -> risco aproximado (%), subtipo cardíaco e
+# porte -> argumentos do akics_score
+ASA_RISK_PCT = MappingProxyType({"I": 5.0, "II": 10.0, "III": 25.0, "IV": 50.0, "V": 75.0, "VI": 90.0})
+AKICS_TIPO_ARG = MappingProxyType({"Coronariana": "coronariana", "Valvar": "valvar", "Combinada": "combinada"})
+AKICS_COMPLEXIDADE = MappingProxyType({"Pequeno": "baixa", "Médio": "media", "Grande": "alta", "Especial": "alta"})
+# Cor das barras por faixa de risco (%): <10 verde, 10–35 amarelo, >=35 vermelho
+RISK_COLOR_CUTOFFS = (10.0, 35.0)
+RISK_COLORS = ("#16a34a", "#f59e0b", "#dc2626")
+# Navegação e escolhas fixas fora dos formulários
+SECTION_OPTIONS = ("Dados do Paciente", "Cálculo de Riscos", "Relatório")
+RISK_TAB_OPTIONS = ("RCRI", "ARISCAT", "STOP-Bang")
+RISK_FILTER_OPTIONS = ("Todos", "Baixo", "Intermediário", "Alto", "Muito baixo", "Muito alto")
+_GAUGE_SPEC = {
+    "axis": {"range": [0, 100]},
+    "steps": [{"range": [0, 10], "color": "#dcfce7"}, {"range": [10, 35], "color": "#fef9c3"}, {"range": [35, 100], "color": "#fee2e2"}],
+}
 
 # --------- Config & Session ---------
-config = load_config()
+@st.cache_resource
+def _get_config():
+    # Lido uma vez por processo do servidor, não a cada rerun
+    return load_config()
+
+
+config = _get_config()
+
+
+# Escores das calculadoras memoizados pelos fatores: reruns com as mesmas
+# marcações viram consulta ao cache em vez de recálculo
+@st.cache_data(max_entries=256)
+def _rcri(**factors: bool):
+    from src.risk_scores import calculate_rcri
+
+    return calculate_rcri(**factors)
+
+
+@st.cache_data(max_entries=256)
+def _ariscat(**factors: bool):
+    from src.risk_scores import calculate_ariscat
+
+    return calculate_ariscat(**factors)
+
+
+@st.cache_data(max_entries=256)
+def _stopbang(**answers: bool):
+    from src.risk_scores import calculate_stopbang
+
+    return calculate_stopbang(**answers)
+
+
+# Escores completos (src.scores) com resultado em dict simples, memoizados pelos argumentos.
+# classify_asa, rcri_score e ariscat_score já são tabelados/lru_cache em src.scores.
+@st.cache_data(max_entries=64, show_spinner=False)
+def _nsqip(**inputs: Any):
+    from src.scores import nsqip_proxy
+
+    return nsqip_proxy(**inputs)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _akics(**inputs: Any):
+    from src.scores import akics_score
+
+    return akics_score(**inputs)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _pre_deliric(**inputs: Any):
+    from src.scores import pre_deliric_score
+
+    return pre_deliric_score(**inputs)
+
+
+def _build_pdf_bytes(sections: Dict[str, Any]) -> bytes:
+    # Importado só ao gerar o PDF: evita carregar o reportlab na inicialização do app
+    from src.reporting import build_pdf_report
+
+    buf = io.BytesIO()
+    build_pdf_report(output_path=buf, **sections)
+    return buf.getvalue()
+
+
+# PDF memoizado pelo conteúdo das seções (em JSON): gerar de novo o mesmo relatório reusa os
+# bytes. functools em vez de st.cache_data, pois roda na thread do pool, sem contexto do script
+@lru_cache(maxsize=16)
+def _pdf_bytes_for(sections_json: str) -> bytes:
+    return _build_pdf_bytes(json.loads(sections_json))
+
+
+def _figure(spec: Dict[str, Any]) -> go.Figure:
+    # Specs em dict montadas aqui, de esquema conhecido: pula a validação do plotly na
+    # construção (o st.plotly_chart não revalida um go.Figure)
+    import plotly.graph_objects as go
+
+    return go.Figure(spec, _validate=False)
+
+
+# Figuras montadas uma vez por conjunto de valores (arredondados a 0,1 pelos chamadores).
+# O st.plotly_chart só serializa o go.Figure, sem alterá-lo: o objeto pode ser compartilhado.
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _radar_figure(values: tuple) -> go.Figure:
+    categories = ["Mortalidade (NSQIP)", "Cardíaco (RCRI)", "Pulmonar (ARISCAT)", "Renal (AKICS)", "Delirium (PRE-DELIRIC)", "Geral (ASA)"]
+    return _figure({
+        "data": [{"type": "scatterpolar", "r": list(values), "theta": categories, "fill": "toself", "name": "Riscos (%)"}],
+        "layout": {"polar": {"radialaxis": {"visible": True, "range": [0, 100]}}, "showlegend": False},
+    })
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _bars_figure(values: tuple, labels: tuple, colors: tuple) -> go.Figure:
+    names = ["NSQIP Mort.", "RCRI", "ARISCAT", "AKICS", "PRE-DELIRIC"]
+    return _figure({
+        "data": [{"type": "bar", "x": names, "y": list(values), "text": list(labels), "marker": {"color": list(colors)}, "textposition": "outside"}],
+        "layout": {"yaxis": {"title": {"text": "%"}, "range": [0, max(40, max(list(values) + [10]) * 1.2)]}},
+    })
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _gauges_figure(values: tuple) -> go.Figure:
+    # Um indicador por sistema, lado a lado (um domínio horizontal para cada)
+    titles = ("Cardio %", "Pulmonar %", "Renal %", "Delirium %")
+    step = 1.0 / len(titles)
+    return _figure({
+        "data": [
+            {"type": "indicator", "mode": "gauge+number", "value": value, "title": {"text": title}, "gauge": _GAUGE_SPEC,
+             "domain": {"x": [i * step + 0.02, (i + 1) * step - 0.02], "y": [0, 1]}}
+            for i, (value, title) in enumerate(zip(values, titles))
+        ],
+        "layout": {"height": 260, "margin": {"l": 20, "r": 20, "t": 40, "b": 10}},
+    })
+
+
+@st.cache_resource
+def _pdf_pool() -> ThreadPoolExecutor:
+    # Compartilhado entre sessões: a geração do PDF não bloqueia o rerun de quem pediu
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf")
+
+
+def _render_pdf_job(output_path: Path, sections_json: str) -> bytes:
+    # Roda no pool, fora da thread do script (nenhuma chamada st.* aqui): gera os bytes e
+    # grava a cópia em reports_dir
+    pdf_bytes = _pdf_bytes_for(sections_json)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(pdf_bytes)
+    return pdf_bytes
+
+
+@st.fragment(run_every=1)
+def _poll_pdf_job() -> None:
+    # Só este trecho reexecuta enquanto o PDF é gerado; ao terminar, um rerun completo exibe o
+    # download ou o erro
+    future, file_name, output_path = st.session_state["pdf_job"]
+    if not future.done():
+        st.info("Gerando PDF...")
+        return
+    del st.session_state["pdf_job"]
+    try:
+        st.session_state["pdf_ready"] = (future.result(), file_name, output_path)
+    except Exception as exc:
+        logger.error("Falha ao gerar o PDF %s: %s", output_path, exc, exc_info=exc)
+        st.session_state["pdf_ready"] = None
+        st.session_state["pdf_error"] = str(exc) or type(exc).__name__
+    st.rerun()
+
 
 if "patient" not in st.session_state:
-    st.session_state["patient"] = {
-        "demographics": {
-            "nome": "",
-            "idade": 60,
-            "sexo": "Feminino",
-            "peso_kg": 70.0,
-            "altura_cm": 170.0,
-            "imc": 24.22,
-            "asa": "II",
-            "asa_emergencia": False,
-        },
-        "comorbidities": {
-            # Cardiovasculares
-            "hipertensao": False,
-            "doenca_cardiaca_isquemica": False,
-            "insuficiencia_cardiaca": False,
-            "arritmias": False,
-            "doenca_cerebrovascular": False,
-            # Endocrino-metabólicas
-            "diabetes_tipo_1": False,
-            "diabetes_tipo_2": False,
-            "uso_insulina": False,
-            "dislipidemia": False,
-            "obesidade": False,
-            # Pulmonares
-            "dpoc": False,
-            "asma": False,
-            "infeccao_respiratoria_mes": False,
-            "pneumopatia_restritiva": False,
-            # Renais
-            "insuficiencia_renal_cronica": False,
-            "uso_diureticos": False,
-            "uso_ieca_bra": False,
-            # Neurológicas
-            "demencia": False,
-            "comprometimento_cognitivo": False,
-            "deficits_sensoriais": False,
-        },
-        "medications": {
-            "list_text": "",
-            "classes": {
-                "sedativos_benzos": False,
-                "opioides": False,
-                "anticoagulantes": False,
-                "antidiabeticos_orais": False,
-                "insulina": False,
-            },
-        },
-        "labs": {
-            "hemoglobina": 0.0,
-            "hematocrito": 0.0,
-            "creatinina": 0.0,
-            "ureia": 0.0,
-            "albumina": 0.0,
-            "plaquetas": 0.0,
-            "glicemia_jejum": 0.0,
-            "ph": 7.4,
-            "hco3": 24.0,
-        },
-        "surgical": {
-            "tipo_cirurgia": "",
-            "porte": "Médio",
-            "urgencia": "Eletiva",
-            "duracao_prevista_h": 2.0,
-            "anestesia_planejada": "Geral",
-        },
-        "functional": {
-            "mets": 4.0,
-            "sobe_escadas": "Sim",
-            "avd": [],
-            "exercicio": "Sedentário",
-        },
-        "physical_exam": {
-            # Sinais vitais pré-operatórios
-            "spo2_ar_ambiente": 98.0,
-            "pa_sistolica": 120,
-            "pa_diastolica": 80,
-            "fc": 75,
-            # Exame físico adicional
-            "ausculta_cardiaca": "Normal",
-            "achados_cardiacos": "",
-            "ausculta_pulmonar": "Normal",
-            "achados_pulmonares": "",
-            "edemas": False,
-            "ingurgitamento_jugular": False,
-        },
-    }
-if "results" not in st.session_state:
-    st.session_state["results"] = {}
-if "ai_summary" not in st.session_state:
-    st.session_state["ai_summary"] = None
+    st.session_state["patient"] = copy.deepcopy(_DEFAULT_PATIENT)
+st.session_state.setdefault("results", {})
+st.session_state.setdefault("ai_summary", None)
 
 # Disclaimer gate (top-level)
-if "disclaimer_ok" not in st.session_state:
-    st.session_state["disclaimer_ok"] = False
+st.session_state.setdefault("disclaimer_ok", False)
 
 if not st.session_state["disclaimer_ok"]:
     st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -201,9 +540,8 @@ Perioperatório como Ferramenta Auxiliar à Avaliação Pré-Anestésica". Ela f
 
 Clique no botão abaixo para confirmar que leu e entendeu este aviso.
 """)
-    if st.button("Entendi", type="primary"):
-        st.session_state["disclaimer_ok"] = True
-        st.rerun()
+    # O callback roda antes do script: o próprio rerun do clique já abre o app, sem st.rerun()
+    st.button("Entendi", type="primary", on_click=st.session_state.__setitem__, args=("disclaimer_ok", True))
     st.markdown("</div>", unsafe_allow_html=True)
     st.stop()
 
@@ -211,534 +549,510 @@ if st.session_state.get("disclaimer_ok", False):
     # --------- Header ---------
     col_logo, col_title = st.columns([1, 6])
     with col_logo:
-        logo_path = Path("assets") / "logo.png"
-        if logo_path.exists():
-            st.image(str(logo_path), use_column_width=True)
+        logo = _logo_bytes()
+        if logo:
+            st.image(logo, use_column_width=True)
         else:
             st.markdown("<div style='height:48px'></div>", unsafe_allow_html=True)
     with col_title:
-        st.markdown(
-            f"""
-            <div class="app-header">
-                <div>
-                    <h1>{config.app_name}</h1>
-                    <p class="subtitle">Estratificação de risco perioperatório com escores validados e apoio de IA</p>
-                </div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(_header_html(config.app_name), unsafe_allow_html=True)
 
     # --------- Sidebar (Navegação e Config) ---------
     with st.sidebar:
         st.subheader("Navegação")
         section = st.radio(
             "Seções",
-            options=["Dados do Paciente", "Cálculo de Riscos", "Relatório"],
+            options=SECTION_OPTIONS,
             index=0,
         )
 
         st.markdown("---")
         st.caption("Relatórios são salvos automaticamente.")
 
+        # O PDF é acompanhado em qualquer seção: uma falha aparece mesmo fora do Relatório
+        if "pdf_job" in st.session_state:
+            _poll_pdf_job()
+        if st.session_state.get("pdf_error") and section != "Relatório":
+            st.error(f"Falha ao gerar o PDF: {st.session_state['pdf_error']}")
+
     # --------- Helpers ---------
+    def _apply_keyed_fields() -> None:
+        """Ao enviar o formulário: copia demografia, comorbidades, medicações e exames (widgets
+        com ``key``, cujo valor o Streamlit mantém) para o dict do paciente."""
+        patient = st.session_state["patient"]
+        demo = patient["demographics"]
+        for key in ("nome", "idade", "sexo", "asa", "asa_emergencia"):
+            demo[key] = st.session_state[f"demo_{key}"]
+        patient["medications"]["list_text"] = st.session_state["meds_list_text"]
+        com = patient["comorbidities"]
+        for _, columns in COMORBIDITY_GROUPS:
+            for items in columns:
+                for key, _, _ in items:
+                    com[key] = st.session_state[f"com_{key}"]
+        mclasses = patient["medications"]["classes"]
+        for key, _ in MED_CLASSES:
+            mclasses[key] = st.session_state[f"med_{key}"]
+        labs = patient["labs"]
+        for fields in LAB_FIELDS:
+            for key, *_ in fields:
+                labs[key] = st.session_state[f"lab_{key}"]
+        _recompute_imc()
+
+    def _apply_clinical_fields() -> None:
+        """Ao enviar o formulário clínico: copia avaliação funcional, dados dos escores e sinais
+        vitais para o dict do paciente e para ``scores_specific``."""
+        patient = st.session_state["patient"]
+        func = patient["functional"]
+        for key in ("nsqip_status", "sobe_escadas_sem_parar", "avd_independencia"):
+            func[key] = st.session_state[f"func_{key}"]
+        exam = patient["physical_exam"]
+        for key in ("spo2_ar_ambiente", "pa_sistolica", "pa_diastolica", "fc"):
+            exam[key] = st.session_state[f"exam_{key}"]
+        spec = st.session_state.setdefault("scores_specific", {})
+        pre = spec.setdefault("pre_deliric", {})
+        for key in ("apache_ii", "coma", "infeccao_ativa", "grupo_admissao"):
+            pre[key] = st.session_state[f"pd_{key}"]
+        # Os campos do AKICS só existem quando a cirurgia é cardíaca
+        if "akics_tipo_cardiaco" in st.session_state:
+            akics = spec.setdefault("akics", {})
+            for key in ("tipo_cardiaco", "funcao_ventricular"):
+                akics[key] = st.session_state[f"akics_{key}"]
+
+    def _recompute_imc() -> None:
+        # IMC só muda quando peso/altura são enviados; os reruns apenas leem o valor salvo
+        demo = st.session_state["patient"]["demographics"]
+        demo["peso_kg"] = st.session_state["demo_peso_kg"]
+        demo["altura_cm"] = st.session_state["demo_altura_cm"]
+        demo["imc"] = round(demo["peso_kg"] / max(demo["altura_cm"] / 100.0, 0.5) ** 2, 2)
+
+    def _score_pair(result: Any) -> tuple:
+        # (pontuação, categoria) de um ScoreResult, ou (None, None) se o escore não foi calculado
+        return (None, None) if result is None else (result.score, result.risk_category)
+
+    def _factor_checkboxes(prefix: str, columns: tuple, prev: Dict[str, Any]) -> Dict[str, bool]:
+        # Checkboxes com key "<prefixo>_<fator>"; ao voltar ao escore (o estado dos widgets não
+        # exibidos é descartado), a marcação é restaurada do último resultado salvo
+        factors = {}
+        for col, fields in zip(st.columns(len(columns)), columns):
+            with col:
+                for key, label in fields:
+                    st.session_state.setdefault(f"{prefix}_{key}", bool(prev.get(key)))
+                    factors[key] = st.checkbox(label, key=f"{prefix}_{key}")
+        return factors
+
+    # Um fragmento por escore: marcar um fator reexecuta só o bloco dele
+    @st.fragment
+    def _rcri_tab() -> None:
+        results = st.session_state["results"]
+        rcri_result = _rcri(**_factor_checkboxes("rcri", RCRI_FIELDS, results["rcri"].details if "rcri" in results else {}))
+        results["rcri"] = rcri_result
+        st.success(f"RCRI: {rcri_result.score} (Risco {rcri_result.risk_category})")
+
+    @st.fragment
+    def _ariscat_tab() -> None:
+        results = st.session_state["results"]
+        ariscat_score, ariscat_risk, ariscat_details = _ariscat(
+            **_factor_checkboxes("ariscat", ARISCAT_FIELDS, results["ariscat"]["details"] if "ariscat" in results else {})
+        )
+        results["ariscat"] = {
+            "score": ariscat_score,
+            "risk": ariscat_risk,
+            "details": ariscat_details,
+        }
+        st.success(f"ARISCAT: {ariscat_score} (Risco {ariscat_risk})")
+
+    @st.fragment
+    def _stopbang_tab() -> None:
+        results = st.session_state["results"]
+        stopbang_result = _stopbang(
+            **_factor_checkboxes("stopbang", STOPBANG_FIELDS, results["stopbang"].details if "stopbang" in results else {})
+        )
+        results["stopbang"] = stopbang_result
+        st.success(f"STOP-Bang: {stopbang_result.score} (Risco {stopbang_result.risk_category})")
+
+    # Cada seção é um fragmento: widgets dela reexecutam só a seção, não o header/sidebar
+    @st.fragment
     def _show_patient_form() -> None:
+        # Referências locais aos sub-dicts do paciente (as escritas vão direto ao session_state)
+        patient = st.session_state["patient"]
+        demo = patient["demographics"]
+        com = patient["comorbidities"]
+        meds = patient["medications"]
+        mclasses = meds["classes"]
+        labs = patient["labs"]
+        surg = patient["surgical"]
+        func = patient["functional"]
+        exam = patient["physical_exam"]
         with st.container():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.subheader("Dados do Paciente")
 
-            # DADOS DEMOGRÁFICOS
-            st.markdown("**DADOS DEMOGRÁFICOS**")
-            d1, d2, d3, d4, d5 = st.columns([2, 1, 1, 1, 1])
-            with d1:
-                st.session_state["patient"]["demographics"]["nome"] = st.text_input(
-                    "Nome",
-                    st.session_state["patient"]["demographics"].get("nome", ""),
-                    help="Nome completo do paciente",
-                )
-            with d2:
-                st.session_state["patient"]["demographics"]["idade"] = st.number_input(
-                    "Idade",
-                    min_value=0,
-                    max_value=120,
-                    value=int(st.session_state["patient"]["demographics"].get("idade", 60)),
-                    help="Idade em anos",
-                )
-            with d3:
-                st.session_state["patient"]["demographics"]["sexo"] = st.selectbox(
-                    "Sexo",
-                    ["Feminino", "Masculino"],
-                    index=0 if st.session_state["patient"]["demographics"].get("sexo") == "Feminino" else 1,
-                    help="Sexo biológico",
-                )
-            with d4:
-                # ASA I-VI
-                st.session_state["patient"]["demographics"]["asa"] = st.radio(
-                    "ASA Physical Status",
-                    options=["I", "II", "III", "IV", "V", "VI"],
-                    index=["I", "II", "III", "IV", "V", "VI"].index(st.session_state["patient"]["demographics"].get("asa", "II")),
-                    help="Classificação ASA (I a VI)",
-                )
-            with d5:
-                st.session_state["patient"]["demographics"]["asa_emergencia"] = st.checkbox(
-                    "Emergência (E)",
-                    value=bool(st.session_state["patient"]["demographics"].get("asa_emergencia", False)),
-                    help="Marque se o procedimento é em caráter de emergência (ASA-E)",
-                )
+            # Demografia, comorbidades, medicações e exames num formulário: os widgets só
+            # disparam um rerun ao enviar, não a cada tecla/clique
+            with st.form("patient_form", clear_on_submit=False):
+                # DADOS DEMOGRÁFICOS
+                st.markdown("**DADOS DEMOGRÁFICOS**")
+                d1, d2, d3, d4, d5 = st.columns([2, 1, 1, 1, 1])
+                with d1:
+                    st.session_state.setdefault("demo_nome", demo["nome"])
+                    st.text_input(
+                        "Nome",
+                        help="Nome completo do paciente",
+                        key="demo_nome",
+                    )
+                with d2:
+                    st.session_state.setdefault("demo_idade", demo["idade"])
+                    st.number_input(
+                        "Idade",
+                        min_value=0,
+                        max_value=120,
+                        help="Idade em anos",
+                        key="demo_idade",
+                    )
+                with d3:
+                    st.session_state.setdefault("demo_sexo", demo["sexo"] if demo["sexo"] in SEXO_OPTIONS else SEXO_OPTIONS[1])
+                    st.selectbox(
+                        "Sexo",
+                        SEXO_OPTIONS,
+                        help="Sexo biológico",
+                        key="demo_sexo",
+                    )
+                with d4:
+                    # ASA I-VI
+                    st.session_state.setdefault("demo_asa", ASA_OPTIONS[ASA_INDEX.get(demo["asa"], 1)])
+                    st.radio(
+                        "ASA Physical Status",
+                        options=ASA_OPTIONS,
+                        help="Classificação ASA (I a VI)",
+                        key="demo_asa",
+                    )
+                with d5:
+                    st.session_state.setdefault("demo_asa_emergencia", bool(demo["asa_emergencia"]))
+                    st.checkbox(
+                        "Emergência (E)",
+                        help="Marque se o procedimento é em caráter de emergência (ASA-E)",
+                        key="demo_asa_emergencia",
+                    )
 
-            d6, d7, d8 = st.columns(3)
-            with d6:
-                peso = st.number_input(
-                    "Peso (kg)",
-                    min_value=20.0,
-                    max_value=300.0,
-                    value=float(st.session_state["patient"]["demographics"].get("peso_kg", 70.0)),
-                    step=0.1,
-                    help="Peso corporal em quilogramas",
-                )
-                st.session_state["patient"]["demographics"]["peso_kg"] = peso
-            with d7:
-                altura_cm = st.number_input(
-                    "Altura (cm)",
-                    min_value=100.0,
-                    max_value=250.0,
-                    value=float(st.session_state["patient"]["demographics"].get("altura_cm", 170.0)),
-                    step=0.1,
-                    help="Altura em centímetros",
+                d6, d7, d8 = st.columns(3)
+                with d6:
+                    st.session_state.setdefault("demo_peso_kg", demo["peso_kg"])
+                    st.number_input(
+                        "Peso (kg)",
+                        min_value=20.0,
+                        max_value=300.0,
+                        step=0.1,
+                        help="Peso corporal em quilogramas",
+                        key="demo_peso_kg",
+                    )
+                with d7:
+                    st.session_state.setdefault("demo_altura_cm", demo["altura_cm"])
+                    st.number_input(
+                        "Altura (cm)",
+                        min_value=100.0,
+                        max_value=250.0,
+                        step=0.1,
+                        help="Altura em centímetros",
+                        key="demo_altura_cm",
+                    )
+                with d8:
+                    # Recalculado em _recompute_imc, no envio do formulário
+                    imc = demo["imc"]
+                    st.metric("IMC", imc)
+
+                # Validations
+                if demo["idade"] > 110:
+                    st.warning("Idade acima do esperado; verifique o valor informado.")
+                if imc < 16 or imc > 50:
+                    st.info("IMC fora da faixa usual; considerar avaliação nutricional.")
+
+                st.markdown("---")
+                # COMORBIDADES (por sistema)
+                st.markdown("**COMORBIDADES**")
+
+                for caption, columns in COMORBIDITY_GROUPS:
+                    st.caption(caption)
+                    for col, items in zip(st.columns(3), columns):
+                        with col:
+                            for key, label, help_text in items:
+                                st.session_state.setdefault(f"com_{key}", com[key])
+                                st.checkbox(label, help=help_text, key=f"com_{key}")
+
+                st.markdown("---")
+                # MEDICAÇÕES EM USO
+                st.markdown("**MEDICAÇÕES EM USO**")
+                st.session_state.setdefault("meds_list_text", meds["list_text"])
+                st.text_area(
+                    "Liste as medicações em uso (nome e dose)",
+                    key="meds_list_text",
+                    placeholder="Ex.: AAS 100 mg/dia; Losartana 50 mg 12/12h; Metformina 850 mg 8/8h",
+                    help="Descreva os fármacos relevantes, incluindo dose e frequência",
                 )
-                st.session_state["patient"]["demographics"]["altura_cm"] = altura_cm
-            with d8:
-                altura_m = max(altura_cm / 100.0, 0.5)
-                imc = round(peso / (altura_m ** 2), 2)
-                st.session_state["patient"]["demographics"]["imc"] = imc
-                st.metric("IMC", imc)
-
-            # Validations
-            if st.session_state["patient"]["demographics"]["idade"] > 110:
-                st.warning("Idade acima do esperado; verifique o valor informado.")
-            if imc < 16 or imc > 50:
-                st.info("IMC fora da faixa usual; considerar avaliação nutricional.")
-
-            st.markdown("---")
-            # COMORBIDADES (por sistema)
-            st.markdown("**COMORBIDADES**")
-
-            st.caption("Cardiovasculares")
-            cv1, cv2, cv3 = st.columns(3)
-            with cv1:
-                st.session_state["patient"]["comorbidities"]["hipertensao"] = st.checkbox("Hipertensão arterial", value=st.session_state["patient"]["comorbidities"]["hipertensao"], help="HAS diagnosticada")
-                st.session_state["patient"]["comorbidities"]["doenca_cardiaca_isquemica"] = st.checkbox("Doença cardíaca isquêmica", value=st.session_state["patient"]["comorbidities"]["doenca_cardiaca_isquemica"], help="DAC/IAM/angina")
-            with cv2:
-                st.session_state["patient"]["comorbidities"]["insuficiencia_cardiaca"] = st.checkbox("Insuficiência cardíaca congestiva", value=st.session_state["patient"]["comorbidities"]["insuficiencia_cardiaca"], help="IC com FE reduzida/preservada")
-                st.session_state["patient"]["comorbidities"]["arritmias"] = st.checkbox("Arritmias", value=st.session_state["patient"]["comorbidities"]["arritmias"], help="FA/flutter, etc.")
-            with cv3:
-                st.session_state["patient"]["comorbidities"]["doenca_cerebrovascular"] = st.checkbox("Doença cerebrovascular (AVC/AIT)", value=st.session_state["patient"]["comorbidities"]["doenca_cerebrovascular"], help="AVC/AIT prévio")
-
-            st.caption("Endócrino-metabólicas")
-            en1, en2, en3 = st.columns(3)
-            with en1:
-                st.session_state["patient"]["comorbidities"]["diabetes_tipo_1"] = st.checkbox("DM tipo 1", value=st.session_state["patient"]["comorbidities"]["diabetes_tipo_1"])
-                st.session_state["patient"]["comorbidities"]["diabetes_tipo_2"] = st.checkbox("DM tipo 2", value=st.session_state["patient"]["comorbidities"]["diabetes_tipo_2"])
-            with en2:
-                st.session_state["patient"]["comorbidities"]["uso_insulina"] = st.checkbox("Uso de insulina", value=st.session_state["patient"]["comorbidities"]["uso_insulina"])
-                st.session_state["patient"]["comorbidities"]["dislipidemia"] = st.checkbox("Dislipidemia", value=st.session_state["patient"]["comorbidities"]["dislipidemia"])
-            with en3:
-                st.session_state["patient"]["comorbidities"]["obesidade"] = st.checkbox("Obesidade", value=st.session_state["patient"]["comorbidities"]["obesidade"], help="IMC ≥ 30")
-
-            st.caption("Pulmonares")
-            pu1, pu2, pu3 = st.columns(3)
-            with pu1:
-                st.session_state["patient"]["comorbidities"]["dpoc"] = st.checkbox("DPOC", value=st.session_state["patient"]["comorbidities"]["dpoc"])
-                st.session_state["patient"]["comorbidities"]["asma"] = st.checkbox("Asma brônquica", value=st.session_state["patient"]["comorbidities"]["asma"])
-            with pu2:
-                st.session_state["patient"]["comorbidities"]["infeccao_respiratoria_mes"] = st.checkbox("Infecção respiratória (< 1 mês)", value=st.session_state["patient"]["comorbidities"]["infeccao_respiratoria_mes"], help="Vias aéreas inferiores/superiores")
-            with pu3:
-                st.session_state["patient"]["comorbidities"]["pneumopatia_restritiva"] = st.checkbox("Pneumopatias restritivas", value=st.session_state["patient"]["comorbidities"]["pneumopatia_restritiva"])
-
-            st.caption("Renais")
-            re1, re2, re3 = st.columns(3)
-            with re1:
-                st.session_state["patient"]["comorbidities"]["insuficiencia_renal_cronica"] = st.checkbox("Insuficiência renal crônica", value=st.session_state["patient"]["comorbidities"]["insuficiencia_renal_cronica"])
-            with re2:
-                st.session_state["patient"]["comorbidities"]["uso_diureticos"] = st.checkbox("Uso de diuréticos", value=st.session_state["patient"]["comorbidities"]["uso_diureticos"])
-            with re3:
-                st.session_state["patient"]["comorbidities"]["uso_ieca_bra"] = st.checkbox("Uso de IECA/BRA", value=st.session_state["patient"]["comorbidities"]["uso_ieca_bra"])
-
-            st.caption("Neurológicas")
-            ne1, ne2, ne3 = st.columns(3)
-            with ne1:
-                st.session_state["patient"]["comorbidities"]["demencia"] = st.checkbox("Demência", value=st.session_state["patient"]["comorbidities"]["demencia"])
-            with ne2:
-                st.session_state["patient"]["comorbidities"]["comprometimento_cognitivo"] = st.checkbox("Comprometimento cognitivo", value=st.session_state["patient"]["comorbidities"]["comprometimento_cognitivo"])
-            with ne3:
-                st.session_state["patient"]["comorbidities"]["deficits_sensoriais"] = st.checkbox("Déficits sensoriais (visual/auditivo)", value=st.session_state["patient"]["comorbidities"]["deficits_sensoriais"])
-
-            st.markdown("---")
-            # MEDICAÇÕES EM USO
-            st.markdown("**MEDICAÇÕES EM USO**")
-            st.session_state["patient"]["medications"]["list_text"] = st.text_area(
-                "Liste as medicações em uso (nome e dose)",
-                value=st.session_state["patient"]["medications"].get("list_text", ""),
-                placeholder="Ex.: AAS 100 mg/dia; Losartana 50 mg 12/12h; Metformina 850 mg 8/8h",
-                help="Descreva os fármacos relevantes, incluindo dose e frequência",
-            )
-            m1, m2, m3, m4 = st.columns(4)
-            with m1:
-                st.session_state["patient"]["medications"]["classes"]["sedativos_benzos"] = st.checkbox("Sedativos/Benzos", value=st.session_state["patient"]["medications"]["classes"]["sedativos_benzos"])
-            with m2:
-                st.session_state["patient"]["medications"]["classes"]["opioides"] = st.checkbox("Morfina/Opioides", value=st.session_state["patient"]["medications"]["classes"]["opioides"])
-            with m3:
-                st.session_state["patient"]["medications"]["classes"]["anticoagulantes"] = st.checkbox("Anticoagulantes", value=st.session_state["patient"]["medications"]["classes"]["anticoagulantes"])
-            with m4:
-                st.session_state["patient"]["medications"]["classes"]["antidiabeticos_orais"] = st.checkbox("Antidiabéticos orais", value=st.session_state["patient"]["medications"]["classes"]["antidiabeticos_orais"])
-            st.session_state["patient"]["medications"]["classes"]["insulina"] = st.checkbox("Insulina", value=st.session_state["patient"]["medications"]["classes"]["insulina"])
-
-            st.markdown("---")
-            # EXAMES LABORATORIAIS
-            st.markdown("**EXAMES LABORATORIAIS**")
-            l1, l2, l3 = st.columns(3)
-            with l1:
-                st.session_state["patient"]["labs"]["hemoglobina"] = st.number_input("Hemoglobina (g/dL)", min_value=0.0, max_value=25.0, step=0.1, value=float(st.session_state["patient"]["labs"]["hemoglobina"]))
-                st.session_state["patient"]["labs"]["hematocrito"] = st.number_input("Hematócrito (%)", min_value=0.0, max_value=70.0, step=0.1, value=float(st.session_state["patient"]["labs"]["hematocrito"]))
-                st.session_state["patient"]["labs"]["plaquetas"] = st.number_input("Plaquetas (10³/µL)", min_value=0.0, max_value=1500.0, step=1.0, value=float(st.session_state["patient"]["labs"]["plaquetas"]))
-            with l2:
-                st.session_state["patient"]["labs"]["creatinina"] = st.number_input("Creatinina sérica (mg/dL)", min_value=0.0, max_value=20.0, step=0.1, value=float(st.session_state["patient"]["labs"]["creatinina"]))
-                st.session_state["patient"]["labs"]["ureia"] = st.number_input("Ureia (mg/dL)", min_value=0.0, max_value=300.0, step=1.0, value=float(st.session_state["patient"]["labs"]["ureia"]))
-                st.session_state["patient"]["labs"]["albumina"] = st.number_input("Albumina sérica (g/dL)", min_value=0.0, max_value=10.0, step=0.1, value=float(st.session_state["patient"]["labs"]["albumina"]))
-            with l3:
-                st.session_state["patient"]["labs"]["glicemia_jejum"] = st.number_input("Glicemia de jejum (mg/dL)", min_value=0.0, max_value=1000.0, step=1.0, value=float(st.session_state["patient"]["labs"]["glicemia_jejum"]))
-                st.session_state["patient"]["labs"]["ph"] = st.number_input("Gasometria: pH", min_value=6.8, max_value=7.8, step=0.01, value=float(st.session_state["patient"]["labs"]["ph"]))
-                st.session_state["patient"]["labs"]["hco3"] = st.number_input("Gasometria: HCO₃ (mEq/L)", min_value=0.0, max_value=60.0, step=0.5, value=float(st.session_state["patient"]["labs"]["hco3"]))
-
-            # Real-time lab validations
-            labs = st.session_state["patient"]["labs"]
-            if labs["hemoglobina"] and (labs["hemoglobina"] < 8 or labs["hemoglobina"] > 18):
-                st.warning("Hemoglobina fora da faixa comum (8–18 g/dL).")
-            if labs["creatinina"] and labs["creatinina"] > 1.5:
-                st.info("Creatinina elevada; considerar estratificação renal.")
-            if labs["albumina"] and labs["albumina"] < 3.5:
-                st.info("Albumina baixa; considerar risco nutricional.")
-            if labs["ph"] and labs["hco3"] and (labs["ph"] < 7.35 and labs["hco3"] < 22):
-                st.warning("Padrão compatível com acidose metabólica (pH<7,35 e HCO₃<22).")
+                med_columns = st.columns(4)
+                for key, _ in MED_CLASSES:
+                    st.session_state.setdefault(f"med_{key}", mclasses[key])
+                for col, (key, label) in zip(med_columns, MED_CLASSES):
+                    with col:
+                        st.checkbox(label, key=f"med_{key}")
+                for key, label in MED_CLASSES[len(med_columns):]:
+                    st.checkbox(label, key=f"med_{key}")
+
+                st.markdown("---")
+                # EXAMES LABORATORIAIS
+                st.markdown("**EXAMES LABORATORIAIS**")
+                for col, fields in zip(st.columns(3), LAB_FIELDS):
+                    with col:
+                        for key, label, lo, hi, step in fields:
+                            st.session_state.setdefault(f"lab_{key}", labs[key])
+                            st.number_input(label, min_value=lo, max_value=hi, step=step, key=f"lab_{key}")
+
+                # Real-time lab validations
+                if labs["hemoglobina"] and (labs["hemoglobina"] < 8 or labs["hemoglobina"] > 18):
+                    st.warning("Hemoglobina fora da faixa comum (8–18 g/dL).")
+                if labs["creatinina"] and labs["creatinina"] > 1.5:
+                    st.info("Creatinina elevada; considerar estratificação renal.")
+                if labs["albumina"] and labs["albumina"] < 3.5:
+                    st.info("Albumina baixa; considerar risco nutricional.")
+                if labs["ph"] and labs["hco3"] and (labs["ph"] < 7.35 and labs["hco3"] < 22):
+                    st.warning("Padrão compatível com acidose metabólica (pH<7,35 e HCO₃<22).")
+
+                st.form_submit_button("Aplicar alterações", type="primary", on_click=_apply_keyed_fields)
 
             st.markdown("---")
             # DADOS CIRÚRGICOS
             st.markdown("**DADOS CIRÚRGICOS**")
             cir1, cir2, cir3 = st.columns(3)
-            categorias = [
-                "Cardíaca", "Vascular", "Torácica", "Abdominal", "Ortopédica", "Neurocirurgia", "Urologia", "Ginecologia", "Outras"
-            ]
-            subtipos = {
-                "Cardíaca": ["Coronariana", "Valvar", "Combinada"],
-                "Vascular": ["Suprainguinal", "Infrainguinal"],
-                "Torácica": ["Pulmonar", "Esofágica", "Mediastinal"],
-                "Abdominal": ["Alta (epigástrica)", "Baixa (pélvica)"],
-                "Ortopédica": ["Grande porte", "Pequeno porte"],
-                "Neurocirurgia": ["Craniana", "Espinal"],
-                "Urologia": ["Prostatectomia", "Nefrectomia", "Outras"],
-                "Ginecologia": ["Histerectomia", "Outras"],
-                "Outras": ["Não especificado"],
-            }
             with cir1:
                 cat = st.selectbox(
                     "Tipo de cirurgia",
-                    options=categorias,
-                    index=categorias.index(st.session_state["patient"]["surgical"].get("tipo_cirurgia", "Outras")) if st.session_state["patient"]["surgical"].get("tipo_cirurgia") in categorias else categorias.index("Outras"),
+                    options=SURGERY_CATEGORIES,
+                    index=SURGERY_CATEGORY_INDEX.get(surg["tipo_cirurgia"], 8),
                     help="Especialidade principal do procedimento",
                 )
-                st.session_state["patient"]["surgical"]["tipo_cirurgia"] = cat
-                sub_opts = subtipos.get(cat, ["Não especificado"])
-                st.session_state["patient"]["surgical"]["subtipo"] = st.selectbox(
+                surg["tipo_cirurgia"] = cat
+                sub_opts = SURGERY_SUBTYPES.get(cat, ("Não especificado",))
+                surg["subtipo"] = st.selectbox(
                     "Subtipo",
                     options=sub_opts,
                     index=0,
                     help="Subcategoria relevante para estratificação",
                 )
             with cir2:
-                st.session_state["patient"]["surgical"]["porte"] = st.selectbox(
+                surg["porte"] = st.selectbox(
                     "Porte cirúrgico",
-                    options=["Pequeno", "Médio", "Grande", "Especial"],
-                    index=["Pequeno", "Médio", "Grande", "Especial"].index(st.session_state["patient"]["surgical"].get("porte", "Médio")),
+                    options=PORTE_OPTIONS,
+                    index=PORTE_INDEX.get(surg["porte"], 1),
                     help="Classificação do porte",
                 )
-                st.session_state["patient"]["surgical"]["urgencia"] = st.selectbox(
+                surg["urgencia"] = st.selectbox(
                     "Urgência",
-                    options=["Eletiva", "Urgência", "Emergência"],
-                    index=["Eletiva", "Urgência", "Emergência"].index(st.session_state["patient"]["surgical"].get("urgencia", "Eletiva")),
+                    options=URGENCIA_OPTIONS,
+                    index=URGENCIA_INDEX.get(surg["urgencia"], 0),
                     help="Caráter do procedimento",
                 )
             with cir3:
-                st.session_state["patient"]["surgical"]["duracao_cat"] = st.radio(
+                surg["duracao_cat"] = st.radio(
                     "Duração prevista",
-                    options=["<2h", "2-3h", ">3h"],
-                    index=["<2h", "2-3h", ">3h"].index(st.session_state["patient"]["surgical"].get("duracao_cat", "2-3h")),
+                    options=DURACAO_OPTIONS,
+                    index=DURACAO_INDEX.get(surg["duracao_cat"], 1),
                     help="Estimativa de duração",
                 )
-                st.session_state["patient"]["surgical"]["anestesia_planejada"] = st.selectbox(
+                surg["anestesia_planejada"] = st.selectbox(
                     "Anestesia planejada",
-                    options=["Geral", "Peridural", "Raqui", "Bloqueio periférico", "Sedação", "Mista"],
-                    index=["Geral", "Peridural", "Raqui", "Bloqueio periférico", "Sedação", "Mista"].index(st.session_state["patient"]["surgical"].get("anestesia_planejada", "Geral")),
+                    options=ANESTESIA_OPTIONS,
+                    index=ANESTESIA_INDEX.get(surg["anestesia_planejada"], 0),
                     help="Técnica anestésica prevista",
                 )
             cir4, cir5 = st.columns([2, 1])
             with cir4:
-                st.session_state["patient"]["surgical"]["incisao_site"] = st.selectbox(
+                surg["incisao_site"] = st.selectbox(
                     "Local da incisão (impacta ARISCAT)",
-                    options=["Intratorácica", "Abdome superior", "Abdome inferior", "Outras"],
-                    index=["Intratorácica", "Abdome superior", "Abdome inferior", "Outras"].index(st.session_state["patient"]["surgical"].get("incisao_site", "Outras")),
+                    options=INCISAO_OPTIONS,
+                    index=INCISAO_INDEX.get(surg["incisao_site"], 3),
                     help="Selecione o sítio principal da incisão",
                 )
             with cir5:
                 # Classificação automática de risco cirúrgico
-                porte = st.session_state["patient"]["surgical"]["porte"]
-                incisao = st.session_state["patient"]["surgical"].get("incisao_site", "Outras")
-                subt = st.session_state["patient"]["surgical"].get("subtipo")
-                risk = "Baixo"
-                if porte == "Médio":
-                    risk = "Intermediário"
-                if porte in ("Grande", "Especial"):
-                    risk = "Alto"
+                porte = surg["porte"]
+                incisao = surg["incisao_site"]
+                subt = surg["subtipo"]
+                risk = PORTE_RISK.get(porte, "Baixo")
                 if cat == "Cardíaca" or incisao == "Intratorácica" or (cat == "Vascular" and subt == "Suprainguinal"):
                     risk = "Alto"
-                if cat == "Abdominal" and subt and subt.startswith("Alta") and risk == "Baixo":
+                elif cat == "Abdominal" and subt and subt.startswith("Alta") and risk == "Baixo":
                     risk = "Intermediário"
-                st.session_state["patient"]["surgical"]["risco_cirurgico"] = risk
-                if risk == "Baixo":
-                    st.success("Risco cirúrgico: Baixo (<1% mortalidade)")
-                elif risk == "Intermediário":
-                    st.info("Risco cirúrgico: Intermediário (1–5% mortalidade)")
-                else:
-                    st.warning("Risco cirúrgico: Alto (>5% mortalidade)")
+                surg["risco_cirurgico"] = risk
+                alert, message = RISK_MESSAGES[risk]
+                getattr(st, alert)(message)
 
             st.markdown("---")
-            # AVALIAÇÃO FUNCIONAL
-            st.markdown("**AVALIAÇÃO FUNCIONAL**")
-            f1, f2, f3 = st.columns(3)
-            with f1:
-                st.session_state["patient"]["functional"]["nsqip_status"] = st.radio(
-                    "Status funcional (NSQIP)",
-                    options=["Independente", "Parcialmente dependente", "Totalmente dependente"],
-                    index=["Independente", "Parcialmente dependente", "Totalmente dependente"].index(st.session_state["patient"]["functional"].get("nsqip_status", "Independente")),
-                    help="Capacidade basal para AVDs conforme NSQIP",
-                )
-            with f2:
-                st.session_state["patient"]["functional"]["sobe_escadas_sem_parar"] = st.radio(
-                    "Sobe 2 lances de escada sem parar?",
-                    options=["Sim", "Não"],
-                    index=["Sim", "Não"].index(st.session_state["patient"]["functional"].get("sobe_escadas_sem_parar", "Sim")),
-                    help="Indicador prático de capacidade funcional",
-                )
-            with f3:
-                st.session_state["patient"]["functional"]["avd_independencia"] = st.radio(
-                    "Independência em AVDs",
-                    options=["Independente", "Dependência parcial", "Dependência total"],
-                    index=["Independente", "Dependência parcial", "Dependência total"].index(st.session_state["patient"]["functional"].get("avd_independencia", "Independente")),
-                    help="Grau de independência nas atividades diárias",
-                )
-            # Avisos rápidos
-            if st.session_state["patient"]["functional"]["nsqip_status"] != "Independente":
-                st.info("Status funcional não-independente aumenta risco pós-operatório.")
-            if st.session_state["patient"]["functional"].get("sobe_escadas_sem_parar") == "Não":
-                st.warning("Baixa tolerância ao esforço (escadas).")
+            # Avaliação funcional, dados dos escores e sinais vitais também em lote. Os dados
+            # cirúrgicos ficam fora: as opções de subtipo dependem da categoria escolhida.
+            with st.form("clinical_form", clear_on_submit=False):
+                # AVALIAÇÃO FUNCIONAL
+                st.markdown("**AVALIAÇÃO FUNCIONAL**")
+                f1, f2, f3 = st.columns(3)
+                with f1:
+                    st.session_state.setdefault("func_nsqip_status", NSQIP_STATUS_OPTIONS[NSQIP_STATUS_INDEX.get(func["nsqip_status"], 0)])
+                    st.radio(
+                        "Status funcional (NSQIP)",
+                        options=NSQIP_STATUS_OPTIONS,
+                        help="Capacidade basal para AVDs conforme NSQIP",
+                        key="func_nsqip_status",
+                    )
+                with f2:
+                    st.session_state.setdefault("func_sobe_escadas_sem_parar", ESCADAS_OPTIONS[ESCADAS_INDEX.get(func["sobe_escadas_sem_parar"], 0)])
+                    st.radio(
+                        "Sobe 2 lances de escada sem parar?",
+                        options=ESCADAS_OPTIONS,
+                        help="Indicador prático de capacidade funcional",
+                        key="func_sobe_escadas_sem_parar",
+                    )
+                with f3:
+                    st.session_state.setdefault("func_avd_independencia", AVD_OPTIONS[AVD_INDEX.get(func["avd_independencia"], 0)])
+                    st.radio(
+                        "Independência em AVDs",
+                        options=AVD_OPTIONS,
+                        help="Grau de independência nas atividades diárias",
+                        key="func_avd_independencia",
+                    )
+                # Avisos rápidos
+                if func["nsqip_status"] != "Independente":
+                    st.info("Status funcional não-independente aumenta risco pós-operatório.")
+                if func["sobe_escadas_sem_parar"] == "Não":
+                    st.warning("Baixa tolerância ao esforço (escadas).")
+
+                st.markdown("---")
+                # DADOS ESPECÍFICOS PARA SCORES
+                st.markdown("**DADOS ESPECÍFICOS PARA SCORES**")
+                spec = st.session_state.setdefault("scores_specific", {})
+                akics = spec.get("akics", {})
+                pre = spec.get("pre_deliric", {})
+                if cat == "Cardíaca":
+                    ak1, ak2 = st.columns(2)
+                    with ak1:
+                        st.session_state.setdefault(
+                            "akics_tipo_cardiaco",
+                            AKICS_TIPO_OPTIONS[AKICS_TIPO_INDEX.get(akics.get("tipo_cardiaco"), 0)],
+                        )
+                        st.selectbox(
+                            "AKICS - Tipo (cardíaca)",
+                            options=AKICS_TIPO_OPTIONS,
+                            help="Tipo de cirurgia cardíaca",
+                            key="akics_tipo_cardiaco",
+                        )
+                    with ak2:
+                        st.session_state.setdefault(
+                            "akics_funcao_ventricular",
+                            akics.get("funcao_ventricular", AKICS_FUNCAO_OPTIONS[0]),
+                        )
+                        st.selectbox(
+                            "AKICS - Função ventricular",
+                            options=AKICS_FUNCAO_OPTIONS,
+                            help="Classificação clínica/ecocardiográfica",
+                            key="akics_funcao_ventricular",
+                        )
+                pr1, pr2, pr3, pr4 = st.columns(4)
+                with pr1:
+                    st.session_state.setdefault("pd_apache_ii", pre.get("apache_ii", 0.0))
+                    st.number_input(
+                        "PRE-DELIRIC - APACHE II",
+                        min_value=0.0, max_value=71.0, step=0.5,
+                        help="Informe se disponível",
+                        key="pd_apache_ii",
+                    )
+                with pr2:
+                    st.session_state.setdefault("pd_coma", bool(pre.get("coma", False)))
+                    st.checkbox("PRE-DELIRIC - Coma/não responsivo", key="pd_coma")
+                with pr3:
+                    st.session_state.setdefault("pd_infeccao_ativa", bool(pre.get("infeccao_ativa", False)))
+                    st.checkbox("PRE-DELIRIC - Infecção ativa", key="pd_infeccao_ativa")
+                with pr4:
+                    st.session_state.setdefault(
+                        "pd_grupo_admissao",
+                        PRE_DELIRIC_GRUPO_OPTIONS[PRE_DELIRIC_GRUPO_INDEX.get(pre.get("grupo_admissao"), 1)],
+                    )
+                    st.selectbox(
+                        "PRE-DELIRIC - Grupo de admissão",
+                        options=PRE_DELIRIC_GRUPO_OPTIONS,
+                        key="pd_grupo_admissao",
+                    )
 
-            st.markdown("---")
-            # DADOS ESPECÍFICOS PARA SCORES
-            st.markdown("**DADOS ESPECÍFICOS PARA SCORES**")
-            if cat == "Cardíaca":
-                ak1, ak2 = st.columns(2)
-                with ak1:
-                    st.session_state.setdefault("scores_specific", {})
-                    st.session_state["scores_specific"].setdefault("akics", {})
-                    st.session_state["scores_specific"]["akics"]["tipo_cardiaco"] = st.selectbox(
-                        "AKICS - Tipo (cardíaca)",
-                        options=["Coronariana", "Valvar", "Combinada"],
-                        index=["Coronariana", "Valvar", "Combinada"].index(
-                            st.session_state["scores_specific"]["akics"].get("tipo_cardiaco", "Coronariana")
-                        ),
-                        help="Tipo de cirurgia cardíaca",
+                st.markdown("---")
+                # SINAIS VITAIS PRÉ-OPERATÓRIOS
+                st.markdown("**SINAIS VITAIS PRÉ-OPERATÓRIOS**")
+                v1, v2, v3, v4 = st.columns([1, 1, 1, 1])
+                with v1:
+                    st.session_state.setdefault("exam_spo2_ar_ambiente", exam["spo2_ar_ambiente"])
+                    st.number_input(
+                        "SpO₂ em AA (%)",
+                        min_value=50.0,
+                        max_value=100.0,
+                        step=0.1,
+                        help="Saturação de O₂ em ar ambiente",
+                        key="exam_spo2_ar_ambiente",
                     )
-                with ak2:
-                    st.session_state["scores_specific"]["akics"]["funcao_ventricular"] = st.selectbox(
-                        "AKICS - Função ventricular",
-                        options=["Normal", "Disfunção leve", "Disfunção moderada", "Disfunção grave"],
-                        index=0,
-                        help="Classificação clínica/ecocardiográfica",
+                with v2:
+                    st.session_state.setdefault("exam_pa_sistolica", exam["pa_sistolica"])
+                    st.number_input(
+                        "PA Sistólica (mmHg)",
+                        min_value=50,
+                        max_value=260,
+                        key="exam_pa_sistolica",
+                    )
+                with v3:
+                    st.session_state.setdefault("exam_pa_diastolica", exam["pa_diastolica"])
+                    st.number_input(
+                        "PA Diastólica (mmHg)",
+                        min_value=30,
+                        max_value=160,
+                        key="exam_pa_diastolica",
+                    )
+                with v4:
+                    st.session_state.setdefault("exam_fc", exam["fc"])
+                    st.number_input(
+                        "Frequência Cardíaca (bpm)",
+                        min_value=30,
+                        max_value=220,
+                        key="exam_fc",
                     )
-            pr1, pr2, pr3, pr4 = st.columns(4)
-            with pr1:
-                st.session_state.setdefault("scores_specific", {})
-                st.session_state["scores_specific"].setdefault("pre_deliric", {})
-                st.session_state["scores_specific"]["pre_deliric"]["apache_ii"] = st.number_input(
-                    "PRE-DELIRIC - APACHE II",
-                    min_value=0.0, max_value=71.0, step=0.5,
-                    value=float(st.session_state["scores_specific"]["pre_deliric"].get("apache_ii", 0.0)),
-                    help="Informe se disponível",
-                )
-            with pr2:
-                st.session_state["scores_specific"]["pre_deliric"]["coma"] = st.checkbox(
-                    "PRE-DELIRIC - Coma/não responsivo",
-                    value=bool(st.session_state["scores_specific"]["pre_deliric"].get("coma", False)),
-                )
-            with pr3:
-                st.session_state["scores_specific"]["pre_deliric"]["infeccao_ativa"] = st.checkbox(
-                    "PRE-DELIRIC - Infecção ativa",
-                    value=bool(st.session_state["scores_specific"]["pre_deliric"].get("infeccao_ativa", False)),
-                )
-            with pr4:
-                st.session_state["scores_specific"]["pre_deliric"]["grupo_admissao"] = st.selectbox(
-                    "PRE-DELIRIC - Grupo de admissão",
-                    options=["Clínico", "Cirúrgico", "Trauma", "Neuro"],
-                    index=["Clínico", "Cirúrgico", "Trauma", "Neuro"].index(
-                        st.session_state["scores_specific"]["pre_deliric"].get("grupo_admissao", "Cirúrgico")
-                    ),
-                )
 
-            st.markdown("---")
-            # SINAIS VITAIS PRÉ-OPERATÓRIOS
-            st.markdown("**SINAIS VITAIS PRÉ-OPERATÓRIOS**")
-            v1, v2, v3, v4 = st.columns([1, 1, 1, 1])
-            with v1:
-                st.session_state["patient"]["physical_exam"]["spo2_ar_ambiente"] = st.number_input(
-                    "SpO₂ em AA (%)",
-                    min_value=50.0,
-                    max_value=100.0,
-                    step=0.1,
-                    value=float(st.session_state["patient"]["physical_exam"].get("spo2_ar_ambiente", 98.0)),
-                    help="Saturação de O₂ em ar ambiente",
-                )
-            with v2:
-                st.session_state["patient"]["physical_exam"]["pa_sistolica"] = st.number_input(
-                    "PA Sistólica (mmHg)",
-                    min_value=50,
-                    max_value=260,
-                    value=int(st.session_state["patient"]["physical_exam"].get("pa_sistolica", 120)),
-                )
-            with v3:
-                st.session_state["patient"]["physical_exam"]["pa_diastolica"] = st.number_input(
-                    "PA Diastólica (mmHg)",
-                    min_value=30,
-                    max_value=160,
-                    value=int(st.session_state["patient"]["physical_exam"].get("pa_diastolica", 80)),
-                )
-            with v4:
-                st.session_state["patient"]["physical_exam"]["fc"] = st.number_input(
-                    "Frequência Cardíaca (bpm)",
-                    min_value=30,
-                    max_value=220,
-                    value=int(st.session_state["patient"]["physical_exam"].get("fc", 75)),
+                st.form_submit_button(
+                    "Aplicar alterações", type="primary", key="clinical_submit", on_click=_apply_clinical_fields
                 )
 
             # Vital validations
-            pa = st.session_state["patient"]["physical_exam"]
-            if pa["pa_sistolica"] < 90 or pa["pa_sistolica"] > 180 or pa["pa_diastolica"] < 50 or pa["pa_diastolica"] > 120:
-                st.warning("PA fora de faixas usuais; reavaliar antes do procedimento.")
-            if pa["fc"] < 40 or pa["fc"] > 120:
-                st.warning("Frequência cardíaca incomum; considerar avaliação adicional.")
-            if pa["spo2_ar_ambiente"] < 92:
-                st.info("SpO₂ < 92%: considerar oxigenação e investigação de causa.")
+            for ranges, alert, message in VITAL_ALERTS:
+                if any(not lo <= exam[key] <= hi for key, lo, hi in ranges):
+                    getattr(st, alert)(message)
 
             st.markdown("</div>", unsafe_allow_html=True)
 
 
+    @st.fragment
     def _show_risk_calculators() -> None:
         with st.container():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.subheader("Cálculo de Riscos")
 
-            tabs = st.tabs(["RCRI", "ARISCAT", "STOP-Bang"])
-
-            with tabs[0]:
-                r_col1, r_col2, r_col3 = st.columns(3)
-                with r_col1:
-                    high_risk_surgery = st.checkbox("Cirurgia de alto risco")
-                    history_ischemic_heart_disease = st.checkbox("Doença cardíaca isquêmica")
-                with r_col2:
-                    history_congestive_heart_failure = st.checkbox("Insuficiência cardíaca")
-                    history_cerebrovascular_disease = st.checkbox("Doença cerebrovascular")
-                with r_col3:
-                    insulin_therapy_diabetes = st.checkbox("Diabetes em insulina")
-                    preop_creat_gt_2 = st.checkbox("Creatinina > 2 mg/dL")
-
-                rcri_result = calculate_rcri(
-                    high_risk_surgery=high_risk_surgery,
-                    history_ischemic_heart_disease=history_ischemic_heart_disease,
-                    history_congestive_heart_failure=history_congestive_heart_failure,
-                    history_cerebrovascular_disease=history_cerebrovascular_disease,
-                    insulin_therapy_diabetes=insulin_therapy_diabetes,
-                    preoperative_creatinine_gt_2mg_dl=preop_creat_gt_2,
-                )
-                st.session_state["results"]["rcri"] = rcri_result
-                st.success(f"RCRI: {rcri_result.score} (Risco {rcri_result.risk_category})")
-
-            with tabs[1]:
-                a1, a2, a3 = st.columns(3)
-                with a1:
-                    age_51_80 = st.checkbox("Idade 51-80")
-                    age_gt_80 = st.checkbox("Idade > 80")
-                    resp_inf = st.checkbox("Infecção respiratória < 1 mês")
-                with a2:
-                    low_spo2 = st.checkbox("SpO2 91–95%")
-                    very_low_spo2 = st.checkbox("SpO2 ≤ 90%")
-                    anemia = st.checkbox("Anemia")
-                with a3:
-                    surg_upper = st.checkbox("Cirurgia abdome superior")
-                    surg_intrath = st.checkbox("Cirurgia intratorácica")
-                    dur_2_3 = st.checkbox("Duração 2–3h")
-                    dur_gt_3 = st.checkbox("Duração > 3h")
-                    emerg = st.checkbox("Cirurgia de emergência")
-
-                ariscat_score, ariscat_risk, ariscat_details = calculate_ariscat(
-                    age_51_80=age_51_80,
-                    age_gt_80=age_gt_80,
-                    low_spo2=low_spo2,
-                    very_low_spo2=very_low_spo2,
-                    resp_infection_last_month=resp_inf,
-                    anemia=anemia,
-                    surgery_upper_abdominal=surg_upper,
-                    surgery_intrathoracic=surg_intrath,
-                    duration_2_to_3h=dur_2_3,
-                    duration_gt_3h=dur_gt_3,
-                    emergency_surgery=emerg,
-                )
-                st.session_state["results"]["ariscat"] = {
-                    "score": ariscat_score,
-                    "risk": ariscat_risk,
-                    "details": ariscat_details,
-                }
-                st.success(f"ARISCAT: {ariscat_score} (Risco {ariscat_risk})")
-
-            with tabs[2]:
-                s1, s2, s3, s4 = st.columns(4)
-                with s1:
-                    snoring = st.checkbox("Ronco")
-                    tired = st.checkbox("Cansaço diurno")
-                with s2:
-                    observed_apnea = st.checkbox("Apneia observada")
-                    high_bp = st.checkbox("Hipertensão")
-                with s3:
-                    bmi_over_35 = st.checkbox("IMC > 35")
-                    age_over_50 = st.checkbox("Idade > 50")
-                with s4:
-                    neck_circ_over_40 = st.checkbox("Circunf. pescoço > 40cm")
-                    male = st.checkbox("Masculino")
-
-                stopbang_result = calculate_stopbang(
-                    snoring=snoring,
-                    tired=tired,
-                    observed_apnea=observed_apnea,
-                    high_bp=high_bp,
-                    bmi_over_35=bmi_over_35,
-                    age_over_50=age_over_50,
-                    neck_circ_over_40cm=neck_circ_over_40,
-                    male=male,
-                )
-                st.session_state["results"]["stopbang"] = stopbang_result
-                st.success(f"STOP-Bang: {stopbang_result.score} (Risco {stopbang_result.risk_category})")
+            # Só o escore selecionado monta widgets e é recalculado; os demais mantêm o último
+            # resultado em session_state["results"] (lido pelo Relatório)
+            active = st.radio("Escore", RISK_TAB_OPTIONS, horizontal=True, key="active_risk_tab")
+
+            if active == "RCRI":
+                _rcri_tab()
+            elif active == "ARISCAT":
+                _ariscat_tab()
+            else:
+                _stopbang_tab()
 
             st.markdown("</div>", unsafe_allow_html=True)
 
 
+    @st.fragment
     def _show_report_section() -> None:
+        from src.scores import classify_asa
+
         with st.container():
             st.markdown("<div class='card'>", unsafe_allow_html=True)
             st.subheader("Relatório")
@@ -747,24 +1061,21 @@ if st.session_state.get("disclaimer_ok", False):
             rcri = st.session_state["results"].get("rcri")
             ariscat = st.session_state["results"].get("ariscat")
             stopbang = st.session_state["results"].get("stopbang")
+            # Presença de cada escore verificada uma vez; (pontuação, risco) reaproveitados na tabela e no PDF
+            rcri_sr = _score_pair(rcri)
+            ariscat_sr = (ariscat["score"], ariscat["risk"]) if ariscat else (None, None)
+            stopbang_sr = _score_pair(stopbang)
 
             st.write("Resumo atual dos escores:")
-            colA, colB, colC = st.columns(3)
-            with colA:
-                if rcri:
-                    st.metric("RCRI", rcri.score, rcri.risk_category)
-                else:
-                    st.info("RCRI não calculado")
-            with colB:
-                if ariscat:
-                    st.metric("ARISCAT", ariscat["score"], ariscat["risk"])
-                else:
-                    st.info("ARISCAT não calculado")
-            with colC:
-                if stopbang:
-                    st.metric("STOP-Bang", stopbang.score, stopbang.risk_category)
-                else:
-                    st.info("STOP-Bang não calculado")
+            import pandas as pd
+            summary = pd.DataFrame(
+                [
+                    {"Escore": name, "Valor": "-" if score is None else str(score), "Risco": risk or "-"}
+                    for name, (score, risk) in (("RCRI", rcri_sr), ("ARISCAT", ariscat_sr), ("STOP-Bang", stopbang_sr))
+                ]
+            )
+            # Uma única tabela no lugar de três colunas com st.metric/st.info
+            st.dataframe(summary, hide_index=True, use_container_width=True)
 
             st.markdown("---")
             st.subheader("Análise por IA")
@@ -793,7 +1104,7 @@ if st.session_state.get("disclaimer_ok", False):
                 pass
             # NSQIP proxy
             try:
-                nsqip_out = nsqip_proxy(
+                nsqip_out = _nsqip(
                     idade=int(st.session_state["patient"]["demographics"].get("idade", 60)),
                     sexo=str(st.session_state["patient"]["demographics"].get("sexo", "Feminino")),
                     status_funcional=str(st.session_state["patient"]["functional"].get("nsqip_status", "Independente")),
@@ -816,12 +1127,18 @@ if st.session_state.get("disclaimer_ok", False):
 
 
             with st.spinner("🤖 Gerando análise com IA..."):
-                ai_struct, ai_raw = analyze_general(payload, config)
+                # Importado só na seção de relatório, como o reportlab abaixo
+                from src.ai_analysis import analyze_all
+
+                # Análise geral + medicações em uma única requisição (ver analyze_all);
+                # a interpretação dos escores não é exibida no relatório
+                ai_results = analyze_all(payload, config, sections=("general", "medications"))
+                ai_struct, ai_raw = ai_results["general"]
                 st.session_state["ai_struct"] = ai_struct
                 st.session_state["ai_raw"] = ai_raw
 
                 # Recomendações de medicações estruturadas (IA)
-                meds_struct, meds_raw = analyze_medications(payload, config)
+                meds_struct, meds_raw = ai_results["medications"]
                 st.session_state["ai_meds"] = meds_struct
             
             
@@ -963,35 +1280,35 @@ if st.session_state.get("disclaimer_ok", False):
             st.markdown("---")
             st.subheader("Exportar PDF")
             file_name = st.text_input("Nome do arquivo", value="relatorio_paciente.pdf")
-            if st.button("Gerar PDF"):
+            if st.button("Gerar PDF", disabled="pdf_job" in st.session_state):
                 patient = st.session_state["patient"]
-                output_dir = Path(config.reports_dir)
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / file_name
-                pdf_path = build_pdf_report(
-                    output_path=output_path,
-                    patient_info={"Nome": patient["demographics"]["nome"], "Idade": str(patient["demographics"]["idade"]), "Sexo": patient["demographics"]["sexo"]},
-                    rcri={
-                        "score": rcri.score if rcri else None,
-                        "risk": rcri.risk_category if rcri else None,
-                        "details": getattr(rcri, "details", {}),
-                    },
-                    ariscat=ariscat or {},
-                    stopbang={
-                        "score": stopbang.score if stopbang else None,
-                        "risk": stopbang.risk_category if stopbang else None,
-                        "details": getattr(stopbang, "details", {}),
-                    },
-                    ai_summary=st.session_state.get("ai_summary"),
-                )
-                with open(pdf_path, "rb") as f:
-                    st.download_button("Baixar PDF", data=f, file_name=file_name, mime="application/pdf")
-                st.success(f"PDF gerado em: {pdf_path}")
+                sections = {
+                    "patient_info": {"Nome": patient["demographics"]["nome"], "Idade": str(patient["demographics"]["idade"]), "Sexo": patient["demographics"]["sexo"]},
+                    "rcri": {"score": rcri_sr[0], "risk": rcri_sr[1], "details": getattr(rcri, "details", {})},
+                    "ariscat": ariscat or {},
+                    "stopbang": {"score": stopbang_sr[0], "risk": stopbang_sr[1], "details": getattr(stopbang, "details", {})},
+                    "ai_summary": st.session_state.get("ai_summary"),
+                }
+                output_path = Path(config.reports_dir) / file_name
+                future = _pdf_pool().submit(_render_pdf_job, output_path, json.dumps(sections, ensure_ascii=False))
+                st.session_state["pdf_job"] = (future, file_name, output_path)
+                st.session_state.pop("pdf_ready", None)
+                st.session_state.pop("pdf_error", None)
+                st.rerun()
+
+            if st.session_state.get("pdf_ready"):
+                pdf_bytes, ready_name, ready_path = st.session_state["pdf_ready"]
+                st.download_button("Baixar PDF", data=pdf_bytes, file_name=ready_name, mime="application/pdf")
+                st.success(f"PDF gerado em: {ready_path}")
+            elif st.session_state.get("pdf_error"):
+                st.error(f"Falha ao gerar o PDF: {st.session_state['pdf_error']}")
 
             st.markdown("</div>", unsafe_allow_html=True)
 
 
     def _show_interactive_visualizations() -> None:
+        from src.scores import ariscat_score as ariscat_score_full, classify_asa, rcri_score as rcri_score_full
+
         st.subheader("Visualizações Interativas")
 
         patient = st.session_state["patient"]
@@ -1000,6 +1317,14 @@ if st.session_state.get("disclaimer_ok", False):
         labs = patient.get("labs", {})
         comorb = patient.get("comorbidities", {})
         functional = patient.get("functional", {})
+        # Entradas comuns a vários escores, convertidas uma vez
+        idade = int(demo.get("idade", 60))
+        sexo = str(demo.get("sexo", "Feminino"))
+        emergencia = str(surgical.get("urgencia", "Eletiva")) != "Eletiva"
+        creatinina = float(labs.get("creatinina", 0.0))
+        tipo = surgical.get("tipo_cirurgia")
+        subtipo = surgical.get("subtipo")
+        incisao = surgical.get("incisao_site")
 
         rcri = st.session_state["results"].get("rcri")
         ariscat = st.session_state["results"].get("ariscat")
@@ -1012,11 +1337,11 @@ if st.session_state.get("disclaimer_ok", False):
 
         # NSQIP (proxy)
         try:
-            nsqip_out = nsqip_proxy(
-                idade=int(demo.get("idade", 60)),
-                sexo=str(demo.get("sexo", "Feminino")),
+            nsqip_out = _nsqip(
+                idade=idade,
+                sexo=sexo,
                 status_funcional=str(functional.get("nsqip_status", "Independente")),
-                emergencia=(str(surgical.get("urgencia", "Eletiva")) != "Eletiva"),
+                emergencia=emergencia,
                 asa=str(demo.get("asa", "II")),
                 diabetes=bool(comorb.get("diabetes_tipo_1") or comorb.get("diabetes_tipo_2")),
                 hipertensao=bool(comorb.get("hipertensao")),
@@ -1024,7 +1349,7 @@ if st.session_state.get("disclaimer_ok", False):
                 insuficiencia_cardiaca=bool(comorb.get("insuficiencia_cardiaca")),
                 procedimento=f"{surgical.get('tipo_cirurgia','')} {surgical.get('subtipo','')}",
                 hematocrito=float(labs.get("hematocrito", 0.0)),
-                creatinina=float(labs.get("creatinina", 0.0)),
+                creatinina=creatinina,
                 albumina=float(labs.get("albumina", 0.0)),
                 plaquetas=float(labs.get("plaquetas", 0.0)),
             )
@@ -1036,12 +1361,12 @@ if st.session_state.get("disclaimer_ok", False):
         try:
             rcri_details = getattr(rcri, "details", {}) if rcri else {}
             rcri_full = rcri_score_full(
-                high_risk_surgery=bool(rcri_details.get("high_risk_surgery")) or (surgical.get("incisao_site") == "Intratorácica") or (surgical.get("tipo_cirurgia") == "Cardíaca") or (surgical.get("tipo_cirurgia") == "Vascular" and surgical.get("subtipo") == "Suprainguinal"),
+                high_risk_surgery=bool(rcri_details.get("high_risk_surgery")) or incisao == "Intratorácica" or tipo == "Cardíaca" or (tipo == "Vascular" and subtipo == "Suprainguinal"),
                 ischemic_heart_disease=bool(rcri_details.get("history_ischemic_heart_disease")) or bool(comorb.get("doenca_cardiaca_isquemica")),
                 congestive_heart_failure=bool(rcri_details.get("history_congestive_heart_failure")) or bool(comorb.get("insuficiencia_cardiaca")),
                 cerebrovascular_disease=bool(rcri_details.get("history_cerebrovascular_disease")) or bool(comorb.get("doenca_cerebrovascular")),
                 insulin_treated_diabetes=bool(rcri_details.get("insulin_therapy_diabetes")) or bool(comorb.get("uso_insulina")),
-                creatinine_gt_2mg_dl=bool(rcri_details.get("preoperative_creatinine_gt_2mg_dl")) or (float(labs.get("creatinina", 0.0)) > 2.0),
+                creatinine_gt_2mg_dl=bool(rcri_details.get("preoperative_creatinine_gt_2mg_dl")) or (creatinina > 2.0),
             )
             rcri_pct = rcri_full.result.get("risk_percent")
             rcri_class_text = f"{rcri_full.result.get('class','')} - {rcri_full.result.get('risk_category','')}"
@@ -1052,16 +1377,16 @@ if st.session_state.get("disclaimer_ok", False):
         # ARISCAT completo
         try:
             ariscat_full = ariscat_score_full(
-                age_51_80=(int(demo.get("idade", 0)) >= 51 and int(demo.get("idade", 0)) <= 80),
-                age_gt_80=(int(demo.get("idade", 0)) > 80),
+                age_51_80=(51 <= idade <= 80),
+                age_gt_80=(idade > 80),
                 spo2_le_95=(float(patient.get("physical_exam", {}).get("spo2_ar_ambiente", 100.0)) <= 95.0),
                 resp_infection_last_month=bool(comorb.get("infeccao_respiratoria_mes")),
                 anemia_hb_le_10=(float(labs.get("hemoglobina", 100.0)) <= 10.0),
-                incision_abd_upper=(surgical.get("incisao_site") == "Abdome superior"),
-                incision_intrathoracic=(surgical.get("incisao_site") == "Intratorácica"),
+                incision_abd_upper=(incisao == "Abdome superior"),
+                incision_intrathoracic=(incisao == "Intratorácica"),
                 duration_2_to_3h=(surgical.get("duracao_cat") == "2-3h"),
                 duration_gt_3h=(surgical.get("duracao_cat") == ">3h"),
-                emergency_surgery=(str(surgical.get("urgencia", "Eletiva")) != "Eletiva"),
+                emergency_surgery=emergencia,
             )
             ariscat_pct = ariscat_full.result.get("probability_cpp_percent")
             ariscat_cat_text = ariscat_full.result.get("risk_category", "")
@@ -1071,29 +1396,27 @@ if st.session_state.get("disclaimer_ok", False):
 
         # AKICS
         try:
-            tipo = surgical.get("tipo_cirurgia", "Outras")
             if tipo == "Cardíaca":
-                tipo_map = {"Coronariana": "coronariana", "Valvar": "valvar", "Combinada": "combinada"}
-                tipo_card = tipo_map.get(surgical.get("subtipo", "Coronariana"), "coronariana")
-                akics_out = akics_score(
-                    idade=int(demo.get("idade", 60)),
-                    sexo_feminino=(str(demo.get("sexo", "Feminino")).lower() == "feminino"),
+                tipo_card = AKICS_TIPO_ARG.get(subtipo, "coronariana")
+                akics_out = _akics(
+                    idade=idade,
+                    sexo_feminino=(sexo.lower() == "feminino"),
                     insuficiencia_cardiaca=bool(comorb.get("insuficiencia_cardiaca")),
                     hipertensao=bool(comorb.get("hipertensao")),
-                    emergencia=(str(surgical.get("urgencia", "Eletiva")) != "Eletiva"),
+                    emergencia=emergencia,
                     tipo_cirurgia=tipo_card,
-                    creatinina_mg_dl=float(labs.get("creatinina", 0.0)),
+                    creatinina_mg_dl=creatinina,
                 )
             else:
-                comp = {"Pequeno": "baixa", "Médio": "media", "Grande": "alta", "Especial": "alta"}.get(surgical.get("porte", "Médio"), "media")
-                akics_out = akics_score(
-                    idade=int(demo.get("idade", 60)),
-                    sexo_feminino=(str(demo.get("sexo", "Feminino")).lower() == "feminino"),
+                comp = AKICS_COMPLEXIDADE.get(surgical.get("porte", "Médio"), "media")
+                akics_out = _akics(
+                    idade=idade,
+                    sexo_feminino=(sexo.lower() == "feminino"),
                     insuficiencia_cardiaca=bool(comorb.get("insuficiencia_cardiaca")),
                     hipertensao=bool(comorb.get("hipertensao")),
-                    emergencia=(str(surgical.get("urgencia", "Eletiva")) != "Eletiva"),
+                    emergencia=emergencia,
                     tipo_cirurgia="nao_cardiaca",
-                    creatinina_mg_dl=float(labs.get("creatinina", 0.0)),
+                    creatinina_mg_dl=creatinina,
                     nao_cardiaca_complexidade=comp,
                 )
             akics_pct = akics_out.result.get("probabilidade_percentual")
@@ -1105,8 +1428,8 @@ if st.session_state.get("disclaimer_ok", False):
         # PRE-DELIRIC
         try:
             pre_spec = st.session_state.get("scores_specific", {}).get("pre_deliric", {})
-            pred_out = pre_deliric_score(
-                idade=int(demo.get("idade", 60)),
+            pred_out = _pre_deliric(
+                idade=idade,
                 apache_ii=float(pre_spec.get("apache_ii", 0.0)),
                 grupo_admissao=str(pre_spec.get("grupo_admissao", "Cirúrgico")),
                 coma=bool(pre_spec.get("coma", False)),
@@ -1116,7 +1439,7 @@ if st.session_state.get("disclaimer_ok", False):
                 sedativos=bool(patient.get("medications", {}).get("classes", {}).get("sedativos_benzos", False)),
                 morfina=bool(patient.get("medications", {}).get("classes", {}).get("opioides", False)),
                 ureia_mg_dl=float(labs.get("ureia", 0.0)),
-                creatinina_mg_dl=float(labs.get("creatinina", 0.0)),
+                creatinina_mg_dl=creatinina,
             )
             pred_pct = pred_out.result.get("probabilidade_percentual")
             pred_cat = pred_out.result.get("categoria_risco", "")
@@ -1125,11 +1448,7 @@ if st.session_state.get("disclaimer_ok", False):
             pred_cat = ""
 
         # Normalizações
-        def asa_to_pct(asa_label: str) -> float:
-            map_pct = {"I": 5.0, "II": 10.0, "III": 25.0, "IV": 50.0, "V": 75.0, "VI": 90.0}
-            return map_pct.get(asa_label, 10.0)
-
-        asa_pct = asa_to_pct(str(demo.get("asa", "II")))
+        asa_pct = ASA_RISK_PCT.get(str(demo.get("asa", "II")), 10.0)
         ns_mort = float(nsqip_res.get("mortality_30d_pct", 0.0)) if nsqip_res else 0.0
         rcri_pct = float(rcri_pct) if rcri_pct is not None else 0.0
         ariscat_pct = float(ariscat_pct) if ariscat_pct is not None else 0.0
@@ -1137,55 +1456,36 @@ if st.session_state.get("disclaimer_ok", False):
         pred_pct = float(pred_pct) if pred_pct is not None else 0.0
 
         # Radar
-        radar_categories = ["Mortalidade (NSQIP)", "Cardíaco (RCRI)", "Pulmonar (ARISCAT)", "Renal (AKICS)", "Delirium (PRE-DELIRIC)", "Geral (ASA)"]
-        radar_values = [ns_mort, rcri_pct, ariscat_pct, akics_pct, pred_pct, asa_pct]
-        fig_radar = go.Figure()
-        fig_radar.add_trace(go.Scatterpolar(r=radar_values, theta=radar_categories, fill='toself', name='Riscos (%)'))
-        fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 100])), showlegend=False)
+        fig_radar = _radar_figure(tuple(round(v, 1) for v in (ns_mort, rcri_pct, ariscat_pct, akics_pct, pred_pct, asa_pct)))
         st.plotly_chart(fig_radar, use_container_width=True)
 
-        # Barras
-        def risk_color(pct: float) -> str:
-            if pct >= 35:
-                return "#dc2626"
-            if pct >= 10:
-                return "#f59e0b"
-            return "#16a34a"
-        bars = []
+        # Barras: valores, rótulos e cores em tuplas paralelas (também são a chave do cache)
         rcri_class_text = f"{rcri_full.result.get('class','')} - {rcri_full.result.get('risk_category','')}" if 'rcri_full' in locals() else "RCRI"
         ariscat_cat_text = ariscat_full.result.get("risk_category", "") if 'ariscat_full' in locals() else ""
         akics_cat = akics_out.result.get("categoria_risco", "") if 'akics_out' in locals() else ""
         pred_cat = pred_out.result.get("categoria_risco", "") if 'pred_out' in locals() else ""
-        bars.append({"Escore": "NSQIP Mort.", "Valor": ns_mort, "Categoria": "-", "Label": f"NSQIP Mortalidade {ns_mort:.1f}%", "color": risk_color(ns_mort)})
-        bars.append({"Escore": "RCRI", "Valor": rcri_pct, "Categoria": rcri_class_text or "-", "Label": f"{rcri_class_text or 'RCRI'} ({rcri_pct:.1f}%)", "color": risk_color(rcri_pct)})
-        bars.append({"Escore": "ARISCAT", "Valor": ariscat_pct, "Categoria": ariscat_cat_text or "-", "Label": f"ARISCAT {ariscat_cat_text} ({ariscat_pct:.1f}%)", "color": risk_color(ariscat_pct)})
-        bars.append({"Escore": "AKICS", "Valor": akics_pct, "Categoria": akics_cat or "-", "Label": f"AKICS {akics_cat} ({akics_pct:.1f}%)", "color": risk_color(akics_pct)})
-        bars.append({"Escore": "PRE-DELIRIC", "Valor": pred_pct, "Categoria": pred_cat or "-", "Label": f"Delirium {pred_cat} ({pred_pct:.1f}%)", "color": risk_color(pred_pct)})
-        bars_fig = go.Figure(go.Bar(x=[b["Escore"] for b in bars], y=[b["Valor"] for b in bars], text=[b["Label"] for b in bars], marker_color=[b["color"] for b in bars], textposition='outside'))
-        bars_fig.update_yaxes(title_text="%", range=[0, max(40, max([b["Valor"] for b in bars] + [10]) * 1.2)])
+        bar_values = (ns_mort, rcri_pct, ariscat_pct, akics_pct, pred_pct)
+        bar_labels = (
+            f"NSQIP Mortalidade {ns_mort:.1f}%",
+            f"{rcri_class_text or 'RCRI'} ({rcri_pct:.1f}%)",
+            f"ARISCAT {ariscat_cat_text} ({ariscat_pct:.1f}%)",
+            f"AKICS {akics_cat} ({akics_pct:.1f}%)",
+            f"Delirium {pred_cat} ({pred_pct:.1f}%)",
+        )
+        bar_colors = tuple(RISK_COLORS[bisect_right(RISK_COLOR_CUTOFFS, v)] for v in bar_values)
+        bars_fig = _bars_figure(tuple(round(v, 1) for v in bar_values), bar_labels, bar_colors)
         st.plotly_chart(bars_fig, use_container_width=True)
 
-        # Gauges
+        # Gauges: os quatro sistemas numa única figura
         st.markdown("### Indicadores por Sistema")
-        g1, g2, g3, g4 = st.columns(4)
         ns_card = float(nsqip_res.get("cardiac_complication_pct", rcri_pct)) if nsqip_res else rcri_pct
         cv_val = max(0.0, min(100.0, (rcri_pct + ns_card) / 2.0))
-        with g1:
-            fig_cv = go.Figure(go.Indicator(mode="gauge+number", value=cv_val, title={"text": "Cardio %"}, gauge={"axis": {"range": [0, 100]}, "steps": [{"range": [0, 10], "color": "#dcfce7"}, {"range": [10, 35], "color": "#fef9c3"}, {"range": [35, 100], "color": "#fee2e2"}]},))
-            st.plotly_chart(fig_cv, use_container_width=True)
         ns_pulm = float(nsqip_res.get("pneumonia_pct", ariscat_pct)) if nsqip_res else ariscat_pct
         pulm_val = max(0.0, min(100.0, (ariscat_pct + ns_pulm) / 2.0))
-        with g2:
-            fig_pulm = go.Figure(go.Indicator(mode="gauge+number", value=pulm_val, title={"text": "Pulmonar %"}, gauge={"axis": {"range": [0, 100]}, "steps": [{"range": [0, 10], "color": "#dcfce7"}, {"range": [10, 35], "color": "#fef9c3"}, {"range": [35, 100], "color": "#fee2e2"}]},))
-            st.plotly_chart(fig_pulm, use_container_width=True)
         ns_renal = float(nsqip_res.get("renal_failure_pct", akics_pct)) if nsqip_res else akics_pct
         renal_val = max(0.0, min(100.0, (akics_pct + ns_renal) / 2.0))
-        with g3:
-            fig_renal = go.Figure(go.Indicator(mode="gauge+number", value=renal_val, title={"text": "Renal %"}, gauge={"axis": {"range": [0, 100]}, "steps": [{"range": [0, 10], "color": "#dcfce7"}, {"range": [10, 35], "color": "#fef9c3"}, {"range": [35, 100], "color": "#fee2e2"}]},))
-            st.plotly_chart(fig_renal, use_container_width=True)
-        with g4:
-            fig_neuro = go.Figure(go.Indicator(mode="gauge+number", value=pred_pct, title={"text": "Delirium %"}, gauge={"axis": {"range": [0, 100]}, "steps": [{"range": [0, 10], "color": "#dcfce7"}, {"range": [10, 35], "color": "#fef9c3"}, {"range": [35, 100], "color": "#fee2e2"}]},))
-            st.plotly_chart(fig_neuro, use_container_width=True)
+        fig_gauges = _gauges_figure(tuple(round(v, 1) for v in (cv_val, pulm_val, renal_val, pred_pct)))
+        st.plotly_chart(fig_gauges, use_container_width=True)
 
         # Tabela interativa
         st.markdown("### Tabela Interativa de Escores")
@@ -1204,9 +1504,11 @@ if st.session_state.get("disclaimer_ok", False):
             table_rows.append({"Escore": "PRE-DELIRIC", "Pontuação": "-", "Categoria": pred_cat, "Risco %": pred_pct, "Interpretação": "Risco de delirium em UTI"})
         import pandas as pd
         df_scores = pd.DataFrame(table_rows)
-        filter_choice = st.selectbox("Filtrar por categoria de risco", options=["Todos", "Baixo", "Intermediário", "Alto", "Muito baixo", "Muito alto"]) 
+        filter_choice = st.selectbox("Filtrar por categoria de risco", options=RISK_FILTER_OPTIONS) 
         if filter_choice != "Todos":
-            df_scores = df_scores[df_scores["Categoria"].astype(str).str.contains(filter_choice, case=False, na=False)]
+            # Busca por trecho, sem diferenciar maiúsculas: "Baixo" também inclui "Muito baixo"
+            needle = filter_choice.lower()
+            df_scores = df_scores[[needle in str(c).lower() for c in df_scores["Categoria"]]]
         df_scores = df_scores.sort_values(by=["Risco %"], ascending=False, na_position="last")
         st.dataframe(df_scores, use_container_width=True)
 
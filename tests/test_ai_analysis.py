@@ -0,0 +1,36 @@
+import unittest
+
+from src.ai_analysis import _build_prompt_general, _canonicalize, _hash_patient_payload
+
+
+class CacheKeyNormalizationTest(unittest.TestCase):
+    def test_numeric_strings_hash_like_numbers(self):
+        as_text = {"patient": {"demographics": {"idade": "70", "peso": "72.5"}}, "scores": {}}
+        as_number = {"patient": {"demographics": {"idade": 70, "peso": 72.5}}, "scores": {}}
+        self.assertEqual(_hash_patient_payload(as_text), _hash_patient_payload(as_number))
+
+    def test_non_round_trip_strings_stay_text(self):
+        # "070" e "1e3" não voltam ao mesmo texto; continuam distintos de 70 e 1000
+        self.assertNotEqual(
+            _hash_patient_payload({"patient": {"x": "070"}}),
+            _hash_patient_payload({"patient": {"x": 70}}),
+        )
+        self.assertNotEqual(
+            _hash_patient_payload({"patient": {"x": "1e3"}}),
+            _hash_patient_payload({"patient": {"x": 1000}}),
+        )
+
+    def test_equivalent_payloads_share_key(self):
+        a = {"patient": {"notes": "  dor   torácica ", "labs": {}, "idade": 70.0}, "scores": {"asa": None}}
+        b = {"patient": {"notes": "dor torácica", "idade": 70}, "scores": {}}
+        self.assertEqual(_hash_patient_payload(a), _hash_patient_payload(b))
+
+    def test_prompt_keeps_original_text(self):
+        payload = {"patient": {"clinical": {"notas": "HAS  há 10 anos\nem uso de losartana", "obs": ""}}, "scores": {}}
+        prompt = _build_prompt_general(payload, _canonicalize(payload))
+        self.assertIn("HAS  há 10 anos\\nem uso de losartana", prompt)
+        self.assertIn('"obs":""', prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()